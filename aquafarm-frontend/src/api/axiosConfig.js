@@ -26,9 +26,41 @@ axiosInstance.interceptors.request.use(
   },
 )
 
+// Tamaño de página (máximo del backend) al recorrer las páginas siguientes de un listado
+const LIMITE_PAGINAS = 1000
+
+// Recorre los enlaces `next` de un listado paginado y retorna todos sus resultados
+const obtenerTodasLasPaginas = async (data) => {
+  const resultados = [...data.results]
+  let next = data.next
+  while (next) {
+    const url = new URL(next)
+    url.searchParams.set("limite", LIMITE_PAGINAS)
+    const pagina = await axiosInstance.get(url.toString())
+    resultados.push(...pagina.data)
+    next = pagina.paginacion.next
+  }
+  return resultados
+}
+
 // Interceptor para manejar errores de respuesta
 axiosInstance.interceptors.response.use(
-  (response) => {
+  async (response) => {
+    // Los listados vienen paginados por cursor ({ next, previous, results }).
+    // Por defecto se entrega solo la página pedida y los enlaces quedan en
+    // response.paginacion, para que las vistas carguen más bajo demanda.
+    // Solo los catálogos pequeños (fincas, estanques, especies, métodos,
+    // sensores) piden { todasLasPaginas: true } para recibir el arreglo completo.
+    const data = response.data
+    if (data && Array.isArray(data.results) && "next" in data) {
+      if (response.config.todasLasPaginas) {
+        response.paginacion = { next: null, previous: null }
+        response.data = await obtenerTodasLasPaginas(data)
+      } else {
+        response.paginacion = { next: data.next, previous: data.previous ?? null }
+        response.data = data.results
+      }
+    }
     return response
   },
   async (error) => {
@@ -88,10 +88,10 @@ export const farmService = {
   // Obtener todas las fincas
   getAllFarms: async () => {
     try {
-      const response = await api.get("/fincas/")
+      const response = await api.get("/fincas/", { todasLasPaginas: true })
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
       }
     } catch (error) {
       console.error("Error al obtener fincas:", error)
@@ -105,7 +105,7 @@ export const farmService = {
   // Obtener mis fincas
   getMyFarms: async () => {
     try {
-      const response = await api.get("/fincas/mis_fincas/")
+      const response = await api.get("/fincas/mis_fincas/", { todasLasPaginas: true })
       return {
         success: true,
         data: response.data,
@@ -119,6 +119,42 @@ export const farmService = {
     }
   },
 
+  // Obtener el tablero de una finca (estanques con últimas lecturas y alertas,
+  // inventario, siembras y desdobles) en una sola petición
+  getFarmDashboard: async (id) => {
+    try {
+      const response = await api.get(`/fincas/${id}/dashboard/`)
+      return {
+        success: true,
+        data: response.data,
+      }
+    } catch (error) {
+      console.error("Error al obtener tablero de finca:", error)
+      return {
+        success: false,
+        error: error.response?.data || "Error al obtener tablero de finca",
+      }
+    }
+  },
+
+  // Proyección de peso, biomasa y fecha de cosecha de los estanques activos
+  // (params: { dias } o { fecha }, y opcionalmente { peso_objetivo } en kg)
+  getFarmProjection: async (id, params = {}) => {
+    try {
+      const response = await api.get(`/fincas/${id}/proyeccion/`, { params })
+      return {
+        success: true,
+        data: response.data,
+      }
+    } catch (error) {
+      console.error("Error al obtener proyección de finca:", error)
+      return {
+        success: false,
+        error: error.response?.data || "Error al obtener proyección de finca",
+      }
+    }
+  },
+
   // Obtener una finca por ID
   getFarm: async (id) => {
     try {
@@ -190,10 +226,10 @@ export const pondService = {
   // Obtener todos los estanques
   getAllPonds: async () => {
     try {
-      const response = await api.get("/estanques/")
+      const response = await api.get("/estanques/", { todasLasPaginas: true })
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
       }
     } catch (error) {
       console.error("Error al obtener estanques:", error)
@@ -207,7 +243,7 @@ export const pondService = {
   // Obtener estanques por finca
   getPondsByFarm: async (farmId) => {
     try {
-      const response = await api.get(`/estanques/by_finca/?finca_id=${farmId}`)
+      const response = await api.get(`/estanques/by_finca/?finca_id=${farmId}`, { todasLasPaginas: true })
       return {
         success: true,
         data: response.data,
@@ -268,6 +304,23 @@ export const pondService = {
       }
     }
   },
+
+  // Registrar mortalidad en un estanque (descuenta población e inventario)
+  registerMortality: async (id, mortalityData) => {
+    try {
+      const response = await api.post(`/estanques/${id}/mortalidad/`, mortalityData)
+      return {
+        success: true,
+        data: response.data,
+      }
+    } catch (error) {
+      console.error(`Error al registrar mortalidad en estanque ${id}:`, error)
+      return {
+        success: false,
+        error: error.response?.data || "Error al registrar mortalidad",
+      }
+    }
+  },
 }
 
 // Servicio de métodos acuícolas
@@ -275,10 +328,10 @@ export const methodService = {
   // Obtener todos los métodos
   getAllMethods: async () => {
     try {
-      const response = await api.get("/metodos-acuicolas/")
+      const response = await api.get("/metodos-acuicolas/", { todasLasPaginas: true })
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
       }
     } catch (error) {
       console.error("Error al obtener métodos acuícolas:", error)
@@ -295,10 +348,10 @@ export const speciesService = {
   // Obtener todas las especies
   getAllSpecies: async () => {
     try {
-      const response = await api.get("/especies/")
+      const response = await api.get("/especies/", { todasLasPaginas: true })
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
       }
     } catch (error) {
       console.error("Error al obtener especies:", error)
@@ -397,10 +450,10 @@ export const inventoryService = {
   // Obtener todo el inventario
   getAllInventory: async () => {
     try {
-      const response = await api.get("/inventarios/")
+      const response = await api.get("/inventarios/", { todasLasPaginas: true })
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
       }
     } catch (error) {
       console.error("Error al obtener inventario:", error)
@@ -414,7 +467,7 @@ export const inventoryService = {
   // Obtener inventario por finca
   getInventoryByFarm: async (farmId) => {
     try {
-      const response = await api.get(`/inventarios/by_finca/?finca_id=${farmId}`)
+      const response = await api.get(`/inventarios/by_finca/?finca_id=${farmId}`, { todasLasPaginas: true })
       return {
         success: true,
         data: response.data,
@@ -431,7 +484,7 @@ export const inventoryService = {
   // Obtener inventario por especie
   getInventoryBySpecies: async (speciesId) => {
     try {
-      const response = await api.get(`/inventarios/by_especie/?especie_id=${speciesId}`)
+      const response = await api.get(`/inventarios/by_especie/?especie_id=${speciesId}`, { todasLasPaginas: true })
       return {
         success: true,
         data: response.data,
@@ -484,15 +537,19 @@ export const inventoryService = {
   },
 }
 
+// Los listados de siembras, historiales, desdobles, monitoreos y alertas crecen
+// sin límite: entregan una página y en `next` el enlace de la siguiente (null en
+// la última), que la vista pasa como { siguiente } para cargar más bajo demanda
 // Servicio de siembras
 export const seedingService = {
   // Obtener todas las siembras
-  getAllSeedings: async () => {
+  getAllSeedings: async ({ siguiente } = {}) => {
     try {
-      const response = await api.get("/siembras/")
+      const response = await api.get(siguiente || "/siembras/")
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error("Error al obtener siembras:", error)
@@ -504,12 +561,15 @@ export const seedingService = {
   },
 
   // Obtener siembras por estanque
-  getSeedingsByPond: async (pondId) => {
+  getSeedingsByPond: async (pondId, { siguiente } = {}) => {
     try {
-      const response = await api.get(`/siembras/by_estanque/?estanque_id=${pondId}`)
+      const response = await api.get(siguiente || "/siembras/by_estanque/", {
+        params: siguiente ? undefined : { estanque_id: pondId },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener siembras de estanque ${pondId}:`, error)
@@ -521,12 +581,15 @@ export const seedingService = {
   },
 
   // Obtener siembras por finca
-  getSeedingsByFarm: async (farmId) => {
+  getSeedingsByFarm: async (farmId, { siguiente } = {}) => {
     try {
-      const response = await api.get(`/siembras/by_finca/?finca_id=${farmId}`)
+      const response = await api.get(siguiente || "/siembras/by_finca/", {
+        params: siguiente ? undefined : { finca_id: farmId },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener siembras de finca ${farmId}:`, error)
@@ -589,12 +652,15 @@ export const seedingService = {
 // Servicio de historial de siembras
 export const seedingHistoryService = {
   // Obtener historial por siembra
-  getHistoryBySeeding: async (seedingId) => {
+  getHistoryBySeeding: async (seedingId, { siguiente } = {}) => {
     try {
-      const response = await api.get(`/historiales-siembra/by_siembra/?siembra_id=${seedingId}`)
+      const response = await api.get(siguiente || "/historiales-siembra/by_siembra/", {
+        params: siguiente ? undefined : { siembra_id: seedingId },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener historial de siembra ${seedingId}:`, error)
@@ -606,12 +672,15 @@ export const seedingHistoryService = {
   },
 
   // Obtener historial por estado
-  getHistoryByStatus: async (status) => {
+  getHistoryByStatus: async (status, { siguiente } = {}) => {
     try {
-      const response = await api.get(`/historiales-siembra/by_estado/?estado=${status}`)
+      const response = await api.get(siguiente || "/historiales-siembra/by_estado/", {
+        params: siguiente ? undefined : { estado: status },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener historial por estado ${status}:`, error)
@@ -660,12 +729,13 @@ export const seedingHistoryService = {
 // Servicio de desdobles
 export const splitService = {
   // Obtener todos los desdobles
-  getAllSplits: async () => {
+  getAllSplits: async ({ siguiente } = {}) => {
     try {
-      const response = await api.get("/desdobles/")
+      const response = await api.get(siguiente || "/desdobles/")
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error("Error al obtener desdobles:", error)
@@ -677,12 +747,15 @@ export const splitService = {
   },
 
   // Obtener desdobles por finca
-  getSplitsByFarm: async (farmId) => {
+  getSplitsByFarm: async (farmId, { siguiente } = {}) => {
     try {
-      const response = await api.get(`/desdobles/by_finca/?finca_id=${farmId}`)
+      const response = await api.get(siguiente || "/desdobles/by_finca/", {
+        params: siguiente ? undefined : { finca_id: farmId },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener desdobles de finca ${farmId}:`, error)
@@ -694,12 +767,15 @@ export const splitService = {
   },
 
   // Obtener desdobles por estanque origen
-  getSplitsBySourcePond: async (pondId) => {
+  getSplitsBySourcePond: async (pondId, { siguiente } = {}) => {
     try {
-      const response = await api.get(`/desdobles/by_estanque_origen/?estanque_id=${pondId}`)
+      const response = await api.get(siguiente || "/desdobles/by_estanque_origen/", {
+        params: siguiente ? undefined : { estanque_id: pondId },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener desdobles de estanque origen ${pondId}:`, error)
@@ -730,13 +806,18 @@ export const splitService = {
 
 // Servicio de monitoreos
 export const monitoringService = {
-  // Obtener monitoreos por estanque
-  getMonitoringByPond: async (pondId, latest = false) => {
+  // Obtener monitoreos por estanque. El historial completo puede ser muy
+  // grande: se obtiene una página (de tamaño { limite } si se indica) y `next`
+  // trae el enlace de la siguiente (null en la última), que se pasa como { siguiente }
+  getMonitoringByPond: async (pondId, latest = false, { limite, siguiente } = {}) => {
     try {
-      const response = await api.get(`/monitoreos/by_estanque/?estanque_id=${pondId}&latest=${latest}`)
+      const response = await api.get(siguiente || "/monitoreos/by_estanque/", {
+        params: siguiente ? undefined : { estanque_id: pondId, latest, limite },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener monitoreos de estanque ${pondId}:`, error)
@@ -767,10 +848,10 @@ export const monitoringService = {
   // Obtener todos los sensores
   getAllSensors: async () => {
     try {
-      const response = await api.get("/sensores/")
+      const response = await api.get("/sensores/", { todasLasPaginas: true })
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
       }
     } catch (error) {
       console.error("Error al obtener sensores:", error)
@@ -785,12 +866,13 @@ export const monitoringService = {
 // Servicio de alertas
 export const alertService = {
   // Obtener todas las alertas
-  getAllAlerts: async () => {
+  getAllAlerts: async ({ siguiente } = {}) => {
     try {
-      const response = await api.get("/alertas/")
+      const response = await api.get(siguiente || "/alertas/")
       return {
         success: true,
-        data: response.data.results || response.data,
+        data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error("Error al obtener alertas:", error)
@@ -802,12 +884,15 @@ export const alertService = {
   },
 
   // Obtener alertas por estanque
-  getAlertsByPond: async (pondId) => {
+  getAlertsByPond: async (pondId, { siguiente } = {}) => {
     try {
-      const response = await api.get(`/alertas/by_estanque/?estanque_id=${pondId}`)
+      const response = await api.get(siguiente || "/alertas/by_estanque/", {
+        params: siguiente ? undefined : { estanque_id: pondId },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener alertas de estanque ${pondId}:`, error)
@@ -819,12 +904,15 @@ export const alertService = {
   },
 
   // Obtener alertas por estado
-  getAlertsByStatus: async (status) => {
+  getAlertsByStatus: async (status, { siguiente } = {}) => {
     try {
-      const response = await api.get(`/alertas/by_estado/?estado=${status}`)
+      const response = await api.get(siguiente || "/alertas/by_estado/", {
+        params: siguiente ? undefined : { estado: status },
+      })
       return {
         success: true,
         data: response.data,
+        next: response.paginacion?.next ?? null,
       }
     } catch (error) {
       console.error(`Error al obtener alertas por estado ${status}:`, error)
@@ -2,9 +2,104 @@ from django.contrib import admin
 from .models import (
     TipoUsuario, MetodoAcuicola, Finca, Usuario, TipoEstanque, 
     Estanque, Especie, Inventario, Siembra, HistorialSiembra,
-    Desdoble, BitacoraDesdoble, HistorialEstanques, Sensor,
-    Monitoreo, Alerta
+    Desdoble, BitacoraDesdoble, HistorialEstanques, Sensor, ReglaUmbral,
+    Monitoreo, MonitoreoUltimo, MonitoreoResumen, Alerta,
+    MovimientoInventario, SnapshotInventario, EstadoEstanque, Mortalidad
 )
+from .servicios import (
+    actualizar_desdoble, actualizar_monitoreo, actualizar_siembra, corregir_monitoreos, eliminar_desdoble,
+    eliminar_monitoreo, eliminar_siembra, registrar_cancelacion, registrar_comercializacion, registrar_desdoble,
+    registrar_monitoreo, registrar_mortalidad, registrar_siembra
+)
+
+
+class ServicioAdmin(admin.ModelAdmin):
+    """Aplica al crear desde el admin las mismas reglas de negocio que la API"""
+    servicio = None
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if not change:
+            type(self).servicio(obj)
+
+
+class SiembraAdmin(ServicioAdmin):
+    servicio = registrar_siembra
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        anterior = Siembra.objects.get(pk=obj.pk)
+        super().save_model(request, obj, form, change)
+        actualizar_siembra(obj, anterior)
+
+    def delete_model(self, request, obj):
+        eliminar_siembra(obj)
+        super().delete_model(request, obj)
+
+    def delete_queryset(self, request, queryset):
+        # Una por una: la parte de cada siembra se calcula frente a las que siguen pendientes
+        for siembra in queryset:
+            eliminar_siembra(siembra)
+            siembra.delete()
+
+
+class DesdobleAdmin(ServicioAdmin):
+    servicio = registrar_desdoble
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        anterior = Desdoble.objects.get(pk=obj.pk)
+        super().save_model(request, obj, form, change)
+        actualizar_desdoble(obj, anterior)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        eliminar_desdoble(obj)
+
+    def delete_queryset(self, request, queryset):
+        desdobles = list(queryset)
+        super().delete_queryset(request, queryset)
+        for desdoble in desdobles:
+            eliminar_desdoble(desdoble)
+
+
+class MonitoreoAdmin(ServicioAdmin):
+    servicio = registrar_monitoreo
+
+    def save_model(self, request, obj, form, change):
+        if not change:
+            return super().save_model(request, obj, form, change)
+        anterior = Monitoreo.objects.values_list('idEstanque', 'idSensor', 'fecha').get(pk=obj.pk)
+        super().save_model(request, obj, form, change)
+        actualizar_monitoreo(obj, anterior)
+
+    def delete_model(self, request, obj):
+        super().delete_model(request, obj)
+        eliminar_monitoreo(obj)
+
+    def delete_queryset(self, request, queryset):
+        lecturas = list(queryset.values_list('idEstanque', 'idSensor', 'fecha'))
+        super().delete_queryset(request, queryset)
+        corregir_monitoreos(lecturas)
+
+
+class MortalidadAdmin(ServicioAdmin):
+    servicio = registrar_mortalidad
+
+
+class HistorialSiembraAdmin(admin.ModelAdmin):
+    def save_model(self, request, obj, form, change):
+        estado_anterior = form.initial.get('estado') if change else None
+        super().save_model(request, obj, form, change)
+        if not change:
+            return
+        if estado_anterior != 'COMERCIALIZADO' and obj.estado == 'COMERCIALIZADO':
+            registrar_comercializacion(obj, cerrar=estado_anterior == 'PENDIENTE')
+        elif estado_anterior == 'PENDIENTE' and obj.estado == 'CANCELADO':
+            registrar_cancelacion(obj)
+
 
 admin.site.register(TipoUsuario)
 admin.site.register(MetodoAcuicola)
@@ -12,13 +107,20 @@ admin.site.register(Finca)
 admin.site.register(Usuario)
 admin.site.register(TipoEstanque)
 admin.site.register(Estanque)
+admin.site.register(EstadoEstanque)
+admin.site.register(Mortalidad, MortalidadAdmin)
 admin.site.register(Especie)
 admin.site.register(Inventario)
-admin.site.register(Siembra)
-admin.site.register(HistorialSiembra)
-admin.site.register(Desdoble)
+admin.site.register(MovimientoInventario)
+admin.site.register(SnapshotInventario)
+admin.site.register(Siembra, SiembraAdmin)
+admin.site.register(HistorialSiembra, HistorialSiembraAdmin)
+admin.site.register(Desdoble, DesdobleAdmin)
 admin.site.register(BitacoraDesdoble)
 admin.site.register(HistorialEstanques)
 admin.site.register(Sensor)
-admin.site.register(Monitoreo)
+admin.site.register(ReglaUmbral)
+admin.site.register(Monitoreo, MonitoreoAdmin)
+admin.site.register(MonitoreoUltimo)
+admin.site.register(MonitoreoResumen)
 admin.site.register(Alerta)
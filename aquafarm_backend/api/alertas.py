@@ -0,0 +1,582 @@
+"""
+Evaluación de alertas por lotes de monitoreos.
+
+Las lecturas de un lote se evalúan como arreglos: cada lectura se cruza con
+las siembras de su estanque y el resultado se compara contra una matriz de
+umbrales (especie x tipo de sensor x banda) construida desde las reglas
+compiladas. Solo las lecturas fuera de rango se convierten en objetos Alerta,
+que se acumulan en el incidente abierto de su estanque, especie y tipo o se
+insertan con un único bulk_create. Si NumPy no está instalado se usa una
+evaluación equivalente lectura por lectura.
+
+Las alertas activas se resuelven solas cuando las lecturas de su estanque y
+tipo de sensor siguen llegando dentro de rango durante una ventana
+configurable (ALERTAS_VENTANA_RESOLUCION_MINUTOS), siempre que esas lecturas
+cubran la ventana: al menos ALERTAS_RESOLUCION_MIN_LECTURAS y sin huecos de
+más de ALERTAS_RESOLUCION_HUECO_MAXIMO_MINUTOS.
+"""
+import math
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Alerta, Estanque, HistorialSiembra, Monitoreo, invalidar_tableros
+from .umbrales import SEVERIDAD_ORDEN, obtener_reglas
+from .versiones import obtener_version
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy es opcional
+    np = None
+
+INFINITO = math.inf
+
+
+class MatrizUmbrales:
+    """Umbrales de unas reglas compiladas dispuestos como arreglos NumPy"""
+
+    def __init__(self, reglas):
+        self.version = reglas.version
+        especies = sorted({especie_id for especie_id, _ in reglas.umbrales})
+        tipos = sorted({tipo for _, tipo in reglas.umbrales})
+        bandas = max((len(umbrales) for umbrales in reglas.umbrales.values()), default=1)
+
+        self.indice_especie = {especie_id: i for i, especie_id in enumerate(especies)}
+        self.indice_tipo = {tipo: i for i, tipo in enumerate(tipos)}
+        self.tipos = tipos
+        self.severidades = {}
+
+        # Las celdas sin regla quedan en NaN: toda comparación con NaN es falsa
+        forma = (len(especies) + 1, len(tipos) + 1, bandas)
+        self.minimos = np.full(forma, np.nan)
+        self.maximos = np.full(forma, np.nan)
+        for (especie_id, tipo), umbrales in reglas.umbrales.items():
+            i, j = self.indice_especie[especie_id], self.indice_tipo[tipo]
+            for k, umbral in enumerate(umbrales):
+                if umbral.minimo is not None:
+                    self.minimos[i, j, k] = umbral.minimo
+                if umbral.maximo is not None:
+                    self.maximos[i, j, k] = umbral.maximo
+                self.severidades[(i, j, k)] = umbral.severidad
+
+        # Los tipos de cada sensor ordenados por ID para traducirlos con searchsorted
+        sensores = sorted(reglas.tipos_sensor.items())
+        self.sensor_ids = np.array([sensor_id for sensor_id, _ in sensores], dtype=np.int64)
+        self.sensor_tipos = np.array(
+            [self.indice_tipo.get(tipo, len(tipos)) for _, tipo in sensores], dtype=np.int64
+        )
+
+    def indices_tipo(self, sensores):
+        """Traduce un arreglo de IDs de sensor al índice de su tipo (o la fila vacía)"""
+        vacio = len(self.tipos)
+        if not len(self.sensor_ids):
+            return np.full(len(sensores), vacio, dtype=np.int64)
+        posiciones = np.clip(np.searchsorted(self.sensor_ids, sensores), 0, len(self.sensor_ids) - 1)
+        encontrados = self.sensor_ids[posiciones] == sensores
+        return np.where(encontrados, self.sensor_tipos[posiciones], vacio)
+
+
+_matriz = None
+
+
+def obtener_matriz(reglas):
+    """Retorna la matriz de umbrales de las reglas, reconstruyéndola si cambió su versión"""
+    global _matriz
+    if _matriz is None or _matriz.version != reglas.version:
+        _matriz = MatrizUmbrales(reglas)
+    return _matriz
+
+
+class IndiceSiembrasActivas:
+    """
+    Índice en memoria estanque -> especies con siembras pendientes. Solo cambia
+    al crear, comercializar o cancelar siembras, por lo que se construye con una
+    consulta y se reutiliza hasta que cambia la versión 'siembras_activas'.
+    """
+
+    def __init__(self, version):
+        self.version = version
+        self.por_estanque = {}
+        activas = HistorialSiembra.objects.filter(estado='PENDIENTE').values_list(
+            'idSiembra__idEstanque', 'idSiembra__idEspecie'
+        ).distinct()
+        for estanque_id, especie_id in activas:
+            self.por_estanque.setdefault(estanque_id, []).append((especie_id, -INFINITO, INFINITO))
+
+
+_indice_siembras = None
+
+
+def obtener_indice_siembras():
+    """Retorna el índice de siembras activas, reconstruyéndolo solo si cambió su versión"""
+    global _indice_siembras
+    version = obtener_version('siembras_activas')
+    if _indice_siembras is None or _indice_siembras.version != version:
+        _indice_siembras = IndiceSiembrasActivas(version)
+    return _indice_siembras
+
+
+def siembras_activas_por_estanque(estanque_ids):
+    """
+    Retorna {estanque: [(especie, inicio, fin)]} con las siembras pendientes de
+    los estanques. Las siembras activas aplican a cualquier fecha de lectura.
+    """
+    indice = obtener_indice_siembras().por_estanque
+    return {estanque_id: indice[estanque_id] for estanque_id in estanque_ids if estanque_id in indice}
+
+
+def siembras_historicas_por_estanque(estanque_ids=None):
+    """
+    Retorna {estanque: [(especie, inicio, fin)]} con el intervalo en que cada
+    siembra estuvo en su estanque, para reevaluar lecturas históricas. Las
+    siembras pendientes siguen vigentes; las comercializadas terminan en su
+    fecha de comercialización y las canceladas en su última actualización.
+    """
+    historiales = HistorialSiembra.objects.values_list(
+        'idSiembra__idEstanque', 'idSiembra__idEspecie', 'idSiembra__fecha',
+        'estado', 'fechaComercializacion', 'fechaActualizacion'
+    )
+    if estanque_ids is not None:
+        historiales = historiales.filter(idSiembra__idEstanque__in=estanque_ids)
+
+    siembras = {}
+    for estanque_id, especie_id, fecha, estado, comercializacion, actualizacion in historiales:
+        if estado == 'PENDIENTE':
+            fin = INFINITO
+        else:
+            fin = (comercializacion or actualizacion).timestamp()
+        siembras.setdefault(estanque_id, []).append((especie_id, fecha.timestamp(), fin))
+    return siembras
+
+
+def evaluar_lecturas(monitoreo_ids, estanques, sensores, valores, tiempos, siembras_por_estanque, reglas=None):
+    """
+    Evalúa un lote de lecturas y retorna las alertas (sin guardar) que genera.
+
+    Las lecturas se reciben como secuencias paralelas (ID del monitoreo,
+    estanque, sensor, valor y fecha en segundos epoch). Cada lectura se cruza
+    con las siembras de su estanque vigentes en su fecha, según los intervalos
+    (especie, inicio, fin) de siembras_por_estanque.
+    """
+    reglas = reglas or obtener_reglas()
+    if not len(monitoreo_ids):
+        return []
+    if np is None:
+        return _evaluar_lecturas_python(
+            monitoreo_ids, estanques, sensores, valores, tiempos, siembras_por_estanque, reglas
+        )
+
+    matriz = obtener_matriz(reglas)
+    monitoreo_ids = np.asarray(monitoreo_ids, dtype=np.int64)
+    estanques = np.asarray(estanques, dtype=np.int64)
+    valores = np.asarray(valores, dtype=np.float64)
+    tiempos = np.asarray(tiempos, dtype=np.float64)
+    tipos = matriz.indices_tipo(np.asarray(sensores, dtype=np.int64))
+
+    # Siembras aplanadas en arreglos contiguos por estanque (formato CSR)
+    ids_estanque = sorted(siembras_por_estanque)
+    conteos = np.array([len(siembras_por_estanque[e]) for e in ids_estanque], dtype=np.int64)
+    inicios_estanque = np.concatenate(([0], np.cumsum(conteos)[:-1])) if len(conteos) else conteos
+    intervalos = [intervalo for e in ids_estanque for intervalo in siembras_por_estanque[e]]
+    vacio = len(matriz.indice_especie)
+    siembra_especie = np.array([matriz.indice_especie.get(i[0], vacio) for i in intervalos], dtype=np.int64)
+    siembra_id_especie = np.array([i[0] for i in intervalos], dtype=np.int64)
+    siembra_inicio = np.array([i[1] for i in intervalos], dtype=np.float64)
+    siembra_fin = np.array([i[2] for i in intervalos], dtype=np.float64)
+
+    # Número de siembras y posición de la primera siembra del estanque de cada lectura
+    ids_estanque = np.array(ids_estanque, dtype=np.int64)
+    if len(ids_estanque):
+        posiciones = np.clip(np.searchsorted(ids_estanque, estanques), 0, len(ids_estanque) - 1)
+        con_siembras = ids_estanque[posiciones] == estanques
+    else:
+        posiciones = np.zeros(len(estanques), dtype=np.int64)
+        con_siembras = np.zeros(len(estanques), dtype=bool)
+    repeticiones = np.where(con_siembras, conteos[posiciones] if len(conteos) else 0, 0)
+    total = int(repeticiones.sum())
+    if not total:
+        return []
+
+    # Pares (lectura, siembra): cada lectura se repite una vez por siembra de su estanque
+    lectura = np.repeat(np.arange(len(estanques)), repeticiones)
+    desplazamiento = np.arange(total) - np.repeat(np.cumsum(repeticiones) - repeticiones, repeticiones)
+    siembra = np.repeat(inicios_estanque[posiciones], repeticiones) + desplazamiento
+
+    # Solo las siembras vigentes en la fecha de la lectura
+    vigentes = (siembra_inicio[siembra] <= tiempos[lectura]) & (tiempos[lectura] <= siembra_fin[siembra])
+    lectura, siembra = lectura[vigentes], siembra[vigentes]
+
+    # Una especie con varias siembras vigentes se evalúa una sola vez por lectura
+    if len(lectura):
+        pares = np.unique(np.stack([lectura, siembra_id_especie[siembra]], axis=1), axis=0, return_index=True)[1]
+        lectura, siembra = lectura[pares], siembra[pares]
+
+    especie = siembra_especie[siembra]
+    tipo = tipos[lectura]
+    valor = valores[lectura][:, None]
+    minimos = matriz.minimos[especie, tipo]
+    maximos = matriz.maximos[especie, tipo]
+    bajos = valor < minimos
+    altos = valor > maximos
+    incumplidas = bajos | altos
+    con_alerta = incumplidas.any(axis=1)
+
+    # Las bandas están ordenadas por severidad: la primera incumplida es la más severa
+    banda = np.argmax(incumplidas, axis=1)
+    filas = np.nonzero(con_alerta)[0]
+    alertas = []
+    for fila in filas:
+        k = banda[fila]
+        i = lectura[fila]
+        especie_id = int(siembra_id_especie[siembra[fila]])
+        tipo_sensor = matriz.tipos[tipo[fila]]
+        medido = float(valores[i])
+        if bajos[fila, k]:
+            direccion, limite = 'BAJO', float(minimos[fila, k])
+        else:
+            direccion, limite = 'ALTO', float(maximos[fila, k])
+        alertas.append(_candidata(
+            int(monitoreo_ids[i]), int(estanques[i]), especie_id, tipo_sensor, medido, float(tiempos[i]),
+            direccion, limite, matriz.severidades[(int(especie[fila]), int(tipo[fila]), int(k))], reglas
+        ))
+    return alertas
+
+
+def _evaluar_lecturas_python(monitoreo_ids, estanques, sensores, valores, tiempos, siembras_por_estanque, reglas):
+    """Evaluación equivalente a evaluar_lecturas sin NumPy"""
+    alertas = []
+    for monitoreo_id, estanque_id, sensor_id, valor, tiempo in zip(monitoreo_ids, estanques, sensores, valores, tiempos):
+        tipo = reglas.tipo_sensor(sensor_id)
+        if not tipo:
+            continue
+        evaluadas = set()
+        for especie_id, inicio, fin in siembras_por_estanque.get(estanque_id, []):
+            if especie_id in evaluadas or not inicio <= tiempo <= fin:
+                continue
+            evaluadas.add(especie_id)
+            resultado = reglas.evaluar(especie_id, tipo, valor)
+            if resultado is None:
+                continue
+            umbral, direccion, limite = resultado
+            # Como en la evaluación vectorizada, valores y límites se reportan como float
+            alertas.append(_candidata(
+                monitoreo_id, estanque_id, especie_id, tipo, float(valor), float(tiempo),
+                direccion, float(limite), umbral.severidad, reglas
+            ))
+    return alertas
+
+
+def _candidata(monitoreo_id, estanque_id, especie_id, tipo, valor, tiempo, direccion, limite, severidad, reglas):
+    """Construye la alerta (sin guardar) de una lectura fuera de rango"""
+    alerta = Alerta(
+        idMonitoreo_id=monitoreo_id,
+        idEstanque_id=estanque_id,
+        idEspecie_id=especie_id,
+        tipoAlerta=tipo,
+        mensaje=reglas.mensaje(especie_id, tipo, valor, direccion, limite),
+        valorMedido=valor,
+        valorLimite=limite,
+        severidad=severidad,
+        conteo=1,
+        ultimoValor=valor,
+        fechaUltimaLectura=datetime.fromtimestamp(tiempo, tz=dt_timezone.utc)
+    )
+    return alerta
+
+
+def clave_incidente(alerta):
+    return (alerta.idEstanque_id, alerta.idEspecie_id, alerta.tipoAlerta)
+
+
+def obtener_histeresis():
+    return timedelta(minutes=getattr(settings, 'ALERTAS_HISTERESIS_MINUTOS', 30))
+
+
+def fin_incidente(alerta):
+    """
+    Fecha de lectura en que terminó una alerta resuelta: la lectura dentro de
+    rango que la resolvió o, si se resolvió a mano, su última lectura fuera de
+    rango. La histéresis se mide en fechas de lectura, no en la hora en que se
+    procesó la resolución.
+    """
+    return alerta.fechaLecturaResolucion or alerta.fechaUltimaLectura
+
+
+def agrupar_incidentes(candidatas, abiertas, histeresis, absorber_activas=True):
+    """
+    Agrupa alertas candidatas (una por lectura fuera de rango) en incidentes
+    por (estanque, especie, tipo de alerta). Una candidata se acumula en la
+    alerta de su clave en `abiertas` si esa alerta sigue activa o si la lectura
+    llega dentro de la histéresis desde que terminó (ver fin_incidente); en
+    otro caso inicia un incidente nuevo. Una alerta resuelta se reabre solo si
+    la lectura es posterior a su fin: una lectura atrasada se cuenta sin
+    reabrirla. Las alertas ignoradas no acumulan lecturas.
+
+    `abiertas` se actualiza en el lugar. Retorna (nuevas, actualizadas,
+    reabiertas) donde actualizadas es {alerta: lecturas acumuladas} para
+    alertas ya guardadas y reabiertas el conjunto de las que pasan de
+    RESUELTA a ACTIVA.
+    """
+    nuevas = []
+    actualizadas = {}
+    reabiertas = set()
+    for candidata in sorted(candidatas, key=lambda alerta: alerta.fechaUltimaLectura):
+        clave = clave_incidente(candidata)
+        alerta = abiertas.get(clave)
+        if alerta is not None:
+            if alerta.estado == 'ACTIVA':
+                fin = None if absorber_activas else alerta.fechaUltimaLectura
+            elif alerta.estado == 'RESUELTA':
+                fin = fin_incidente(alerta)
+            else:
+                alerta = fin = None
+            if fin is not None and candidata.fechaUltimaLectura - fin > histeresis:
+                alerta = None
+
+        if alerta is None:
+            abiertas[clave] = candidata
+            nuevas.append(candidata)
+            continue
+
+        if alerta.estado == 'RESUELTA' and (fin is None or candidata.fechaUltimaLectura > fin):
+            alerta.estado = 'ACTIVA'
+            alerta.fechaResolucion = None
+            alerta.fechaLecturaResolucion = None
+            if alerta.pk is not None:
+                reabiertas.add(alerta)
+        if alerta.fechaUltimaLectura is None or candidata.fechaUltimaLectura >= alerta.fechaUltimaLectura:
+            alerta.ultimoValor = candidata.ultimoValor
+            alerta.fechaUltimaLectura = candidata.fechaUltimaLectura
+        if SEVERIDAD_ORDEN.get(candidata.severidad, 0) > SEVERIDAD_ORDEN.get(alerta.severidad, 0):
+            alerta.severidad = candidata.severidad
+            alerta.valorLimite = candidata.valorLimite
+            alerta.mensaje = candidata.mensaje
+        if alerta.pk is None:
+            alerta.conteo += 1
+        else:
+            actualizadas[alerta] = actualizadas.get(alerta, 0) + 1
+    return nuevas, actualizadas, reabiertas
+
+
+def guardar_incidentes(nuevas, actualizadas, reabiertas=()):
+    """
+    Inserta las alertas nuevas, acumula las lecturas en las existentes y
+    reabre las reabiertas. El estado no va en el bulk_update: se reabre con un
+    UPDATE condicionado a que la alerta siga RESUELTA, para no deshacer una
+    resolución o un descarte hechos a mano mientras tanto.
+    """
+    if nuevas:
+        fincas = dict(Estanque.objects.filter(
+            idEstanque__in={alerta.idEstanque_id for alerta in nuevas}
+        ).values_list('idEstanque', 'idFinca'))
+        for alerta in nuevas:
+            alerta.idFinca_id = fincas.get(alerta.idEstanque_id)
+        Alerta.objects.bulk_create(nuevas, batch_size=500)
+    if actualizadas:
+        conteos = {}
+        for alerta, lecturas in actualizadas.items():
+            conteos[alerta] = alerta.conteo + lecturas
+            # El conteo se incrementa en la base de datos para no perder lecturas concurrentes
+            alerta.conteo = F('conteo') + lecturas
+        Alerta.objects.bulk_update(list(actualizadas), CAMPOS_INCIDENTE, batch_size=500)
+        for alerta, conteo in conteos.items():
+            alerta.conteo = conteo
+    if reabiertas:
+        Alerta.objects.filter(pk__in=[alerta.pk for alerta in reabiertas], estado='RESUELTA').update(
+            estado='ACTIVA', fechaResolucion=None, fechaLecturaResolucion=None
+        )
+    invalidar_tableros(fincas=[alerta.idFinca_id for alerta in [*nuevas, *actualizadas]])
+
+
+CAMPOS_INCIDENTE = ['conteo', 'ultimoValor', 'fechaUltimaLectura', 'severidad', 'valorLimite', 'mensaje']
+
+
+def registrar_alertas(candidatas):
+    """
+    Registra las alertas candidatas de un lote acumulándolas en las alertas
+    abiertas (o resueltas dentro de la histéresis) de su estanque, especie y
+    tipo, de modo que la tabla de alertas crece por incidente y no por lectura.
+    Las alertas ignoradas no se consideran: una lectura fuera de rango
+    posterior abre un incidente nuevo. Retorna (nuevas, actualizadas).
+    """
+    if not candidatas:
+        return [], []
+
+    histeresis = obtener_histeresis()
+    desde = min(candidata.fechaUltimaLectura for candidata in candidatas) - histeresis
+    existentes = Alerta.objects.filter(
+        idEstanque__in={candidata.idEstanque_id for candidata in candidatas},
+        tipoAlerta__in={candidata.tipoAlerta for candidata in candidatas}
+    ).annotate(
+        fin=Coalesce('fechaLecturaResolucion', 'fechaUltimaLectura')
+    ).filter(
+        Q(estado='ACTIVA') | Q(estado='RESUELTA', fin__gte=desde)
+    ).order_by('fechaCreacion', 'idAlerta')
+
+    # Por clave se usa la alerta activa o, si no hay, la resuelta más reciente
+    abiertas = {}
+    for alerta in existentes:
+        clave = clave_incidente(alerta)
+        actual = abiertas.get(clave)
+        if actual is None or actual.estado != 'ACTIVA' or alerta.estado == 'ACTIVA':
+            abiertas[clave] = alerta
+
+    nuevas, actualizadas, reabiertas = agrupar_incidentes(candidatas, abiertas, histeresis)
+    guardar_incidentes(nuevas, actualizadas, reabiertas)
+    return nuevas, list(actualizadas)
+
+
+def verificar_alertas_lote(monitoreos):
+    """
+    Verifica las alertas de un lote de monitoreos ya guardados (por ejemplo,
+    creados con bulk_create, que no dispara signals) contra las siembras
+    activas de sus estanques y registra los incidentes resultantes.
+    Retorna (nuevas, actualizadas).
+    """
+    if not monitoreos:
+        return [], []
+
+    siembras = siembras_activas_por_estanque({monitoreo.idEstanque_id for monitoreo in monitoreos})
+    alertas = evaluar_lecturas(
+        [monitoreo.pk for monitoreo in monitoreos],
+        [monitoreo.idEstanque_id for monitoreo in monitoreos],
+        [monitoreo.idSensor_id for monitoreo in monitoreos],
+        [monitoreo.valor for monitoreo in monitoreos],
+        [monitoreo.fecha.timestamp() for monitoreo in monitoreos],
+        siembras
+    )
+    return registrar_alertas(alertas)
+
+
+def obtener_ventana_resolucion():
+    return timedelta(minutes=getattr(settings, 'ALERTAS_VENTANA_RESOLUCION_MINUTOS', 60))
+
+
+def condicion_resolucion(ultimas_lecturas, ventana):
+    """
+    Condición sobre Alerta que selecciona las alertas cuya última lectura fuera
+    de rango es anterior en más de `ventana` a la última lectura recibida de su
+    estanque y tipo de sensor. `ultimas_lecturas` es {(estanque, tipo): fecha}.
+    """
+    condicion = Q()
+    for (estanque_id, tipo), fecha in ultimas_lecturas.items():
+        condicion |= Q(
+            idEstanque=estanque_id, tipoAlerta=tipo,
+            fechaUltimaLectura__lte=fecha - ventana
+        )
+    return condicion
+
+
+def obtener_cobertura_resolucion():
+    """Retorna (mínimo de lecturas, hueco máximo) que debe cumplir la ventana de resolución"""
+    return (
+        getattr(settings, 'ALERTAS_RESOLUCION_MIN_LECTURAS', 3),
+        timedelta(minutes=getattr(settings, 'ALERTAS_RESOLUCION_HUECO_MAXIMO_MINUTOS', 30))
+    )
+
+
+def lecturas_resolucion(alertas, ventana):
+    """
+    Revisa si las lecturas recibidas después de cada alerta cubren la ventana
+    de resolución. `alertas` son tuplas (alerta, estanque, tipo, fecha de la
+    última lectura fuera de rango) de alertas activas. Las lecturas del mismo
+    estanque y tipo posteriores a esa fecha están dentro de rango para la
+    especie de la alerta (si no, la habrían actualizado); la ventana queda
+    cubierta si llegan al menos el mínimo de lecturas, sin huecos mayores al
+    máximo, hasta una lectura que cierre la ventana.
+
+    Las lecturas de todas las alertas se traen con una consulta. Retorna
+    {alerta: fecha de la lectura que cierra su ventana} con las cubiertas.
+    """
+    if not alertas:
+        return {}
+    minimo, hueco = obtener_cobertura_resolucion()
+    rangos = {}
+    for _, estanque_id, tipo, fecha_ultima in alertas:
+        desde, hasta = rangos.get((estanque_id, tipo), (fecha_ultima, fecha_ultima))
+        rangos[(estanque_id, tipo)] = (min(desde, fecha_ultima), max(hasta, fecha_ultima))
+    condicion = Q()
+    for (estanque_id, tipo), (desde, hasta) in rangos.items():
+        condicion |= Q(
+            idEstanque=estanque_id, idSensor__tipo=tipo,
+            fecha__gt=desde, fecha__lte=hasta + ventana + hueco
+        )
+    lecturas = {}
+    for estanque_id, tipo, fecha in Monitoreo.objects.filter(condicion).order_by('fecha').values_list(
+        'idEstanque', 'idSensor__tipo', 'fecha'
+    ):
+        lecturas.setdefault((estanque_id, tipo), []).append(fecha)
+
+    resoluciones = {}
+    for alerta_id, estanque_id, tipo, fecha_ultima in alertas:
+        fechas = lecturas.get((estanque_id, tipo), [])
+        anterior, cuenta = fecha_ultima, 0
+        for fecha in fechas[bisect_right(fechas, fecha_ultima):]:
+            if fecha - anterior > hueco:
+                break
+            anterior = fecha
+            cuenta += 1
+            if fecha >= fecha_ultima + ventana:
+                if cuenta >= minimo:
+                    resoluciones[alerta_id] = fecha
+                break
+    return resoluciones
+
+
+def aplicar_resoluciones(alertas, resoluciones):
+    """
+    Resuelve con un único UPDATE las alertas de `resoluciones` (ver
+    lecturas_resolucion), guardando la fecha de la lectura que las resolvió.
+    Una alerta que recibió otra lectura fuera de rango mientras tanto no se
+    resuelve. Retorna el número de alertas resueltas.
+    """
+    if not resoluciones:
+        return 0
+    ultimas = {alerta_id: fecha_ultima for alerta_id, _, _, fecha_ultima in alertas}
+    resueltas = Alerta.objects.filter(
+        idAlerta__in=list(resoluciones), estado='ACTIVA',
+        fechaUltimaLectura=Case(*[
+            When(idAlerta=alerta_id, then=Value(ultimas[alerta_id])) for alerta_id in resoluciones
+        ])
+    ).update(
+        estado='RESUELTA', fechaResolucion=timezone.now(),
+        fechaLecturaResolucion=Case(*[
+            When(idAlerta=alerta_id, then=Value(fecha)) for alerta_id, fecha in resoluciones.items()
+        ])
+    )
+    if resueltas:
+        invalidar_tableros(estanques={
+            estanque_id for alerta_id, estanque_id, _, _ in alertas if alerta_id in resoluciones
+        })
+    return resueltas
+
+
+def resolver_alertas_lote(monitoreos):
+    """
+    Resuelve las alertas activas de los estanques y tipos de sensor del lote
+    cuyas lecturas llevan al menos la ventana de resolución dentro de rango y
+    la cubren (ver lecturas_resolucion). Debe llamarse después de registrar
+    las alertas del lote, para que una lectura fuera de rango del mismo lote
+    mantenga la alerta abierta. Retorna el número de alertas resueltas.
+    """
+    reglas = obtener_reglas()
+    ultimas = {}
+    for monitoreo in monitoreos:
+        tipo = reglas.tipo_sensor(monitoreo.idSensor_id)
+        if tipo is None or tipo == 'OTRO':
+            continue
+        clave = (monitoreo.idEstanque_id, tipo)
+        if clave not in ultimas or monitoreo.fecha > ultimas[clave]:
+            ultimas[clave] = monitoreo.fecha
+    if not ultimas:
+        return 0
+
+    ventana = obtener_ventana_resolucion()
+    vencidas = list(Alerta.objects.filter(condicion_resolucion(ultimas, ventana), estado='ACTIVA').values_list(
+        'idAlerta', 'idEstanque', 'tipoAlerta', 'fechaUltimaLectura'
+    ))
+    return aplicar_resoluciones(vencidas, lecturas_resolucion(vencidas, ventana))
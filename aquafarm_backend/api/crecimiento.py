@@ -0,0 +1,234 @@
+"""
+Modelo numérico de crecimiento y proyección de biomasa.
+
+Las tasas de crecimiento de las especies se capturan como texto libre
+('50-80g por mes', '2-3 kg', '6 meses'). Al guardar una TasaCrecimiento el
+texto se interpreta una sola vez y se guardan sus parámetros numéricos
+(crecimiento mensual y peso máximo en kg, meses para el peso máximo); un
+rango se toma por su punto medio y un texto que no se entiende deja el
+parámetro vacío.
+
+La proyección trata cada cohorte activa de una finca (los peces de una
+siembra pendiente en un estanque) como una fila de arreglos: el peso crece
+linealmente desde el peso de siembra, a la tasa mensual de la especie y
+hasta su peso máximo, contando desde la fecha de esa siembra. Peso y
+biomasa proyectados y fecha estimada de cosecha se calculan para todas las
+filas con operaciones NumPy; si NumPy no está instalado se usa un cálculo
+equivalente fila por fila. Una cohorte cuya siembra no registra peso
+inicial no se proyecta: queda marcada con peso desconocido.
+"""
+import math
+import re
+from datetime import timedelta
+
+from django.utils import timezone
+
+from .models import EstadoEstanque, Siembra
+from .servicios import peces_por_siembra
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - NumPy es opcional
+    np = None
+
+DIAS_POR_MES = 30.4375
+
+NUMERO = r'(\d+(?:[.,]\d+)?)'
+RANGO = NUMERO + r'(?:\s*(?:-|–|a|al|hasta)\s*' + NUMERO + r')?'
+
+# Unidades reconocidas -> factor a kg o a meses
+UNIDADES_PESO = (
+    (r'kg|kilos?|kilogramos?', 1.0),
+    (r'g|gr|grs|gramos?', 0.001),
+    (r'lb|lbs|libras?', 0.4536),
+)
+UNIDADES_TIEMPO = (
+    (r'mes|meses', 1.0),
+    (r'años?|anos?', 12.0),
+    (r'semanas?', 7 / DIAS_POR_MES),
+    (r'd[ií]as?', 1 / DIAS_POR_MES),
+)
+
+
+def _parsear(texto, unidades, defecto):
+    """Punto medio del primer número o rango del texto, convertido con el factor de su unidad"""
+    if texto is None:
+        return None
+    texto = str(texto).strip().lower()
+    for patron, factor in unidades:
+        coincidencia = re.search(rf'{RANGO}\s*(?:{patron})\b', texto)
+        if coincidencia:
+            break
+    else:
+        # Sin unidad se asume la unidad por defecto del campo
+        coincidencia, factor = re.search(rf'^{RANGO}$', texto), defecto
+    if not coincidencia:
+        return None
+    valores = [float(valor.replace(',', '.')) for valor in coincidencia.groups() if valor]
+    return sum(valores) / len(valores) * factor
+
+def parsear_peso(texto, defecto=1.0):
+    """Peso en kg de un texto como '50-80g' o '2-3 kg'; `defecto` es el factor si no trae unidad"""
+    return _parsear(texto, UNIDADES_PESO, defecto)
+
+def parsear_meses(texto):
+    """Meses de un texto como '6-8 meses', '1 año' o '20 semanas'; sin unidad se asumen meses"""
+    return _parsear(texto, UNIDADES_TIEMPO, 1.0)
+
+def completar_parametros(tasa):
+    """Asigna a una TasaCrecimiento los parámetros numéricos interpretados de sus textos"""
+    # El crecimiento mensual se expresa usualmente en gramos y el peso máximo en kg
+    tasa.crecimiento_mensual_kg = parsear_peso(tasa.crecimiento_mensual_promedio, defecto=0.001)
+    tasa.peso_maximo_kg = parsear_peso(tasa.peso_maximo)
+    tasa.meses_peso_maximo = parsear_meses(tasa.tiempo_para_peso_maximo)
+    return tasa
+
+def poblaciones_activas(finca_id):
+    """
+    Filas (estanque, especie, nombre, cantidad, peso inicial, inicio,
+    crecimiento, peso máximo, meses, siembra) de las cohortes con peces de la
+    finca, en cuatro consultas. Los peces de cada población (EstadoEstanque)
+    se reparten entre las siembras pendientes que están en el estanque según
+    lo que cada una sembró o llevó en desdobles (ver peces_por_siembra), y
+    cada cohorte toma la fecha y el peso inicial de su siembra; el peso
+    inicial es None si la siembra no lo registra. Una población sin siembras
+    pendientes conocidas queda como una sola fila desde su última
+    actualización, con su peso promedio de siembra.
+    """
+    estados = list(EstadoEstanque.objects.filter(idEstanque__idFinca=finca_id, cantidad__gt=0).order_by(
+        'idEstanque', 'idEspecie'
+    ).values_list(
+        'idEstanque', 'idEspecie', 'idEspecie__nombre', 'cantidad', 'biomasa', 'fechaActualizacion',
+        'idEspecie__tasa_crecimiento__crecimiento_mensual_kg', 'idEspecie__tasa_crecimiento__peso_maximo_kg',
+        'idEspecie__tasa_crecimiento__meses_peso_maximo'
+    ))
+    if not estados:
+        return []
+    cohortes = {}
+    for (siembra_id, estanque_id, especie_id), peces in sorted(peces_por_siembra({fila[0] for fila in estados}).items()):
+        if peces > 0:
+            cohortes.setdefault((estanque_id, especie_id), []).append((siembra_id, peces))
+    siembras = {
+        siembra_id: (fecha, peso_inicial)
+        for siembra_id, fecha, peso_inicial in Siembra.objects.filter(
+            idSiembra__in={siembra_id for grupo in cohortes.values() for siembra_id, _ in grupo}
+        ).values_list('idSiembra', 'fecha', 'pesoInicial')
+    }
+
+    filas = []
+    for estanque_id, especie_id, nombre, cantidad, biomasa, actualizacion, *tasa in estados:
+        grupo = cohortes.get((estanque_id, especie_id))
+        if not grupo:
+            filas.append((estanque_id, especie_id, nombre, cantidad, biomasa / cantidad or None, actualizacion, *tasa, None))
+            continue
+        # Reparto acumulado: las partes redondeadas suman exactamente la población
+        total = sum(peces for _, peces in grupo)
+        acumulado = asignados = 0
+        for siembra_id, peces in grupo:
+            acumulado += peces
+            parte = round(cantidad * acumulado / total) - asignados
+            asignados += parte
+            if parte:
+                fecha, peso_inicial = siembras[siembra_id]
+                filas.append((estanque_id, especie_id, nombre, parte, peso_inicial or None, fecha, *tasa, siembra_id))
+    return filas
+
+def proyectar_finca(finca_id, fecha, peso_objetivo=None, ahora=None):
+    """
+    Proyecta a `fecha` el peso y la biomasa de cada población activa de la
+    finca y estima cuándo alcanza el peso de cosecha (`peso_objetivo` en kg
+    o, si no se indica, el peso máximo de la especie).
+    """
+    ahora = ahora or timezone.now()
+    filas = poblaciones_activas(finca_id)
+    if not filas:
+        return []
+    calcular = _proyectar_python if np is None else _proyectar_numpy
+    resultados = calcular(filas, ahora.timestamp(), fecha.timestamp(), peso_objetivo)
+
+    proyecciones = []
+    for fila, (peso_actual, peso, meses_cosecha, inicio) in zip(filas, resultados):
+        estanque_id, especie_id, nombre, cantidad, peso_inicial = fila[:5]
+        cosecha = None
+        if not math.isnan(meses_cosecha):
+            cosecha = inicio + timedelta(days=meses_cosecha * DIAS_POR_MES)
+        proyecciones.append({
+            'idEstanque': estanque_id,
+            'idEspecie': especie_id,
+            'especie': nombre,
+            'idSiembra': fila[9],
+            'fecha_inicio': inicio,
+            'cantidad': cantidad,
+            'peso_desconocido': peso_inicial is None,
+            'peso_actual': _redondear(peso_actual, 4),
+            'biomasa_actual': _redondear(peso_actual * cantidad, 3),
+            'peso_proyectado': _redondear(peso, 4),
+            'biomasa_proyectada': _redondear(peso * cantidad, 3),
+            'fecha_cosecha_estimada': cosecha,
+        })
+    return proyecciones
+
+def _redondear(valor, decimales):
+    """Redondea un resultado de la proyección; NaN (peso inicial desconocido) queda como None"""
+    return None if math.isnan(valor) else round(valor, decimales)
+
+def _proyectar_numpy(filas, ahora, fecha, peso_objetivo):
+    """
+    Peso actual, peso proyectado y meses hasta la cosecha de todas las filas
+    como arreglos; un peso inicial desconocido es NaN y da NaN en las tres
+    """
+    peso_inicial = np.array([fila[4] if fila[4] is not None else np.nan for fila in filas], dtype=np.float64)
+    inicio = np.array([fila[5].timestamp() for fila in filas], dtype=np.float64)
+    crecimiento = np.array([fila[6] if fila[6] is not None else np.nan for fila in filas], dtype=np.float64)
+    peso_maximo = np.array([fila[7] if fila[7] is not None else np.nan for fila in filas], dtype=np.float64)
+    meses = np.array([fila[8] if fila[8] is not None else np.nan for fila in filas], dtype=np.float64)
+
+    # Sin crecimiento mensual pero con peso máximo y tiempo para alcanzarlo se deduce la tasa
+    with np.errstate(divide='ignore', invalid='ignore'):
+        deducido = np.where(meses > 0, (peso_maximo - peso_inicial) / meses, np.nan)
+    crecimiento = np.nan_to_num(np.where(np.isnan(crecimiento), deducido, crecimiento), nan=0.0).clip(min=0)
+    tope = np.where(np.isnan(peso_maximo), np.inf, peso_maximo)
+
+    segundos_por_mes = DIAS_POR_MES * 86400
+    edad_actual = ((ahora - inicio) / segundos_por_mes).clip(min=0)
+    edad_proyectada = ((fecha - inicio) / segundos_por_mes).clip(min=0)
+    peso_actual = np.minimum(tope, peso_inicial + crecimiento * edad_actual)
+    peso = np.minimum(tope, peso_inicial + crecimiento * edad_proyectada)
+
+    objetivo = np.full_like(tope, peso_objetivo) if peso_objetivo else tope
+    with np.errstate(divide='ignore', invalid='ignore'):
+        meses_cosecha = np.where(
+            (crecimiento > 0) & np.isfinite(objetivo), ((objetivo - peso_inicial) / crecimiento).clip(min=0), np.nan
+        )
+    # Un objetivo por encima del peso máximo no se alcanza
+    meses_cosecha = np.where(objetivo > tope, np.nan, meses_cosecha)
+
+    inicios = [fila[5] for fila in filas]
+    return list(zip(peso_actual.tolist(), peso.tolist(), meses_cosecha.tolist(), inicios))
+
+def _proyectar_python(filas, ahora, fecha, peso_objetivo):
+    """Mismo cálculo que _proyectar_numpy, fila por fila"""
+    segundos_por_mes = DIAS_POR_MES * 86400
+    resultados = []
+    for _, _, _, _, peso_inicial, inicio, crecimiento, peso_maximo, meses, _ in filas:
+        if peso_inicial is None:
+            resultados.append((math.nan, math.nan, math.nan, inicio))
+            continue
+        if crecimiento is None:
+            crecimiento = (peso_maximo - peso_inicial) / meses if peso_maximo is not None and meses else 0.0
+        crecimiento = max(crecimiento, 0.0)
+        tope = math.inf if peso_maximo is None else peso_maximo
+
+        edad_actual = max((ahora - inicio.timestamp()) / segundos_por_mes, 0)
+        edad_proyectada = max((fecha - inicio.timestamp()) / segundos_por_mes, 0)
+        objetivo = peso_objetivo or tope
+        meses_cosecha = math.nan
+        if crecimiento > 0 and math.isfinite(objetivo) and objetivo <= tope:
+            meses_cosecha = max((objetivo - peso_inicial) / crecimiento, 0)
+        resultados.append((
+            min(tope, peso_inicial + crecimiento * edad_actual),
+            min(tope, peso_inicial + crecimiento * edad_proyectada),
+            meses_cosecha,
+            inicio,
+        ))
+    return resultados
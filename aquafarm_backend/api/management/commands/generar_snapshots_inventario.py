@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.models import SnapshotInventario, existencias_al
+
+
+class Command(BaseCommand):
+    help = (
+        "Guarda un snapshot de las existencias de cada especie en cada finca a una "
+        "fecha de corte (por defecto ahora). Programado a diario, acota los "
+        "movimientos que lee una consulta de inventario a una fecha."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help="Fecha de corte (ISO 8601)")
+
+    def handle(self, *args, **options):
+        fecha = self._parsear_fecha(options['fecha']) if options['fecha'] else timezone.now()
+
+        with transaction.atomic():
+            if SnapshotInventario.objects.filter(fecha=fecha).exists():
+                raise CommandError(f"Ya existen snapshots con fecha de corte {fecha.isoformat()}")
+            # Cada corte incluye todos los pares con movimientos, aunque su cantidad sea cero
+            existencias = existencias_al(fecha)
+            SnapshotInventario.objects.bulk_create([
+                SnapshotInventario(idEspecie_id=especie_id, idFinca_id=finca_id, fecha=fecha, cantidad=cantidad)
+                for (especie_id, finca_id), cantidad in existencias.items()
+            ], batch_size=500)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(existencias)} snapshots de inventario al {fecha.isoformat()}"
+        ))
+
+    def _parsear_fecha(self, valor):
+        fecha = parse_datetime(valor)
+        if fecha is None:
+            raise CommandError(f"Fecha inválida: {valor}")
+        return timezone.make_aware(fecha) if timezone.is_naive(fecha) else fecha
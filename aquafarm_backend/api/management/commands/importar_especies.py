@@ -0,0 +1,171 @@
+import csv
+import json
+from itertools import islice
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from api.crecimiento import completar_parametros
+from api.models import (
+    Especie, InformacionNutricional, Mineral, TasaCrecimiento, TasaReproduccion, Vitamina, invalidar_modelos
+)
+from api.serializers import EspecieCreateUpdateSerializer
+
+# Relaciones uno a uno de la especie: (campo, modelo)
+RELACIONES = (
+    ('informacion_nutricional', InformacionNutricional),
+    ('tasa_crecimiento', TasaCrecimiento),
+    ('tasa_reproduccion', TasaReproduccion),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa un catálogo de especies desde JSON (lista de objetos con la forma "
+        "de la API de especies) o CSV (columnas planas; las relaciones con prefijo, "
+        "p. ej. 'tasa_crecimiento.descripcion', y vitaminas o minerales como "
+        "'nombre:cantidad;nombre:cantidad'). Las especies nuevas se insertan por "
+        "lotes con un bulk_create por tabla y una transacción por lote."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help="Ruta del catálogo (.json o .csv)")
+        parser.add_argument('--formato', choices=['json', 'csv'], help="Formato del archivo (por defecto según la extensión)")
+        parser.add_argument('--lote', type=int, default=200, help="Especies insertadas por transacción")
+        parser.add_argument('--actualizar', action='store_true', help="Actualizar las especies que ya existen con el mismo nombre")
+        parser.add_argument('--dry-run', action='store_true', help="Validar el catálogo sin escribirlo")
+
+    def handle(self, *args, **options):
+        ruta = Path(options['archivo'])
+        if not ruta.exists():
+            raise CommandError(f"No existe el archivo {ruta}")
+        formato = options['formato'] or ruta.suffix.lower().lstrip('.')
+        if formato not in ('json', 'csv'):
+            raise CommandError("Formato no soportado: use --formato json o csv")
+
+        filas = self._leer_json(ruta) if formato == 'json' else self._leer_csv(ruta)
+        validadas = self._validar(filas)
+
+        existentes = dict(
+            Especie.objects.filter(nombre__in=[datos['nombre'] for datos in validadas]).values_list('nombre', 'idEspecie')
+        )
+        nuevas = [datos for datos in validadas if datos['nombre'] not in existentes]
+        repetidas = [datos for datos in validadas if datos['nombre'] in existentes]
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f"{len(validadas)} especies válidas: {len(nuevas)} nuevas, {len(repetidas)} ya existen"
+            ))
+            return
+
+        iterador = iter(nuevas)
+        while True:
+            lote = list(islice(iterador, max(1, options['lote'])))
+            if not lote:
+                break
+            with transaction.atomic():
+                self._insertar(lote)
+
+        actualizadas = 0
+        if options['actualizar'] and repetidas:
+            especies = Especie.objects.select_related(*(campo for campo, _ in RELACIONES)).in_bulk(
+                list(existentes.values())
+            )
+            with transaction.atomic():
+                for datos in repetidas:
+                    EspecieCreateUpdateSerializer().update(especies[existentes[datos['nombre']]], datos)
+                    actualizadas += 1
+
+        # bulk_create no dispara signals: las versiones que dependen de las especies cambian una vez al final
+        invalidar_modelos([Especie, *(modelo for _, modelo in RELACIONES), Vitamina, Mineral])
+
+        omitidas = len(repetidas) - actualizadas
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(nuevas)} especies creadas, {actualizadas} actualizadas, {omitidas} omitidas por existir"
+        ))
+
+    def _leer_json(self, ruta):
+        try:
+            filas = json.loads(ruta.read_text(encoding='utf-8'))
+        except ValueError as e:
+            raise CommandError(f"JSON inválido: {e}")
+        if not isinstance(filas, list):
+            raise CommandError("El JSON debe ser una lista de especies")
+        return filas
+
+    def _leer_csv(self, ruta):
+        filas = []
+        with ruta.open(newline='', encoding='utf-8-sig') as archivo:
+            for registro in csv.DictReader(archivo):
+                fila = {}
+                for columna, valor in registro.items():
+                    valor = (valor or '').strip()
+                    if not columna or not valor:
+                        continue
+                    if columna in ('vitaminas', 'minerales'):
+                        fila[columna] = [
+                            dict(zip(('nombre', 'cantidad'), (parte.strip() for parte in item.split(':', 1))))
+                            for item in valor.split(';') if item.strip()
+                        ]
+                    elif '.' in columna:
+                        relacion, campo = columna.split('.', 1)
+                        fila.setdefault(relacion, {})[campo] = valor
+                    else:
+                        fila[columna] = valor
+                filas.append(fila)
+        return filas
+
+    def _validar(self, filas):
+        """Valida todas las filas antes de escribir; un error en cualquiera cancela la importación"""
+        validadas, errores = [], []
+        for numero, fila in enumerate(filas, start=1):
+            serializer = EspecieCreateUpdateSerializer(data=fila)
+            if serializer.is_valid():
+                validadas.append(serializer.validated_data)
+            else:
+                errores.append(f"Fila {numero}: {dict(serializer.errors)}")
+        if errores:
+            raise CommandError(
+                f"{len(errores)} filas inválidas, no se importó nada:\n" + "\n".join(errores[:20])
+            )
+        # Si el catálogo repite un nombre se conserva la última fila
+        return list({datos['nombre']: datos for datos in validadas}.values())
+
+    def _insertar(self, lote):
+        """Inserta un lote de especies nuevas con un bulk_create por tabla"""
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # Sin llaves primarias de vuelta en bulk_create se crea cada especie por separado
+            for datos in lote:
+                EspecieCreateUpdateSerializer().create(dict(datos))
+            return
+
+        relacionados = {}
+        for campo, modelo in RELACIONES:
+            instancias = {i: modelo(**datos[campo]) for i, datos in enumerate(lote) if datos.get(campo)}
+            if modelo is TasaCrecimiento:
+                # bulk_create no llama a save(): los parámetros numéricos se interpretan aquí
+                for tasa in instancias.values():
+                    completar_parametros(tasa)
+            modelo.objects.bulk_create(instancias.values())
+            relacionados[campo] = instancias
+
+        especies = []
+        for i, datos in enumerate(lote):
+            campos = {
+                campo: valor for campo, valor in datos.items()
+                if campo not in ('vitaminas', 'minerales') and campo not in relacionados
+            }
+            especies.append(Especie(
+                **campos, **{campo: instancias.get(i) for campo, instancias in relacionados.items()}
+            ))
+        Especie.objects.bulk_create(especies)
+
+        # Como en la API, vitaminas y minerales solo se guardan con información nutricional
+        informaciones = relacionados['informacion_nutricional']
+        for campo, modelo in (('vitaminas', Vitamina), ('minerales', Mineral)):
+            modelo.objects.bulk_create([
+                modelo(informacion_nutricional=informaciones[i], **nutriente)
+                for i, datos in enumerate(lote) if i in informaciones
+                for nutriente in datos.get(campo, [])
+            ])
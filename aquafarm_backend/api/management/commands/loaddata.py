@@ -0,0 +1,15 @@
+from django.core.management.commands import loaddata
+
+from api.models import invalidar_modelos
+
+
+class Command(loaddata.Command):
+    help = (
+        loaddata.Command.help + " Al terminar cambia una sola vez las versiones de "
+        "los recursos que dependen de los modelos cargados, en lugar de una por registro."
+    )
+
+    def loaddata(self, fixture_labels):
+        super().loaddata(fixture_labels)
+        if self.loaded_object_count:
+            invalidar_modelos(self.models)
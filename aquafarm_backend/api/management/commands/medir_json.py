@@ -0,0 +1,76 @@
+import io
+import random
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import ORJSONParser, orjson
+from api.renderers import ORJSONRenderer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el tiempo de codificar y decodificar una respuesta de monitoreos "
+        "con el JSON estándar de DRF frente al renderer y parser basados en orjson."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lecturas', type=int, default=50000, help="Lecturas en la carga de prueba")
+        parser.add_argument('--repeticiones', type=int, default=5, help="Repeticiones por medición (se toma la mejor)")
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stdout.write(self.style.WARNING(
+                "orjson no está instalado: el renderer y el parser usan el JSON estándar de DRF"
+            ))
+
+        datos = self._carga(options['lecturas'])
+        repeticiones = options['repeticiones']
+
+        estandar = self._medir(repeticiones, lambda: JSONRenderer().render(datos))
+        rapido = self._medir(repeticiones, lambda: ORJSONRenderer().render(datos))
+        cuerpo = JSONRenderer().render(datos)
+        if ORJSONRenderer().render(datos) != cuerpo:
+            self.stdout.write(self.style.ERROR("Las salidas de los renderers no coinciden"))
+        self._reportar("Codificación", len(cuerpo), estandar, rapido)
+
+        estandar = self._medir(repeticiones, lambda: JSONParser().parse(io.BytesIO(cuerpo)))
+        rapido = self._medir(repeticiones, lambda: ORJSONParser().parse(io.BytesIO(cuerpo)))
+        self._reportar("Decodificación", len(cuerpo), estandar, rapido)
+
+    def _carga(self, lecturas):
+        """Respuesta con la forma de MonitoreoSerializer para `lecturas` lecturas sintéticas"""
+        ahora = timezone.now()
+        sensores = ['Temperatura', 'pH', 'Oxígeno']
+        return [
+            {
+                'idMonitoreo': i,
+                'idEstanque': i % 20 + 1,
+                'estanque': f"Estanque {i % 20 + 1}",
+                'idSensor': i % 3 + 1,
+                'sensor': sensores[i % 3],
+                'valor': round(random.uniform(0, 35), 2),
+                'fecha': (ahora - timedelta(minutes=i)).isoformat().replace('+00:00', 'Z'),
+            }
+            for i in range(1, lecturas + 1)
+        ]
+
+    def _medir(self, repeticiones, funcion):
+        mejor = None
+        for _ in range(max(1, repeticiones)):
+            inicio = time.perf_counter()
+            funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor
+
+    def _reportar(self, etapa, tamano, estandar, rapido):
+        factor = estandar / rapido if rapido else 0
+        self.stdout.write(
+            f"{etapa} ({tamano / 1e6:.1f} MB): json {estandar * 1000:.1f} ms, "
+            f"orjson {rapido * 1000:.1f} ms ({factor:.1f}x)"
+        )
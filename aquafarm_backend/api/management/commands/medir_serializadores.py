@@ -0,0 +1,67 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.models import Alerta, Inventario, Monitoreo, Siembra
+from api.serializers import (
+    AlertaLecturaSerializer, AlertaSerializer, InventarioLecturaSerializer, InventarioSerializer,
+    MonitoreoLecturaSerializer, MonitoreoSerializer, SiembraLecturaSerializer, SiembraSerializer
+)
+
+# nombre: (queryset del listado, ModelSerializer, serializador de lectura rápida)
+CASOS = {
+    'monitoreos': (
+        Monitoreo.objects.select_related('idSensor').order_by('idMonitoreo'),
+        MonitoreoSerializer, MonitoreoLecturaSerializer
+    ),
+    'alertas': (
+        Alerta.objects.select_related('idEspecie').order_by('-fechaCreacion'),
+        AlertaSerializer, AlertaLecturaSerializer
+    ),
+    'siembras': (
+        Siembra.objects.select_related('idEspecie').order_by('idSiembra'),
+        SiembraSerializer, SiembraLecturaSerializer
+    ),
+    'inventarios': (
+        Inventario.objects.select_related('idEspecie', 'idFinca').order_by('idInventario'),
+        InventarioSerializer, InventarioLecturaSerializer
+    ),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara el tiempo de serializar los listados con los ModelSerializer "
+        "frente a los serializadores de lectura rápida basados en values(), "
+        "incluyendo la consulta, sobre los datos existentes."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1000, help="Filas por listado")
+        parser.add_argument('--repeticiones', type=int, default=5, help="Repeticiones por medición (se toma la mejor)")
+        parser.add_argument('--listado', choices=sorted(CASOS), action='append', help="Listados a medir (por defecto todos)")
+
+    def handle(self, *args, **options):
+        for nombre in options['listado'] or CASOS:
+            queryset, serializer_class, lectura_class = CASOS[nombre]
+            queryset = queryset[:options['filas']]
+
+            modelo = self._medir(options['repeticiones'], lambda: serializer_class(list(queryset), many=True).data)
+            rapido = self._medir(
+                options['repeticiones'], lambda: lectura_class(list(lectura_class.consultar(queryset))).data
+            )
+            filas = queryset.count()
+            factor = modelo / rapido if rapido else 0
+            self.stdout.write(
+                f"{nombre}: {filas} filas, ModelSerializer {modelo * 1000:.1f} ms, "
+                f"values() {rapido * 1000:.1f} ms ({factor:.1f}x)"
+            )
+
+    def _medir(self, repeticiones, funcion):
+        mejor = None
+        for _ in range(max(1, repeticiones)):
+            inicio = time.perf_counter()
+            funcion()
+            duracion = time.perf_counter() - inicio
+            mejor = duracion if mejor is None else min(mejor, duracion)
+        return mejor
@@ -0,0 +1,107 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from api.alertas import (
+    agrupar_incidentes, clave_incidente, evaluar_lecturas, guardar_incidentes,
+    obtener_histeresis, siembras_historicas_por_estanque
+)
+from api.models import Alerta, Monitoreo
+from api.umbrales import obtener_reglas
+
+
+class Command(BaseCommand):
+    help = (
+        "Reevalúa los monitoreos de un rango de fechas contra los umbrales actuales "
+        "de las especies sembradas en cada estanque y crea las alertas faltantes, "
+        "agrupando las lecturas consecutivas fuera de rango en un solo incidente."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--desde', help="Fecha inicial (ISO 8601)")
+        parser.add_argument('--hasta', help="Fecha final (ISO 8601)")
+        parser.add_argument('--estanque', type=int, help="Reevaluar solo este estanque")
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Monitoreos evaluados por lote")
+        parser.add_argument('--dry-run', action='store_true', help="Contar las alertas sin crearlas")
+
+    def handle(self, *args, **options):
+        monitoreos = Monitoreo.objects.all()
+        for opcion, filtro in (('desde', 'fecha__gte'), ('hasta', 'fecha__lte')):
+            if options[opcion]:
+                monitoreos = monitoreos.filter(**{filtro: self._parsear_fecha(options[opcion])})
+        estanque_ids = None
+        if options['estanque']:
+            estanque_ids = [options['estanque']]
+            monitoreos = monitoreos.filter(idEstanque__in=estanque_ids)
+
+        reglas = obtener_reglas()
+        siembras = siembras_historicas_por_estanque(estanque_ids)
+        cubiertas = self._lecturas_cubiertas(estanque_ids)
+        histeresis = obtener_histeresis()
+        filas = monitoreos.order_by('fecha', 'idMonitoreo').values_list(
+            'idMonitoreo', 'idEstanque', 'idSensor', 'valor', 'fecha'
+        ).iterator(chunk_size=options['chunk_size'])
+
+        # Incidente en curso por (estanque, especie, tipo), conservado entre lotes
+        abiertas = {}
+        evaluados = creadas = acumuladas = 0
+        while True:
+            lote = list(islice(filas, options['chunk_size']))
+            if not lote:
+                break
+            monitoreo_ids, estanques, sensores, valores, fechas = zip(*lote)
+            alertas = evaluar_lecturas(
+                monitoreo_ids, estanques, sensores, valores,
+                [fecha.timestamp() for fecha in fechas], siembras, reglas
+            )
+
+            # No volver a contar lecturas que ya forman parte de una alerta existente
+            pendientes = []
+            for alerta in alertas:
+                clave = clave_incidente(alerta)
+                existente = next((
+                    existente for existente in cubiertas.get(clave, ())
+                    if existente.inicio <= alerta.fechaUltimaLectura <= existente.fechaUltimaLectura
+                ), None)
+                if existente is None:
+                    pendientes.append(alerta)
+                else:
+                    abiertas[clave] = existente
+
+            nuevas, actualizadas, reabiertas = agrupar_incidentes(
+                pendientes, abiertas, histeresis, absorber_activas=False
+            )
+            if not options['dry_run'] and (nuevas or actualizadas):
+                with transaction.atomic():
+                    guardar_incidentes(nuevas, actualizadas, reabiertas)
+            evaluados += len(lote)
+            creadas += len(nuevas)
+            acumuladas += len(pendientes) - len(nuevas)
+
+        accion = "se crearían" if options['dry_run'] else "creadas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{evaluados} monitoreos evaluados, {creadas} alertas {accion}, "
+            f"{acumuladas} lecturas acumuladas en alertas existentes"
+        ))
+
+    def _lecturas_cubiertas(self, estanque_ids):
+        """Alertas existentes por (estanque, especie, tipo) con el rango de lecturas que ya cubren"""
+        alertas = Alerta.objects.annotate(inicio=F('idMonitoreo__fecha'))
+        if estanque_ids:
+            alertas = alertas.filter(idEstanque__in=estanque_ids)
+        cubiertas = {}
+        for alerta in alertas.order_by('inicio'):
+            if alerta.fechaUltimaLectura is None:
+                alerta.fechaUltimaLectura = alerta.inicio
+            cubiertas.setdefault(clave_incidente(alerta), []).append(alerta)
+        return cubiertas
+
+    def _parsear_fecha(self, valor):
+        fecha = parse_datetime(valor)
+        if fecha is None:
+            raise CommandError(f"Fecha inválida: {valor}")
+        return timezone.make_aware(fecha) if timezone.is_naive(fecha) else fecha
@@ -0,0 +1,63 @@
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Max
+
+from api.alertas import aplicar_resoluciones, lecturas_resolucion, obtener_ventana_resolucion
+from api.models import Alerta, MonitoreoUltimo
+
+
+class Command(BaseCommand):
+    help = (
+        "Resuelve las alertas activas cuyo estanque lleva al menos la ventana de "
+        "resolución recibiendo lecturas dentro de rango del mismo tipo de sensor, "
+        "con suficientes lecturas y sin huecos que dejen la ventana sin cubrir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--estanque', type=int, help="Revisar solo este estanque")
+        parser.add_argument('--chunk-size', type=int, default=2000, help="Alertas revisadas por lote")
+        parser.add_argument('--dry-run', action='store_true', help="Contar las alertas sin resolverlas")
+
+    def handle(self, *args, **options):
+        ventana = obtener_ventana_resolucion()
+
+        # Última lectura por estanque y tipo de sensor, desde la tabla de últimos monitoreos
+        ultimas = MonitoreoUltimo.objects.exclude(idSensor__tipo__in=['', 'OTRO'])
+        alertas = Alerta.objects.filter(estado='ACTIVA', fechaUltimaLectura__isnull=False)
+        if options['estanque']:
+            ultimas = ultimas.filter(idEstanque=options['estanque'])
+            alertas = alertas.filter(idEstanque=options['estanque'])
+        ultimas = {
+            (estanque_id, tipo): fecha
+            for estanque_id, tipo, fecha in ultimas.values('idEstanque', 'idSensor__tipo').annotate(
+                fecha=Max('fecha')
+            ).values_list('idEstanque', 'idSensor__tipo', 'fecha')
+        }
+
+        filas = alertas.order_by('idAlerta').values_list(
+            'idAlerta', 'idEstanque', 'tipoAlerta', 'fechaUltimaLectura'
+        ).iterator(chunk_size=options['chunk_size'])
+
+        revisadas = resueltas = 0
+        while True:
+            lote = list(islice(filas, options['chunk_size']))
+            if not lote:
+                break
+            vencidas = [
+                (alerta_id, estanque_id, tipo, fecha_ultima) for alerta_id, estanque_id, tipo, fecha_ultima in lote
+                if (estanque_id, tipo) in ultimas and fecha_ultima <= ultimas[(estanque_id, tipo)] - ventana
+            ]
+            resoluciones = lecturas_resolucion(vencidas, ventana)
+            if resoluciones and not options['dry_run']:
+                with transaction.atomic():
+                    resueltas += aplicar_resoluciones(vencidas, resoluciones)
+            else:
+                resueltas += len(resoluciones)
+            revisadas += len(lote)
+
+        accion = "se resolverían" if options['dry_run'] else "resueltas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{revisadas} alertas activas revisadas, {resueltas} {accion}"
+        ))
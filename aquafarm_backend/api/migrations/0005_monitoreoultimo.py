@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:28
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def poblar_monitoreo_ultimo(apps, schema_editor):
+    """Carga el último monitoreo de cada estanque y sensor a partir del historial existente"""
+    Monitoreo = apps.get_model('api', 'Monitoreo')
+    MonitoreoUltimo = apps.get_model('api', 'MonitoreoUltimo')
+    
+    mas_reciente = Monitoreo.objects.filter(
+        idEstanque=OuterRef('idEstanque'),
+        idSensor=OuterRef('idSensor')
+    ).order_by('-fecha', '-idMonitoreo').values('idMonitoreo')[:1]
+    ultimos = Monitoreo.objects.filter(idMonitoreo=Subquery(mas_reciente))
+    
+    MonitoreoUltimo.objects.bulk_create([
+        MonitoreoUltimo(
+            idEstanque_id=monitoreo.idEstanque_id,
+            idSensor_id=monitoreo.idSensor_id,
+            idMonitoreo_id=monitoreo.idMonitoreo,
+            valor=monitoreo.valor,
+            fecha=monitoreo.fecha
+        )
+        for monitoreo in ultimos.iterator(chunk_size=1000)
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_remove_bitacoradesdoble_fechamodificacion_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonitoreoUltimo',
+            fields=[
+                ('idMonitoreoUltimo', models.AutoField(primary_key=True, serialize=False)),
+                ('valor', models.FloatField()),
+                ('fecha', models.DateTimeField()),
+                ('idEstanque', models.ForeignKey(db_column='idEstanque', on_delete=django.db.models.deletion.CASCADE, related_name='ultimos_monitoreos', to='api.estanque')),
+                ('idMonitoreo', models.ForeignKey(db_column='idMonitoreo', help_text='Monitoreo más reciente del sensor en el estanque', on_delete=django.db.models.deletion.CASCADE, related_name='+', to='api.monitoreo')),
+                ('idSensor', models.ForeignKey(db_column='idSensor', on_delete=django.db.models.deletion.CASCADE, to='api.sensor')),
+            ],
+            options={
+                'verbose_name': 'Último Monitoreo',
+                'verbose_name_plural': 'Últimos Monitoreos',
+                'db_table': 'MonitoreoUltimo',
+                'unique_together': {('idEstanque', 'idSensor')},
+            },
+        ),
+        migrations.RunPython(poblar_monitoreo_ultimo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:29
+
+import django.db.models.deletion
+import datetime
+
+from django.db import migrations, models
+from django.db.models import Count, Max, Min, Sum
+from django.db.models.functions import TruncDay, TruncHour
+
+
+def poblar_resumenes(apps, schema_editor):
+    """Calcula los resúmenes por hora y por día a partir del historial existente"""
+    Monitoreo = apps.get_model('api', 'Monitoreo')
+    MonitoreoResumen = apps.get_model('api', 'MonitoreoResumen')
+    
+    for resolucion, truncar in (('HORA', TruncHour), ('DIA', TruncDay)):
+        intervalos = Monitoreo.objects.annotate(
+            inicio=truncar('fecha', tzinfo=datetime.timezone.utc)
+        ).values('idEstanque', 'idSensor', 'inicio').annotate(
+            minimo=Min('valor'),
+            maximo=Max('valor'),
+            suma=Sum('valor'),
+            conteo=Count('idMonitoreo')
+        ).order_by()
+        
+        MonitoreoResumen.objects.bulk_create([
+            MonitoreoResumen(
+                idEstanque_id=intervalo['idEstanque'],
+                idSensor_id=intervalo['idSensor'],
+                resolucion=resolucion,
+                inicio=intervalo['inicio'],
+                minimo=intervalo['minimo'],
+                maximo=intervalo['maximo'],
+                suma=intervalo['suma'],
+                conteo=intervalo['conteo']
+            )
+            for intervalo in intervalos.iterator(chunk_size=1000)
+        ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_monitoreoultimo'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonitoreoResumen',
+            fields=[
+                ('idMonitoreoResumen', models.AutoField(primary_key=True, serialize=False)),
+                ('resolucion', models.CharField(choices=[('HORA', 'Por Hora'), ('DIA', 'Por Día')], help_text='Tamaño del intervalo resumido', max_length=10)),
+                ('inicio', models.DateTimeField(help_text='Inicio del intervalo (UTC)')),
+                ('minimo', models.FloatField()),
+                ('maximo', models.FloatField()),
+                ('suma', models.FloatField(help_text='Suma de los valores, para calcular el promedio')),
+                ('conteo', models.IntegerField(help_text='Número de monitoreos en el intervalo')),
+                ('idEstanque', models.ForeignKey(db_column='idEstanque', on_delete=django.db.models.deletion.CASCADE, to='api.estanque')),
+                ('idSensor', models.ForeignKey(db_column='idSensor', on_delete=django.db.models.deletion.CASCADE, to='api.sensor')),
+            ],
+            options={
+                'verbose_name': 'Resumen de Monitoreo',
+                'verbose_name_plural': 'Resúmenes de Monitoreo',
+                'db_table': 'MonitoreoResumen',
+                'unique_together': {('idEstanque', 'idSensor', 'resolucion', 'inicio')},
+            },
+        ),
+        migrations.RunPython(poblar_resumenes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_monitoreoresumen'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='monitoreo',
+            index=models.Index(fields=['idEstanque', 'idSensor', 'fecha'], name='monitoreo_est_sensor_fecha'),
+        ),
+    ]
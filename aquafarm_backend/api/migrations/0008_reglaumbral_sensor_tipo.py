@@ -0,0 +1,94 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:32
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def clasificar_sensor(nombre, unidad):
+    """
+    Copia de api.umbrales.clasificar_sensor tal como estaba al crear esta
+    migración, para que los cambios futuros a la aplicación no cambien el
+    resultado de migrar.
+    """
+    nombre = (nombre or '').strip().lower()
+    unidad = (unidad or '').strip().lower()
+
+    if nombre in ['temperatura', 'temp'] and unidad in ['°c', 'celsius', 'c']:
+        return 'TEMPERATURA'
+    if nombre == 'ph':
+        return 'PH'
+    if nombre in ['oxigeno', 'oxígeno', 'o2'] and unidad in ['mg/l', 'ppm']:
+        return 'OXIGENO'
+    if nombre.startswith('conductiv') or unidad in ['μs/cm', 'µs/cm', 'us/cm', 'ms/cm']:
+        return 'CONDUCTIVIDAD'
+    if nombre.startswith('turbid') or unidad == 'ntu':
+        return 'TURBIDEZ'
+    if nombre.startswith('amoni') or nombre in ['nh3', 'nh4']:
+        return 'AMONIO'
+    return 'OTRO'
+
+
+def clasificar_sensores(apps, schema_editor):
+    """Asigna el tipo a los sensores existentes a partir de su nombre y unidad"""
+    Sensor = apps.get_model('api', 'Sensor')
+    sensores = list(Sensor.objects.all())
+    for sensor in sensores:
+        sensor.tipo = clasificar_sensor(sensor.nombreSensor, sensor.unidadMedida)
+    Sensor.objects.bulk_update(sensores, ['tipo'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0007_monitoreo_indice_estanque_sensor_fecha'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alerta',
+            name='severidad',
+            field=models.CharField(choices=[('BAJA', 'Baja'), ('MEDIA', 'Media'), ('ALTA', 'Alta'), ('CRITICA', 'Crítica')], default='MEDIA', help_text='Severidad de la regla incumplida', max_length=10),
+        ),
+        migrations.AddField(
+            model_name='sensor',
+            name='tipo',
+            field=models.CharField(blank=True, choices=[('TEMPERATURA', 'Temperatura'), ('PH', 'pH'), ('OXIGENO', 'Oxígeno Disuelto'), ('CONDUCTIVIDAD', 'Conductividad'), ('TURBIDEZ', 'Turbidez'), ('AMONIO', 'Amonio'), ('OTRO', 'Otro')], help_text='Magnitud que mide el sensor (se deduce del nombre y la unidad si se deja vacío)', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='alerta',
+            name='tipoAlerta',
+            field=models.CharField(choices=[('TEMPERATURA', 'Temperatura Anómala'), ('PH', 'pH Anómalo'), ('OXIGENO', 'Oxígeno Anómalo'), ('CONDUCTIVIDAD', 'Conductividad Anómala'), ('TURBIDEZ', 'Turbidez Anómala'), ('AMONIO', 'Amonio Anómalo'), ('OTRO', 'Otro Tipo de Alerta')], default='OTRO', help_text='Tipo de alerta generada', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='ReglaUmbral',
+            fields=[
+                ('idReglaUmbral', models.AutoField(primary_key=True, serialize=False)),
+                ('tipoSensor', models.CharField(choices=[('TEMPERATURA', 'Temperatura'), ('PH', 'pH'), ('OXIGENO', 'Oxígeno Disuelto'), ('CONDUCTIVIDAD', 'Conductividad'), ('TURBIDEZ', 'Turbidez'), ('AMONIO', 'Amonio'), ('OTRO', 'Otro')], help_text='Tipo de sensor al que aplica la regla', max_length=20)),
+                ('minimo', models.FloatField(blank=True, help_text='Valor mínimo permitido', null=True)),
+                ('maximo', models.FloatField(blank=True, help_text='Valor máximo permitido', null=True)),
+                ('severidad', models.CharField(choices=[('BAJA', 'Baja'), ('MEDIA', 'Media'), ('ALTA', 'Alta'), ('CRITICA', 'Crítica')], default='MEDIA', max_length=10)),
+                ('activa', models.BooleanField(default=True)),
+                ('idEspecie', models.ForeignKey(db_column='idEspecie', on_delete=django.db.models.deletion.CASCADE, related_name='reglas_umbral', to='api.especie')),
+            ],
+            options={
+                'verbose_name': 'Regla de Umbral',
+                'verbose_name_plural': 'Reglas de Umbral',
+                'db_table': 'ReglaUmbral',
+            },
+        ),
+        migrations.CreateModel(
+            name='VersionRecurso',
+            fields=[
+                ('idVersionRecurso', models.AutoField(primary_key=True, serialize=False)),
+                ('recurso', models.CharField(help_text="Nombre del recurso (p. ej. 'umbrales' o 'tablero_finca:1')", max_length=100, unique=True)),
+                ('version', models.BigIntegerField(default=1)),
+                ('fechaModificacion', models.DateTimeField(help_text='Fecha del último cambio de versión')),
+            ],
+            options={
+                'verbose_name': 'Versión de Recurso',
+                'verbose_name_plural': 'Versiones de Recursos',
+                'db_table': 'VersionRecurso',
+            },
+        ),
+        migrations.RunPython(clasificar_sensores, migrations.RunPython.noop),
+    ]
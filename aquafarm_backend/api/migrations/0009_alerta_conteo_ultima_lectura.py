@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:35
+
+from django.db import migrations, models
+from django.db.models import F, OuterRef, Subquery
+
+
+def poblar_ultima_lectura(apps, schema_editor):
+    """Toma la lectura que originó cada alerta existente como su última lectura"""
+    Alerta = apps.get_model('api', 'Alerta')
+    Monitoreo = apps.get_model('api', 'Monitoreo')
+    Alerta.objects.update(
+        ultimoValor=F('valorMedido'),
+        fechaUltimaLectura=Subquery(
+            Monitoreo.objects.filter(idMonitoreo=OuterRef('idMonitoreo')).values('fecha')[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_reglaumbral_sensor_tipo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alerta',
+            name='conteo',
+            field=models.IntegerField(default=1, help_text='Número de lecturas fuera de rango acumuladas en la alerta'),
+        ),
+        migrations.AddField(
+            model_name='alerta',
+            name='fechaUltimaLectura',
+            field=models.DateTimeField(blank=True, help_text='Fecha de la última lectura fuera de rango', null=True),
+        ),
+        migrations.AddField(
+            model_name='alerta',
+            name='fechaLecturaResolucion',
+            field=models.DateTimeField(blank=True, help_text='Fecha de la lectura dentro de rango que resolvió la alerta', null=True),
+        ),
+        migrations.AddField(
+            model_name='alerta',
+            name='ultimoValor',
+            field=models.FloatField(blank=True, help_text='Último valor fuera de rango registrado', null=True),
+        ),
+        migrations.RunPython(poblar_ultima_lectura, migrations.RunPython.noop),
+    ]
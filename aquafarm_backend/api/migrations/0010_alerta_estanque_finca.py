@@ -0,0 +1,47 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def poblar_estanque_finca(apps, schema_editor):
+    """Copia el estanque y la finca del monitoreo de cada alerta existente"""
+    Alerta = apps.get_model('api', 'Alerta')
+    Monitoreo = apps.get_model('api', 'Monitoreo')
+    Estanque = apps.get_model('api', 'Estanque')
+    Alerta.objects.update(idEstanque=Subquery(
+        Monitoreo.objects.filter(idMonitoreo=OuterRef('idMonitoreo')).values('idEstanque')[:1]
+    ))
+    Alerta.objects.update(idFinca=Subquery(
+        Estanque.objects.filter(idEstanque=OuterRef('idEstanque')).values('idFinca')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_alerta_conteo_ultima_lectura'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alerta',
+            name='idEstanque',
+            field=models.ForeignKey(blank=True, db_column='idEstanque', help_text='Estanque del monitoreo que originó la alerta', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alertas', to='api.estanque'),
+        ),
+        migrations.AddField(
+            model_name='alerta',
+            name='idFinca',
+            field=models.ForeignKey(blank=True, db_column='idFinca', help_text='Finca del estanque que originó la alerta', null=True, on_delete=django.db.models.deletion.CASCADE, related_name='alertas', to='api.finca'),
+        ),
+        migrations.RunPython(poblar_estanque_finca, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='alerta',
+            index=models.Index(fields=['idEstanque', 'estado', 'fechaCreacion'], name='alerta_est_estado_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='alerta',
+            index=models.Index(fields=['idFinca', 'estado', 'fechaCreacion'], name='alerta_finca_estado_fecha'),
+        ),
+    ]
@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:01
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def registrar_saldos_iniciales(apps, schema_editor):
+    """
+    Abre el libro con un ajuste por el saldo actual de cada inventario a la
+    fecha de su última actualización; antes de esa fecha no hay historial
+    """
+    Inventario = apps.get_model('api', 'Inventario')
+    MovimientoInventario = apps.get_model('api', 'MovimientoInventario')
+    MovimientoInventario.objects.bulk_create([
+        MovimientoInventario(
+            idEspecie_id=especie_id, idFinca_id=finca_id, tipo='AJUSTE', cantidad=cantidad,
+            fecha=fecha, descripcion="Saldo inicial"
+        )
+        for especie_id, finca_id, cantidad, fecha in Inventario.objects.exclude(cantidad=0).values_list(
+            'idEspecie', 'idFinca', 'cantidad', 'fechaActualizacion'
+        ).iterator()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_alerta_estanque_finca'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MovimientoInventario',
+            fields=[
+                ('idMovimientoInventario', models.AutoField(primary_key=True, serialize=False)),
+                ('tipo', models.CharField(choices=[('SIEMBRA', 'Siembra'), ('COSECHA', 'Cosecha'), ('TRASLADO', 'Traslado'), ('AJUSTE', 'Ajuste manual')], max_length=20)),
+                ('cantidad', models.IntegerField(help_text='Peces que entran (positivo) o salen (negativo) del inventario')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now, help_text='Fecha en que ocurrió el movimiento')),
+                ('descripcion', models.CharField(blank=True, max_length=200, null=True)),
+                ('fechaCreacion', models.DateTimeField(auto_now_add=True)),
+                ('idEspecie', models.ForeignKey(db_column='idEspecie', on_delete=django.db.models.deletion.CASCADE, to='api.especie')),
+                ('idFinca', models.ForeignKey(db_column='idFinca', on_delete=django.db.models.deletion.CASCADE, to='api.finca')),
+                ('idSiembra', models.ForeignKey(blank=True, db_column='idSiembra', help_text='Siembra que originó el movimiento', null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.siembra')),
+            ],
+            options={
+                'verbose_name': 'Movimiento de Inventario',
+                'verbose_name_plural': 'Movimientos de Inventario',
+                'db_table': 'MovimientoInventario',
+                'indexes': [models.Index(fields=['idEspecie', 'idFinca', 'fecha'], name='movinv_especie_finca_fecha'), models.Index(fields=['idFinca', 'fecha'], name='movinv_finca_fecha')],
+            },
+        ),
+        migrations.CreateModel(
+            name='SnapshotInventario',
+            fields=[
+                ('idSnapshotInventario', models.AutoField(primary_key=True, serialize=False)),
+                ('fecha', models.DateTimeField(help_text='Fecha de corte')),
+                ('cantidad', models.IntegerField()),
+                ('idEspecie', models.ForeignKey(db_column='idEspecie', on_delete=django.db.models.deletion.CASCADE, to='api.especie')),
+                ('idFinca', models.ForeignKey(db_column='idFinca', on_delete=django.db.models.deletion.CASCADE, to='api.finca')),
+            ],
+            options={
+                'verbose_name': 'Snapshot de Inventario',
+                'verbose_name_plural': 'Snapshots de Inventario',
+                'db_table': 'SnapshotInventario',
+                'indexes': [models.Index(fields=['fecha'], name='snapinv_fecha')],
+                'unique_together': {('idEspecie', 'idFinca', 'fecha')},
+            },
+        ),
+        migrations.RunPython(registrar_saldos_iniciales, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,87 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:12
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+def calcular_poblacion_inicial(apps, schema_editor):
+    """
+    Población inicial de cada estanque: lo sembrado por sus siembras cuyo
+    ciclo sigue abierto. Los peces de las siembras comercializadas o
+    canceladas ya no están en el estanque, los desdobles anteriores no
+    registran cantidad (los peces siguen en el estanque sembrado), aún no hay
+    mortalidades y las siembras no registran peso, así que la biomasa empieza
+    en cero.
+    """
+    Siembra = apps.get_model('api', 'Siembra')
+    EstadoEstanque = apps.get_model('api', 'EstadoEstanque')
+    poblacion = {}
+    for estanque_id, especie_id, cantidad in Siembra.objects.exclude(
+        historialsiembra__estado__in=['COMERCIALIZADO', 'CANCELADO']
+    ).values_list('idEstanque', 'idEspecie', 'cantidad').iterator():
+        poblacion[(estanque_id, especie_id)] = poblacion.get((estanque_id, especie_id), 0) + cantidad
+    EstadoEstanque.objects.bulk_create([
+        EstadoEstanque(idEstanque_id=estanque_id, idEspecie_id=especie_id, cantidad=cantidad)
+        for (estanque_id, especie_id), cantidad in poblacion.items()
+    ], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0011_movimiento_snapshot_inventario'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='desdoble',
+            name='cantidad',
+            field=models.IntegerField(blank=True, help_text='Peces trasladados al estanque destino', null=True),
+        ),
+        migrations.AddField(
+            model_name='siembra',
+            name='pesoInicial',
+            field=models.FloatField(blank=True, help_text='Peso promedio por pez al sembrar (en kg)', null=True),
+        ),
+        migrations.AlterField(
+            model_name='movimientoinventario',
+            name='tipo',
+            field=models.CharField(choices=[('SIEMBRA', 'Siembra'), ('COSECHA', 'Cosecha'), ('TRASLADO', 'Traslado'), ('MORTALIDAD', 'Mortalidad'), ('AJUSTE', 'Ajuste manual')], max_length=20),
+        ),
+        migrations.CreateModel(
+            name='Mortalidad',
+            fields=[
+                ('idMortalidad', models.AutoField(primary_key=True, serialize=False)),
+                ('cantidad', models.IntegerField(help_text='Peces muertos')),
+                ('fecha', models.DateTimeField(default=django.utils.timezone.now)),
+                ('causa', models.CharField(blank=True, max_length=200, null=True)),
+                ('fechaCreacion', models.DateTimeField(auto_now_add=True)),
+                ('idEspecie', models.ForeignKey(db_column='idEspecie', on_delete=django.db.models.deletion.CASCADE, to='api.especie')),
+                ('idEstanque', models.ForeignKey(db_column='idEstanque', on_delete=django.db.models.deletion.CASCADE, to='api.estanque')),
+            ],
+            options={
+                'verbose_name': 'Mortalidad',
+                'verbose_name_plural': 'Mortalidades',
+                'db_table': 'Mortalidad',
+            },
+        ),
+        migrations.CreateModel(
+            name='EstadoEstanque',
+            fields=[
+                ('idEstadoEstanque', models.AutoField(primary_key=True, serialize=False)),
+                ('cantidad', models.IntegerField(default=0, help_text='Peces vivos en el estanque')),
+                ('biomasa', models.FloatField(default=0, help_text='Biomasa estimada (en kg)')),
+                ('fechaActualizacion', models.DateTimeField(auto_now=True)),
+                ('idEspecie', models.ForeignKey(db_column='idEspecie', on_delete=django.db.models.deletion.CASCADE, to='api.especie')),
+                ('idEstanque', models.ForeignKey(db_column='idEstanque', on_delete=django.db.models.deletion.CASCADE, related_name='estados', to='api.estanque')),
+            ],
+            options={
+                'verbose_name': 'Estado de Estanque',
+                'verbose_name_plural': 'Estados de Estanque',
+                'db_table': 'EstadoEstanque',
+                'unique_together': {('idEstanque', 'idEspecie')},
+            },
+        ),
+        migrations.RunPython(calcular_poblacion_inicial, migrations.RunPython.noop),
+    ]
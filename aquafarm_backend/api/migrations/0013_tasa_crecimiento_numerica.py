@@ -0,0 +1,86 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:16
+
+import re
+
+from django.db import migrations, models
+
+
+# Copia de la interpretación de api.crecimiento tal como estaba al crear esta
+# migración, para que los cambios futuros a la aplicación no cambien el
+# resultado de migrar.
+DIAS_POR_MES = 30.4375
+
+NUMERO = r'(\d+(?:[.,]\d+)?)'
+RANGO = NUMERO + r'(?:\s*(?:-|–|a|al|hasta)\s*' + NUMERO + r')?'
+
+UNIDADES_PESO = (
+    (r'kg|kilos?|kilogramos?', 1.0),
+    (r'g|gr|grs|gramos?', 0.001),
+    (r'lb|lbs|libras?', 0.4536),
+)
+UNIDADES_TIEMPO = (
+    (r'mes|meses', 1.0),
+    (r'años?|anos?', 12.0),
+    (r'semanas?', 7 / DIAS_POR_MES),
+    (r'd[ií]as?', 1 / DIAS_POR_MES),
+)
+
+
+def parsear(texto, unidades, defecto):
+    """Punto medio del primer número o rango del texto, convertido con el factor de su unidad"""
+    if texto is None:
+        return None
+    texto = str(texto).strip().lower()
+    for patron, factor in unidades:
+        coincidencia = re.search(rf'{RANGO}\s*(?:{patron})\b', texto)
+        if coincidencia:
+            break
+    else:
+        coincidencia, factor = re.search(rf'^{RANGO}$', texto), defecto
+    if not coincidencia:
+        return None
+    valores = [float(valor.replace(',', '.')) for valor in coincidencia.groups() if valor]
+    return sum(valores) / len(valores) * factor
+
+
+def completar_parametros(tasa):
+    """Asigna a una TasaCrecimiento los parámetros numéricos interpretados de sus textos"""
+    tasa.crecimiento_mensual_kg = parsear(tasa.crecimiento_mensual_promedio, UNIDADES_PESO, 0.001)
+    tasa.peso_maximo_kg = parsear(tasa.peso_maximo, UNIDADES_PESO, 1.0)
+    tasa.meses_peso_maximo = parsear(tasa.tiempo_para_peso_maximo, UNIDADES_TIEMPO, 1.0)
+    return tasa
+
+
+def interpretar_tasas(apps, schema_editor):
+    """Interpreta una vez los textos de las tasas existentes"""
+    TasaCrecimiento = apps.get_model('api', 'TasaCrecimiento')
+    tasas = [completar_parametros(tasa) for tasa in TasaCrecimiento.objects.all()]
+    TasaCrecimiento.objects.bulk_update(
+        tasas, ['crecimiento_mensual_kg', 'peso_maximo_kg', 'meses_peso_maximo'], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_estado_estanque_mortalidad'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasacrecimiento',
+            name='crecimiento_mensual_kg',
+            field=models.FloatField(blank=True, editable=False, help_text='Crecimiento mensual promedio (en kg)', null=True),
+        ),
+        migrations.AddField(
+            model_name='tasacrecimiento',
+            name='meses_peso_maximo',
+            field=models.FloatField(blank=True, editable=False, help_text='Meses para alcanzar el peso máximo', null=True),
+        ),
+        migrations.AddField(
+            model_name='tasacrecimiento',
+            name='peso_maximo_kg',
+            field=models.FloatField(blank=True, editable=False, help_text='Peso máximo (en kg)', null=True),
+        ),
+        migrations.RunPython(interpretar_tasas, migrations.RunPython.noop),
+    ]
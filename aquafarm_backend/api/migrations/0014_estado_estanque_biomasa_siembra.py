@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 07:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0013_tasa_crecimiento_numerica'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='estadoestanque',
+            name='biomasa',
+            field=models.FloatField(default=0, help_text='Biomasa al peso de siembra (en kg), sin el crecimiento posterior'),
+        ),
+    ]
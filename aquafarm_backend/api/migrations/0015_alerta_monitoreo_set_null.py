@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 08:35
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0014_estado_estanque_biomasa_siembra'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alerta',
+            name='idMonitoreo',
+            field=models.ForeignKey(blank=True, db_column='idMonitoreo', help_text='Monitoreo que originó la alerta', null=True, on_delete=django.db.models.deletion.SET_NULL, to='api.monitoreo'),
+        ),
+    ]
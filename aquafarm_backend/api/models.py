@@ -1,9 +1,14 @@
 from django.db import models
+from django.db.models import OuterRef, Subquery
 from django.contrib.auth.models import User
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
+from django.utils import timezone
+import datetime
 import json
 
+from .versiones import incrementar_version
+
 class TipoUsuario(models.Model):
     idTipoUsuario = models.AutoField(primary_key=True)
     nombre = models.CharField(max_length=45)
@@ -142,6 +147,18 @@ class TasaCrecimiento(models.Model):
     crecimiento_mensual_promedio = models.CharField(max_length=100, help_text="Crecimiento promedio mensual (ej: '50-80g por mes')")
     tiempo_para_peso_maximo = models.CharField(max_length=100, null=True, blank=True, help_text="Tiempo para alcanzar peso máximo")
     peso_maximo = models.CharField(max_length=50, null=True, blank=True, help_text="Peso máximo alcanzable (ej: '2-3 kg')")
+    # Parámetros numéricos interpretados de los textos al guardar (ver api/crecimiento.py)
+    crecimiento_mensual_kg = models.FloatField(null=True, blank=True, editable=False, help_text="Crecimiento mensual promedio (en kg)")
+    peso_maximo_kg = models.FloatField(null=True, blank=True, editable=False, help_text="Peso máximo (en kg)")
+    meses_peso_maximo = models.FloatField(null=True, blank=True, editable=False, help_text="Meses para alcanzar el peso máximo")
+    
+    def save(self, *args, **kwargs):
+        from .crecimiento import completar_parametros
+        completar_parametros(self)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            kwargs['update_fields'] = {*update_fields, 'crecimiento_mensual_kg', 'peso_maximo_kg', 'meses_peso_maximo'}
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Tasa Crecimiento ID: {self.idTasaCrecimiento}"
@@ -251,18 +268,19 @@ class Inventario(models.Model):
     cantidad = models.IntegerField(default=0, help_text="Cantidad actual de peces de esta especie en la finca")
     fechaActualizacion = models.DateTimeField(auto_now=True, help_text="Última actualización del inventario")
     
-    def agregar_cantidad(self, cantidad_agregar):
-        """Método para agregar peces al inventario"""
-        self.cantidad += cantidad_agregar
-        self.save()
+    def agregar_cantidad(self, cantidad_agregar, descripcion=None):
+        """Método para agregar peces al inventario (UPDATE atómico, ver sumar_inventario)"""
+        from .servicios import sumar_inventario
+        sumar_inventario(self.idEspecie_id, self.idFinca_id, cantidad_agregar, descripcion=descripcion)
+        self.refresh_from_db(fields=['cantidad', 'fechaActualizacion'])
     
-    def reducir_cantidad(self, cantidad_reducir):
-        """Método para reducir peces del inventario"""
-        if self.cantidad >= cantidad_reducir:
-            self.cantidad -= cantidad_reducir
-            self.save()
-        else:
-            raise ValueError(f"No hay suficientes peces en inventario. Disponible: {self.cantidad}, Solicitado: {cantidad_reducir}")
+    def reducir_cantidad(self, cantidad_reducir, descripcion=None):
+        """Método para reducir peces del inventario (UPDATE condicional, ver restar_inventario)"""
+        from .servicios import restar_inventario
+        try:
+            restar_inventario(self.idEspecie_id, self.idFinca_id, cantidad_reducir, descripcion=descripcion)
+        finally:
+            self.refresh_from_db(fields=['cantidad', 'fechaActualizacion'])
     
     def __str__(self):
         return f"Inventario {self.idInventario} - {self.idEspecie.nombre} - Finca: {self.idFinca.nombre} - Cant: {self.cantidad}"
@@ -273,6 +291,67 @@ class Inventario(models.Model):
         verbose_name_plural = "Inventarios"
         unique_together = ('idEspecie', 'idFinca')  # Un solo registro por especie por finca
 
+class MovimientoInventario(models.Model):
+    """
+    Libro de movimientos del inventario, de solo inserción: cada cambio de
+    Inventario.cantidad registra aquí su cantidad con signo, su tipo y su
+    fecha, para poder reconstruir las existencias de cualquier fecha.
+    """
+    TIPOS = [
+        ('SIEMBRA', 'Siembra'),
+        ('COSECHA', 'Cosecha'),
+        ('TRASLADO', 'Traslado'),
+        ('MORTALIDAD', 'Mortalidad'),
+        ('AJUSTE', 'Ajuste manual'),
+    ]
+    
+    idMovimientoInventario = models.AutoField(primary_key=True)
+    idEspecie = models.ForeignKey(Especie, on_delete=models.CASCADE, db_column='idEspecie')
+    idFinca = models.ForeignKey(Finca, on_delete=models.CASCADE, db_column='idFinca')
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    cantidad = models.IntegerField(help_text="Peces que entran (positivo) o salen (negativo) del inventario")
+    fecha = models.DateTimeField(default=timezone.now, help_text="Fecha en que ocurrió el movimiento")
+    idSiembra = models.ForeignKey('Siembra', on_delete=models.SET_NULL, null=True, blank=True, db_column='idSiembra', help_text="Siembra que originó el movimiento")
+    descripcion = models.CharField(max_length=200, null=True, blank=True)
+    fechaCreacion = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Movimiento {self.idMovimientoInventario} - {self.tipo} {self.cantidad:+d}"
+    
+    class Meta:
+        db_table = 'MovimientoInventario'
+        verbose_name = "Movimiento de Inventario"
+        verbose_name_plural = "Movimientos de Inventario"
+        indexes = [
+            models.Index(fields=['idEspecie', 'idFinca', 'fecha'], name='movinv_especie_finca_fecha'),
+            models.Index(fields=['idFinca', 'fecha'], name='movinv_finca_fecha'),
+        ]
+
+class SnapshotInventario(models.Model):
+    """
+    Existencias de una especie en una finca a una fecha de corte, incluidos
+    los movimientos hasta esa fecha. Se generan periódicamente con el comando
+    generar_snapshots_inventario para que las consultas a una fecha lean un
+    snapshot y solo los movimientos posteriores a él.
+    """
+    idSnapshotInventario = models.AutoField(primary_key=True)
+    idEspecie = models.ForeignKey(Especie, on_delete=models.CASCADE, db_column='idEspecie')
+    idFinca = models.ForeignKey(Finca, on_delete=models.CASCADE, db_column='idFinca')
+    fecha = models.DateTimeField(help_text="Fecha de corte")
+    cantidad = models.IntegerField()
+    
+    def __str__(self):
+        return f"Snapshot {self.idEspecie_id} - Finca {self.idFinca_id} al {self.fecha}: {self.cantidad}"
+    
+    class Meta:
+        db_table = 'SnapshotInventario'
+        verbose_name = "Snapshot de Inventario"
+        verbose_name_plural = "Snapshots de Inventario"
+        unique_together = ('idEspecie', 'idFinca', 'fecha')
+        indexes = [
+            models.Index(fields=['fecha'], name='snapinv_fecha'),
+        ]
+
 class Siembra(models.Model):
     idSiembra = models.AutoField(primary_key=True)
     idEspecie = models.ForeignKey(Especie, on_delete=models.CASCADE, db_column='idEspecie')
@@ -280,6 +359,7 @@ class Siembra(models.Model):
     cantidad = models.IntegerField()
     fecha = models.DateTimeField()
     inversion = models.FloatField()
+    pesoInicial = models.FloatField(null=True, blank=True, help_text="Peso promedio por pez al sembrar (en kg)")
     
     def __str__(self):
         return f"Siembra {self.idSiembra} - {self.idEspecie.nombre} en {self.idEstanque}"
@@ -367,6 +447,7 @@ class Desdoble(models.Model):
     idEstanqueDestino = models.ForeignKey(Estanque, on_delete=models.CASCADE, related_name='desdobles_destino', db_column='idEstanqueDestino')
     idSiembra = models.ForeignKey(Siembra, on_delete=models.CASCADE, db_column='idSiembra')
     fecha = models.DateTimeField()
+    cantidad = models.IntegerField(null=True, blank=True, help_text="Peces trasladados al estanque destino")
     
     def __str__(self):
         return f"Desdoble {self.idDesdoble} - {self.idEstanqueOrigen} a {self.idEstanqueDestino}"
@@ -390,6 +471,50 @@ class BitacoraDesdoble(models.Model):
         verbose_name = "Bitácora de Desdoble"
         verbose_name_plural = "Bitácoras de Desdoble"
 
+class EstadoEstanque(models.Model):
+    """
+    Población actual de una especie en un estanque, mantenida de forma
+    incremental por las siembras, desdobles, cosechas y mortalidades para
+    que leerla no requiera recorrer el historial del estanque.
+    """
+    idEstadoEstanque = models.AutoField(primary_key=True)
+    idEstanque = models.ForeignKey(Estanque, on_delete=models.CASCADE, related_name='estados', db_column='idEstanque')
+    idEspecie = models.ForeignKey(Especie, on_delete=models.CASCADE, db_column='idEspecie')
+    cantidad = models.IntegerField(default=0, help_text="Peces vivos en el estanque")
+    biomasa = models.FloatField(default=0, help_text="Biomasa al peso de siembra (en kg), sin el crecimiento posterior")
+    fechaActualizacion = models.DateTimeField(auto_now=True)
+    
+    @property
+    def peso_promedio(self):
+        """Peso promedio de siembra por pez (en kg); el peso actual lo estima api.crecimiento"""
+        return self.biomasa / self.cantidad if self.cantidad > 0 else 0
+    
+    def __str__(self):
+        return f"Estado {self.idEstanque_id} - Especie {self.idEspecie_id}: {self.cantidad} peces"
+    
+    class Meta:
+        db_table = 'EstadoEstanque'
+        verbose_name = "Estado de Estanque"
+        verbose_name_plural = "Estados de Estanque"
+        unique_together = ('idEstanque', 'idEspecie')
+
+class Mortalidad(models.Model):
+    idMortalidad = models.AutoField(primary_key=True)
+    idEstanque = models.ForeignKey(Estanque, on_delete=models.CASCADE, db_column='idEstanque')
+    idEspecie = models.ForeignKey(Especie, on_delete=models.CASCADE, db_column='idEspecie')
+    cantidad = models.IntegerField(help_text="Peces muertos")
+    fecha = models.DateTimeField(default=timezone.now)
+    causa = models.CharField(max_length=200, null=True, blank=True)
+    fechaCreacion = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"Mortalidad {self.idMortalidad} - {self.cantidad} peces en estanque {self.idEstanque_id}"
+    
+    class Meta:
+        db_table = 'Mortalidad'
+        verbose_name = "Mortalidad"
+        verbose_name_plural = "Mortalidades"
+
 class HistorialEstanques(models.Model):
     idHistorialEstanques = models.AutoField(primary_key=True)
     idEstanque = models.ForeignKey(Estanque, on_delete=models.CASCADE, db_column='idEstanque')
@@ -405,10 +530,28 @@ class HistorialEstanques(models.Model):
         verbose_name_plural = "Historiales de Estanque"
 
 class Sensor(models.Model):
+    TIPOS_SENSOR = [
+        ('TEMPERATURA', 'Temperatura'),
+        ('PH', 'pH'),
+        ('OXIGENO', 'Oxígeno Disuelto'),
+        ('CONDUCTIVIDAD', 'Conductividad'),
+        ('TURBIDEZ', 'Turbidez'),
+        ('AMONIO', 'Amonio'),
+        ('OTRO', 'Otro'),
+    ]
+    
     idSensor = models.AutoField(primary_key=True)
     nombreSensor = models.CharField(max_length=45)
     unidadMedida = models.CharField(max_length=45)
     descripcion = models.CharField(max_length=45)
+    tipo = models.CharField(max_length=20, choices=TIPOS_SENSOR, blank=True, help_text="Magnitud que mide el sensor (se deduce del nombre y la unidad si se deja vacío)")
+    
+    def save(self, *args, **kwargs):
+        # Deducir el tipo una sola vez al guardar, no en cada lectura
+        if not self.tipo:
+            from .umbrales import clasificar_sensor
+            self.tipo = clasificar_sensor(self.nombreSensor, self.unidadMedida)
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return self.nombreSensor
@@ -418,6 +561,35 @@ class Sensor(models.Model):
         verbose_name = "Sensor"
         verbose_name_plural = "Sensores"
 
+class ReglaUmbral(models.Model):
+    """
+    Rango permitido de un tipo de sensor para una especie. Las reglas activas
+    de una especie y tipo reemplazan al rango óptimo definido en la especie;
+    varias reglas con distinta severidad definen bandas escalonadas.
+    """
+    SEVERIDADES = [
+        ('BAJA', 'Baja'),
+        ('MEDIA', 'Media'),
+        ('ALTA', 'Alta'),
+        ('CRITICA', 'Crítica'),
+    ]
+    
+    idReglaUmbral = models.AutoField(primary_key=True)
+    idEspecie = models.ForeignKey(Especie, on_delete=models.CASCADE, related_name='reglas_umbral', db_column='idEspecie')
+    tipoSensor = models.CharField(max_length=20, choices=Sensor.TIPOS_SENSOR, help_text="Tipo de sensor al que aplica la regla")
+    minimo = models.FloatField(null=True, blank=True, help_text="Valor mínimo permitido")
+    maximo = models.FloatField(null=True, blank=True, help_text="Valor máximo permitido")
+    severidad = models.CharField(max_length=10, choices=SEVERIDADES, default='MEDIA')
+    activa = models.BooleanField(default=True)
+    
+    def __str__(self):
+        return f"Regla {self.idReglaUmbral} - {self.idEspecie_id} - {self.tipoSensor} [{self.minimo}, {self.maximo}]"
+    
+    class Meta:
+        db_table = 'ReglaUmbral'
+        verbose_name = "Regla de Umbral"
+        verbose_name_plural = "Reglas de Umbral"
+
 class Monitoreo(models.Model):
     idMonitoreo = models.AutoField(primary_key=True)
     idEstanque = models.ForeignKey(Estanque, on_delete=models.CASCADE, db_column='idEstanque')
@@ -432,12 +604,76 @@ class Monitoreo(models.Model):
         db_table = 'Monitoreo'
         verbose_name = "Monitoreo"
         verbose_name_plural = "Monitoreos"
+        indexes = [
+            # Consultas por rango de fechas de un sensor en un estanque
+            models.Index(fields=['idEstanque', 'idSensor', 'fecha'], name='monitoreo_est_sensor_fecha'),
+        ]
+
+class MonitoreoUltimo(models.Model):
+    """
+    Último monitoreo registrado por estanque y sensor. Se actualiza en cada
+    ingreso de lecturas para que consultar los valores actuales de un estanque
+    sea una lectura indexada que no depende del tamaño del historial.
+    """
+    idMonitoreoUltimo = models.AutoField(primary_key=True)
+    idEstanque = models.ForeignKey(Estanque, on_delete=models.CASCADE, related_name='ultimos_monitoreos', db_column='idEstanque')
+    idSensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, db_column='idSensor')
+    idMonitoreo = models.ForeignKey(Monitoreo, on_delete=models.CASCADE, related_name='+', db_column='idMonitoreo', help_text="Monitoreo más reciente del sensor en el estanque")
+    valor = models.FloatField()
+    fecha = models.DateTimeField()
+    
+    def __str__(self):
+        return f"Último Monitoreo {self.idEstanque_id} - {self.idSensor_id}: {self.valor}"
+    
+    class Meta:
+        db_table = 'MonitoreoUltimo'
+        verbose_name = "Último Monitoreo"
+        verbose_name_plural = "Últimos Monitoreos"
+        unique_together = ('idEstanque', 'idSensor')  # Un solo registro por sensor por estanque
+
+class MonitoreoResumen(models.Model):
+    """
+    Resumen (mínimo, máximo, suma y conteo) de los monitoreos de un sensor en
+    un estanque dentro de un intervalo de tiempo. Se mantiene de forma
+    incremental en cada ingreso para que las gráficas de rangos largos lean
+    cientos de filas en lugar de millones de monitoreos.
+    """
+    RESOLUCIONES = [
+        ('HORA', 'Por Hora'),
+        ('DIA', 'Por Día'),
+    ]
+    
+    idMonitoreoResumen = models.AutoField(primary_key=True)
+    idEstanque = models.ForeignKey(Estanque, on_delete=models.CASCADE, db_column='idEstanque')
+    idSensor = models.ForeignKey(Sensor, on_delete=models.CASCADE, db_column='idSensor')
+    resolucion = models.CharField(max_length=10, choices=RESOLUCIONES, help_text="Tamaño del intervalo resumido")
+    inicio = models.DateTimeField(help_text="Inicio del intervalo (UTC)")
+    minimo = models.FloatField()
+    maximo = models.FloatField()
+    suma = models.FloatField(help_text="Suma de los valores, para calcular el promedio")
+    conteo = models.IntegerField(help_text="Número de monitoreos en el intervalo")
+    
+    def get_promedio(self):
+        """Retorna el promedio de los valores del intervalo"""
+        return self.suma / self.conteo if self.conteo else None
+    
+    def __str__(self):
+        return f"Resumen {self.resolucion} {self.inicio} - {self.idEstanque_id} - {self.idSensor_id}"
+    
+    class Meta:
+        db_table = 'MonitoreoResumen'
+        verbose_name = "Resumen de Monitoreo"
+        verbose_name_plural = "Resúmenes de Monitoreo"
+        unique_together = ('idEstanque', 'idSensor', 'resolucion', 'inicio')
 
 class Alerta(models.Model):
     TIPOS_ALERTA = [
         ('TEMPERATURA', 'Temperatura Anómala'),
         ('PH', 'pH Anómalo'),
         ('OXIGENO', 'Oxígeno Anómalo'),
+        ('CONDUCTIVIDAD', 'Conductividad Anómala'),
+        ('TURBIDEZ', 'Turbidez Anómala'),
+        ('AMONIO', 'Amonio Anómalo'),
         ('OTRO', 'Otro Tipo de Alerta'),
     ]
     
@@ -448,29 +684,47 @@ class Alerta(models.Model):
     ]
     
     idAlerta = models.AutoField(primary_key=True)
-    idMonitoreo = models.ForeignKey(Monitoreo, on_delete=models.CASCADE, db_column='idMonitoreo')
+    # Lectura que abrió el incidente; si se elimina, la alerta se conserva con su estanque y finca
+    idMonitoreo = models.ForeignKey(Monitoreo, on_delete=models.SET_NULL, db_column='idMonitoreo', null=True, blank=True, help_text="Monitoreo que originó la alerta")
+    # Copias del estanque y la finca del monitoreo para listar alertas sin pasar por Monitoreo
+    idEstanque = models.ForeignKey(Estanque, on_delete=models.CASCADE, db_column='idEstanque', null=True, blank=True, related_name='alertas', help_text="Estanque del monitoreo que originó la alerta")
+    idFinca = models.ForeignKey(Finca, on_delete=models.CASCADE, db_column='idFinca', null=True, blank=True, related_name='alertas', help_text="Finca del estanque que originó la alerta")
     idEspecie = models.ForeignKey(Especie, on_delete=models.CASCADE, db_column='idEspecie', null=True, blank=True, help_text="Especie que causó la alerta")
     tipoAlerta = models.CharField(max_length=20, choices=TIPOS_ALERTA, default='OTRO', help_text="Tipo de alerta generada")
     mensaje = models.TextField(help_text="Mensaje descriptivo de la alerta")
     valorMedido = models.FloatField(help_text="Valor que causó la alerta")
     valorLimite = models.FloatField(help_text="Valor límite que se excedió")
+    severidad = models.CharField(max_length=10, choices=ReglaUmbral.SEVERIDADES, default='MEDIA', help_text="Severidad de la regla incumplida")
+    conteo = models.IntegerField(default=1, help_text="Número de lecturas fuera de rango acumuladas en la alerta")
+    ultimoValor = models.FloatField(null=True, blank=True, help_text="Último valor fuera de rango registrado")
+    fechaUltimaLectura = models.DateTimeField(null=True, blank=True, help_text="Fecha de la última lectura fuera de rango")
     estado = models.CharField(max_length=20, choices=ESTADOS_ALERTA, default='ACTIVA')
     fechaCreacion = models.DateTimeField(auto_now_add=True, help_text="Fecha de creación de la alerta")
     fechaResolucion = models.DateTimeField(null=True, blank=True, help_text="Fecha de resolución de la alerta")
+    fechaLecturaResolucion = models.DateTimeField(null=True, blank=True, help_text="Fecha de la lectura dentro de rango que resolvió la alerta")
     
     def marcar_como_resuelta(self):
         """Marca la alerta como resuelta"""
         from django.utils import timezone
         self.estado = 'RESUELTA'
         self.fechaResolucion = timezone.now()
-        self.save()
+        # Solo el estado: no pisar lecturas acumuladas mientras tanto por el ingreso de monitoreos
+        self.save(update_fields=['estado', 'fechaResolucion'])
     
     def marcar_como_ignorada(self):
         """Marca la alerta como ignorada"""
         from django.utils import timezone
         self.estado = 'IGNORADA'
         self.fechaResolucion = timezone.now()
-        self.save()
+        self.save(update_fields=['estado', 'fechaResolucion'])
+    
+    def save(self, *args, **kwargs):
+        # Completar estanque y finca desde el monitoreo si no vienen dados
+        if self.idEstanque_id is None and self.idMonitoreo_id is not None:
+            self.idEstanque_id = self.idMonitoreo.idEstanque_id
+        if self.idFinca_id is None and self.idEstanque_id is not None:
+            self.idFinca_id = self.idEstanque.idFinca_id
+        super().save(*args, **kwargs)
     
     def __str__(self):
         return f"Alerta {self.idAlerta} - {self.tipoAlerta} - {self.estado}"
@@ -479,152 +733,246 @@ class Alerta(models.Model):
         db_table = 'Alerta'
         verbose_name = "Alerta"
         verbose_name_plural = "Alertas"
+        indexes = [
+            # Listados de alertas por estanque o finca filtrados por estado
+            models.Index(fields=['idEstanque', 'estado', 'fechaCreacion'], name='alerta_est_estado_fecha'),
+            models.Index(fields=['idFinca', 'estado', 'fechaCreacion'], name='alerta_finca_estado_fecha'),
+        ]
 
-# Signals - Disparadores automáticos
-@receiver(post_save, sender=Siembra)
-def crear_historial_siembra(sender, instance, created, **kwargs):
+class VersionRecurso(models.Model):
     """
-    Signal que se ejecuta automáticamente cuando se crea una nueva siembra.
-    Crea un registro en HistorialSiembra con el estado PENDIENTE.
+    Contador de versión de un recurso (ver api/versiones.py). Vive en la base
+    de datos para que todos los procesos del servidor lean la misma versión y
+    para que el cambio se confirme o se revierta junto con la escritura que lo
+    causa.
     """
-    if created:  # Solo cuando se crea una nueva siembra, no en actualizaciones
-        HistorialSiembra.objects.create(
-            idSiembra=instance,
-            estado='PENDIENTE'
-        )
+    idVersionRecurso = models.AutoField(primary_key=True)
+    recurso = models.CharField(max_length=100, unique=True, help_text="Nombre del recurso (p. ej. 'umbrales' o 'tablero_finca:1')")
+    version = models.BigIntegerField(default=1)
+    fechaModificacion = models.DateTimeField(help_text="Fecha del último cambio de versión")
+    
+    def __str__(self):
+        return f"{self.recurso} v{self.version}"
+    
+    class Meta:
+        db_table = 'VersionRecurso'
+        verbose_name = "Versión de Recurso"
+        verbose_name_plural = "Versiones de Recursos"
+
+def existencias_al(fecha, **filtros):
+    """
+    Retorna {(especie_id, finca_id): cantidad} con las existencias al instante
+    `fecha`, opcionalmente filtradas (idEspecie, idFinca). Lee el snapshot más
+    reciente de cada par anterior a la fecha y suma solo los movimientos
+    posteriores a él, de modo que el costo depende del periodo entre snapshots
+    y no del tamaño del historial.
+    """
+    ultimo = SnapshotInventario.objects.filter(
+        idEspecie=OuterRef('idEspecie'), idFinca=OuterRef('idFinca'), fecha__lte=fecha
+    ).order_by('-fecha').values('fecha')[:1]
+    snapshots = SnapshotInventario.objects.filter(fecha__lte=fecha, **filtros).filter(fecha=Subquery(ultimo))
+    
+    existencias = {}
+    desde = {}
+    for especie_id, finca_id, fecha_corte, cantidad in snapshots.values_list('idEspecie', 'idFinca', 'fecha', 'cantidad'):
+        existencias[(especie_id, finca_id)] = cantidad
+        desde[(especie_id, finca_id)] = fecha_corte
+    
+    # Todos los pares con movimientos tienen snapshot en cada corte, así que la
+    # cola empieza en el corte más antiguo de los pares leídos
+    movimientos = MovimientoInventario.objects.filter(fecha__lte=fecha, **filtros)
+    if desde:
+        movimientos = movimientos.filter(fecha__gt=min(desde.values()))
+    for especie_id, finca_id, fecha_movimiento, cantidad in movimientos.values_list('idEspecie', 'idFinca', 'fecha', 'cantidad'):
+        clave = (especie_id, finca_id)
+        if clave not in desde or fecha_movimiento > desde[clave]:
+            existencias[clave] = existencias.get(clave, 0) + cantidad
+    return existencias
+
+def recurso_tablero(finca_id):
+    """Nombre del contador de versión del tablero de una finca"""
+    return f'tablero_finca:{finca_id}'
+
+def invalidar_tableros(fincas=(), estanques=()):
+    """
+    Cambia la versión del tablero de las fincas indicadas, directamente o a
+    través de sus estanques. Lo usan los signals y también las escrituras por
+    lote (bulk_create, update) que no disparan signals.
+    """
+    fincas = set(fincas)
+    estanques = set(estanques) - {None}
+    if estanques:
+        fincas.update(Estanque.objects.filter(idEstanque__in=estanques).values_list('idFinca', flat=True))
+    for finca_id in fincas - {None}:
+        incrementar_version(recurso_tablero(finca_id))
+
+# Duración de los intervalos de cada resolución de MonitoreoResumen
+DURACION_INTERVALO = {
+    'HORA': datetime.timedelta(hours=1),
+    'DIA': datetime.timedelta(days=1),
+}
+
+def inicio_intervalo(fecha, resolucion):
+    """Retorna el inicio (UTC) del intervalo de la resolución que contiene a la fecha"""
+    fecha = fecha.astimezone(datetime.timezone.utc).replace(minute=0, second=0, microsecond=0)
+    if resolucion == 'DIA':
+        fecha = fecha.replace(hour=0)
+    return fecha
+
+# Signals - Invalidación de versiones y cachés (las reglas de negocio están en api/servicios.py)
+# Con raw (loaddata) no hacen nada: la carga invalida una sola vez al terminar (ver invalidar_modelos)
+@receiver(post_save, sender=Especie)
+@receiver(post_delete, sender=Especie)
+@receiver(post_save, sender=Sensor)
+@receiver(post_delete, sender=Sensor)
+@receiver(post_save, sender=ReglaUmbral)
+@receiver(post_delete, sender=ReglaUmbral)
+def invalidar_reglas_umbral(sender, **kwargs):
+    """
+    Signal que invalida las reglas de umbrales compiladas cuando cambian
+    especies, sensores o reglas.
+    """
+    if kwargs.get('raw'):
+        return
+    incrementar_version('umbrales')
 
 @receiver(post_save, sender=Siembra)
-def actualizar_inventario_siembra(sender, instance, created, **kwargs):
+@receiver(post_delete, sender=Siembra)
+@receiver(post_save, sender=HistorialSiembra)
+@receiver(post_delete, sender=HistorialSiembra)
+def invalidar_siembras_activas(sender, **kwargs):
     """
-    Signal que actualiza el inventario cuando se crea una siembra.
-    Suma la cantidad sembrada al inventario de la especie en la finca.
+    Signal que invalida el índice de siembras activas por estanque cuando se
+    crea, comercializa, cancela o elimina una siembra.
     """
-    if created:  # Solo cuando se crea una nueva siembra
-        finca = instance.idEstanque.idFinca
-        especie = instance.idEspecie
-        cantidad = instance.cantidad
-        
-        # Buscar o crear el inventario para esta especie en esta finca
-        inventario, created_inv = Inventario.objects.get_or_create(
-            idEspecie=especie,
-            idFinca=finca,
-            defaults={'cantidad': 0}
-        )
-        
-        # Agregar la cantidad sembrada al inventario
-        inventario.agregar_cantidad(cantidad)
+    if kwargs.get('raw'):
+        return
+    incrementar_version('siembras_activas')
+
+# Recursos con GET condicional que cambian al guardar o eliminar cada modelo,
+# incluidos los modelos cuyos nombres aparecen en la representación del recurso
+RECURSOS_POR_MODELO = {
+    'Especie': ('especies', 'estanques', 'inventarios'),
+    'InformacionNutricional': ('especies',),
+    'Vitamina': ('especies',),
+    'Mineral': ('especies',),
+    'TasaCrecimiento': ('especies',),
+    'TasaReproduccion': ('especies',),
+    'Finca': ('fincas', 'estanques', 'inventarios'),
+    'MetodoAcuicola': ('fincas',),
+    'Usuario': ('fincas',),
+    'Estanque': ('estanques',),
+    'TipoEstanque': ('estanques',),
+    'EstadoEstanque': ('estanques',),
+    'Inventario': ('inventarios',),
+    'Siembra': ('historiales_siembra',),
+    'HistorialSiembra': ('historiales_siembra',),
+}
 
+@receiver(post_save, sender=Especie)
+@receiver(post_delete, sender=Especie)
+@receiver(post_save, sender=InformacionNutricional)
+@receiver(post_delete, sender=InformacionNutricional)
+@receiver(post_save, sender=Vitamina)
+@receiver(post_delete, sender=Vitamina)
+@receiver(post_save, sender=Mineral)
+@receiver(post_delete, sender=Mineral)
+@receiver(post_save, sender=TasaCrecimiento)
+@receiver(post_delete, sender=TasaCrecimiento)
+@receiver(post_save, sender=TasaReproduccion)
+@receiver(post_delete, sender=TasaReproduccion)
+@receiver(post_save, sender=Finca)
+@receiver(post_delete, sender=Finca)
+@receiver(post_save, sender=MetodoAcuicola)
+@receiver(post_delete, sender=MetodoAcuicola)
+@receiver(post_save, sender=Usuario)
+@receiver(post_delete, sender=Usuario)
+@receiver(post_save, sender=Estanque)
+@receiver(post_delete, sender=Estanque)
+@receiver(post_save, sender=TipoEstanque)
+@receiver(post_delete, sender=TipoEstanque)
+@receiver(post_save, sender=EstadoEstanque)
+@receiver(post_delete, sender=EstadoEstanque)
+@receiver(post_save, sender=Inventario)
+@receiver(post_delete, sender=Inventario)
+@receiver(post_save, sender=Siembra)
+@receiver(post_delete, sender=Siembra)
 @receiver(post_save, sender=HistorialSiembra)
-def actualizar_inventario_comercializacion(sender, instance, created, **kwargs):
+@receiver(post_delete, sender=HistorialSiembra)
+def invalidar_recursos_condicionales(sender, **kwargs):
     """
-    Signal que actualiza el inventario cuando se comercializa una siembra.
-    Resta los peces comercializados del inventario.
+    Signal que cambia la versión de los recursos servidos con GET condicional
+    (ETag / Last-Modified) cuando se guarda o elimina un modelo que forma
+    parte de su representación.
     """
-    if not created and instance.estado == 'COMERCIALIZADO' and instance.pecesComercializados:
-        # Solo ejecutar si el historial se actualizó (no se creó) y está comercializado
-        finca = instance.idSiembra.idEstanque.idFinca
-        especie = instance.idSiembra.idEspecie
-        cantidad_comercializada = instance.pecesComercializados
-        
-        try:
-            inventario = Inventario.objects.get(idEspecie=especie, idFinca=finca)
-            inventario.reducir_cantidad(cantidad_comercializada)
-        except Inventario.DoesNotExist:
-            # Si no existe inventario, crear uno con cantidad 0
-            Inventario.objects.create(
-                idEspecie=especie,
-                idFinca=finca,
-                cantidad=0
-            )
+    if kwargs.get('raw'):
+        return
+    for recurso in RECURSOS_POR_MODELO[sender.__name__]:
+        incrementar_version(recurso)
 
+@receiver(post_save, sender=Finca)
+@receiver(post_delete, sender=Finca)
+@receiver(post_save, sender=Estanque)
+@receiver(post_delete, sender=Estanque)
+@receiver(post_save, sender=Inventario)
+@receiver(post_delete, sender=Inventario)
+@receiver(post_save, sender=Siembra)
+@receiver(post_delete, sender=Siembra)
 @receiver(post_save, sender=Desdoble)
-def crear_bitacora_desdoble(sender, instance, created, **kwargs):
+@receiver(post_delete, sender=Desdoble)
+@receiver(post_save, sender=EstadoEstanque)
+@receiver(post_delete, sender=EstadoEstanque)
+@receiver(post_save, sender=Alerta)
+@receiver(post_delete, sender=Alerta)
+@receiver(post_save, sender=Especie)
+@receiver(post_delete, sender=Especie)
+def invalidar_tablero_finca(sender, instance, **kwargs):
     """
-    Signal que crea automáticamente una bitácora cuando se registra un desdoble.
+    Signal que invalida el tablero en caché de la finca a la que pertenece
+    el registro guardado o eliminado.
     """
-    if created:  # Solo cuando se crea un nuevo desdoble
-        BitacoraDesdoble.objects.create(
-            idDesdoble=instance,
-            cambioRealizado=f"Desdoble automático desde estanque {instance.idEstanqueOrigen} hacia estanque {instance.idEstanqueDestino}"
+    if kwargs.get('raw'):
+        return
+    if sender is Finca:
+        invalidar_tableros(fincas=[instance.pk])
+    elif sender in (Siembra, EstadoEstanque):
+        invalidar_tableros(estanques=[instance.idEstanque_id])
+    elif sender is Desdoble:
+        invalidar_tableros(estanques=[instance.idEstanqueOrigen_id, instance.idEstanqueDestino_id])
+    elif sender is Alerta and instance.idFinca_id is None:
+        invalidar_tableros(estanques=[instance.idEstanque_id])
+    elif sender is Especie:
+        # El nombre de la especie aparece en el inventario, las siembras, la población y las alertas de la finca
+        invalidar_tableros(
+            fincas=[
+                *Inventario.objects.filter(idEspecie=instance.pk).values_list('idFinca', flat=True),
+                *Alerta.objects.filter(idEspecie=instance.pk).values_list('idFinca', flat=True),
+            ],
+            estanques=[
+                *Siembra.objects.filter(idEspecie=instance.pk).values_list('idEstanque', flat=True),
+                *EstadoEstanque.objects.filter(idEspecie=instance.pk).values_list('idEstanque', flat=True),
+            ]
         )
+    else:
+        invalidar_tableros(fincas=[instance.idFinca_id])
 
-@receiver(post_save, sender=Monitoreo)
-def verificar_alertas_monitoreo(sender, instance, created, **kwargs):
+def invalidar_modelos(modelos):
     """
-    Signal que verifica si los valores de monitoreo están fuera de los rangos
-    normales para las especies en el estanque y crea alertas automáticas.
+    Cambia una sola vez las versiones que los receivers de arriba cambiarían
+    por cada registro de los `modelos` indicados. Lo usan las cargas que no
+    pasan por ellos: loaddata (signals con raw) y las importaciones con
+    bulk_create. Como no se sabe a qué fincas pertenecen los registros, se
+    invalidan los tableros de todas.
     """
-    if created:  # Solo para nuevos monitoreos
-        estanque = instance.idEstanque
-        sensor = instance.idSensor
-        valor_medido = instance.valor
-        fecha_monitoreo = instance.fecha
-        
-        # Obtener todas las siembras activas en este estanque
-        siembras_activas = Siembra.objects.filter(
-            idEstanque=estanque,
-            historialsiembra__estado='PENDIENTE'
-        ).distinct()
-        
-        for siembra in siembras_activas:
-            especie = siembra.idEspecie
-            alertas_creadas = []
-            
-            # Verificar temperatura
-            if sensor.nombreSensor.lower() in ['temperatura', 'temp'] and sensor.unidadMedida.lower() in ['°c', 'celsius', 'c']:
-                if especie.temperatura_optima_min is not None and valor_medido < especie.temperatura_optima_min:
-                    mensaje = f"Temperatura BAJA detectada: {valor_medido}°C. Mínimo recomendado para {especie.nombre}: {especie.temperatura_optima_min}°C"
-                    Alerta.objects.create(
-                        idMonitoreo=instance,
-                        idEspecie=especie,
-                        tipoAlerta='TEMPERATURA',
-                        mensaje=mensaje,
-                        valorMedido=valor_medido,
-                        valorLimite=especie.temperatura_optima_min
-                    )
-                elif especie.temperatura_optima_max is not None and valor_medido > especie.temperatura_optima_max:
-                    mensaje = f"Temperatura ALTA detectada: {valor_medido}°C. Máximo recomendado para {especie.nombre}: {especie.temperatura_optima_max}°C"
-                    Alerta.objects.create(
-                        idMonitoreo=instance,
-                        idEspecie=especie,
-                        tipoAlerta='TEMPERATURA',
-                        mensaje=mensaje,
-                        valorMedido=valor_medido,
-                        valorLimite=especie.temperatura_optima_max
-                    )
-            
-            # Verificar pH
-            elif sensor.nombreSensor.lower() == 'ph':
-                if especie.ph_optimo_min is not None and valor_medido < especie.ph_optimo_min:
-                    mensaje = f"pH BAJO detectado: {valor_medido}. Mínimo recomendado para {especie.nombre}: {especie.ph_optimo_min}"
-                    Alerta.objects.create(
-                        idMonitoreo=instance,
-                        idEspecie=especie,
-                        tipoAlerta='PH',
-                        mensaje=mensaje,
-                        valorMedido=valor_medido,
-                        valorLimite=especie.ph_optimo_min
-                    )
-                elif especie.ph_optimo_max is not None and valor_medido > especie.ph_optimo_max:
-                    mensaje = f"pH ALTO detectado: {valor_medido}. Máximo recomendado para {especie.nombre}: {especie.ph_optimo_max}"
-                    Alerta.objects.create(
-                        idMonitoreo=instance,
-                        idEspecie=especie,
-                        tipoAlerta='PH',
-                        mensaje=mensaje,
-                        valorMedido=valor_medido,
-                        valorLimite=especie.ph_optimo_max
-                    )
-            
-            # Verificar oxígeno disuelto
-            elif sensor.nombreSensor.lower() in ['oxigeno', 'oxígeno', 'o2'] and sensor.unidadMedida.lower() in ['mg/l', 'ppm']:
-                if especie.oxigeno_minimo is not None and valor_medido < especie.oxigeno_minimo:
-                    mensaje = f"Oxígeno BAJO detectado: {valor_medido} mg/L. Mínimo recomendado para {especie.nombre}: {especie.oxigeno_minimo} mg/L"
-                    Alerta.objects.create(
-                        idMonitoreo=instance,
-                        idEspecie=especie,
-                        tipoAlerta='OXIGENO',
-                        mensaje=mensaje,
-                        valorMedido=valor_medido,
-                        valorLimite=especie.oxigeno_minimo
-                    )
\ No newline at end of file
+    modelos = set(modelos)
+    recursos = set()
+    for modelo in modelos:
+        recursos.update(RECURSOS_POR_MODELO.get(modelo.__name__, ()))
+    if modelos & {Especie, Sensor, ReglaUmbral}:
+        recursos.add('umbrales')
+    if modelos & {Siembra, HistorialSiembra}:
+        recursos.add('siembras_activas')
+    for recurso in sorted(recursos):
+        incrementar_version(recurso)
+    if modelos & {Finca, Estanque, Inventario, Siembra, Desdoble, EstadoEstanque, Alerta, Especie}:
+        invalidar_tableros(fincas=Finca.objects.values_list('idFinca', flat=True))
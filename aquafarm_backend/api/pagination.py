@@ -0,0 +1,104 @@
+from base64 import b64decode, b64encode
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class KeysetPagination(BasePagination):
+    """
+    Paginación por llave (keyset) sobre (campo de fecha, llave primaria) en
+    orden descendente. Cada página filtra a partir de la última fila de la
+    página anterior en lugar de usar OFFSET, por lo que la página N cuesta lo
+    mismo que la primera cuando existe un índice que termina en el campo de fecha.
+    """
+    page_size = 500
+    max_page_size = 5000
+    page_size_query_param = 'limite'
+    cursor_query_param = 'cursor'
+    campo_orden = 'fecha'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.next_cursor = None
+        campo_pk = queryset.model._meta.pk.name
+        limite = self.get_page_size(request)
+
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            fecha, pk = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(**{f'{self.campo_orden}__lt': fecha}) |
+                Q(**{self.campo_orden: fecha, f'{campo_pk}__lt': pk})
+            )
+
+        # Se pide una fila extra solo para saber si existe una página siguiente
+        pagina = list(queryset.order_by(f'-{self.campo_orden}', f'-{campo_pk}')[:limite + 1])
+        if len(pagina) > limite:
+            pagina = pagina[:limite]
+            ultimo = pagina[-1]
+            self.next_cursor = self.encode_cursor(getattr(ultimo, self.campo_orden), ultimo.pk)
+        return pagina
+
+    def get_page_size(self, request):
+        try:
+            limite = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(limite, self.max_page_size))
+
+    def encode_cursor(self, fecha, pk):
+        return b64encode(f'{fecha.isoformat()}|{pk}'.encode()).decode()
+
+    def decode_cursor(self, cursor):
+        try:
+            fecha, pk = b64decode(cursor.encode(), validate=True).decode().split('|')
+            fecha = parse_datetime(fecha)
+            if fecha is None:
+                raise ValueError(fecha)
+            return fecha, int(pk)
+        except (TypeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+
+class CursorPaginacion(CursorPagination):
+    """
+    Paginación por cursor para los listados de la API. Ordena según el
+    order_by que ya trae el queryset del viewset o de la acción (llave
+    primaria o fecha), de modo que cada página es un rango sobre esa columna
+    y su costo no depende del tamaño de la tabla. Si ese orden no incluye la
+    llave primaria se agrega al final como desempate, para que las filas con
+    la misma fecha tengan un orden estable entre páginas.
+    """
+    page_size = 100
+    max_page_size = 1000
+    page_size_query_param = 'limite'
+    ordering = '-pk'
+    invalid_cursor_message = 'Cursor inválido'
+
+    def get_ordering(self, request, queryset, view):
+        ordering = queryset.query.order_by
+        if ordering and all(isinstance(campo, str) for campo in ordering):
+            return self.desempatar(tuple(ordering), queryset.model._meta.pk.name)
+        return super().get_ordering(request, queryset, view)
+
+    def desempatar(self, ordering, campo_pk):
+        """Agrega la llave primaria al orden, en la dirección del primer campo, si no está"""
+        if any(campo.lstrip('-') in (campo_pk, 'pk') for campo in ordering):
+            return ordering
+        return ordering + (f'-{campo_pk}' if ordering[0].startswith('-') else campo_pk,)
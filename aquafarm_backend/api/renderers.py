@@ -0,0 +1,34 @@
+"""
+Renderer JSON de la API respaldado por orjson.
+
+Produce los mismos bytes que el JSONRenderer de DRF con la configuración por
+defecto (JSON compacto en UTF-8 sin escapar caracteres no ASCII): las fechas
+y los tipos que orjson no conoce pasan por el codificador de DRF. Si orjson
+no está instalado, o se pide una salida indentada, se usa el renderer de DRF.
+"""
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson es opcional
+    orjson = None
+
+
+class ORJSONRenderer(JSONRenderer):
+    codificador = encoders.JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.ensure_ascii or not self.compact:
+            return super().render(data, accepted_media_type, renderer_context)
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        ret = orjson.dumps(
+            data, default=self.codificador.default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+        # Igual que DRF, se escapan U+2028 y U+2029 para que el JSON sea JavaScript válido
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
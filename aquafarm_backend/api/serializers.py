@@ -6,7 +6,7 @@ from .models import (
     Estanque, Especie, Inventario, Siembra, HistorialSiembra, 
     Desdoble, BitacoraDesdoble, HistorialEstanques, Sensor, 
     Monitoreo, Alerta, InformacionNutricional, Vitamina, Mineral,
-    TasaCrecimiento, TasaReproduccion
+    TasaCrecimiento, TasaReproduccion, ReglaUmbral, MovimientoInventario, Mortalidad
 )
 
 class UserSerializer(serializers.ModelSerializer):
@@ -74,16 +74,45 @@ class TipoEstanqueSerializer(serializers.ModelSerializer):
 class EstanqueSerializer(serializers.ModelSerializer):
     finca = serializers.SerializerMethodField()
     tipo_estanque = serializers.SerializerMethodField()
+    poblacion = serializers.SerializerMethodField()
+    cantidad_peces = serializers.SerializerMethodField()
+    # Biomasa al peso de siembra guardada en EstadoEstanque; la actual la estima fincas/{id}/proyeccion/
+    biomasa_siembra = serializers.SerializerMethodField()
     
     class Meta:
         model = Estanque
-        fields = ['idEstanque', 'idFinca', 'finca', 'litros', 'capacidad', 'idTipoEstanque', 'tipo_estanque']
+        fields = [
+            'idEstanque', 'idFinca', 'finca', 'litros', 'capacidad', 'idTipoEstanque', 'tipo_estanque',
+            'poblacion', 'cantidad_peces', 'biomasa_siembra'
+        ]
     
     def get_finca(self, obj):
         return obj.idFinca.nombre if obj.idFinca else None
     
     def get_tipo_estanque(self, obj):
         return obj.idTipoEstanque.nombre if obj.idTipoEstanque else None
+    
+    def estados(self, obj):
+        # Los viewsets precargan los estados con su especie (ver prefetch_poblacion)
+        return [estado for estado in obj.estados.all() if estado.cantidad > 0]
+    
+    def get_poblacion(self, obj):
+        return [
+            {
+                'idEspecie': estado.idEspecie_id,
+                'especie': estado.idEspecie.nombre,
+                'cantidad': estado.cantidad,
+                'biomasa_siembra': round(estado.biomasa, 3),
+                'peso_siembra': round(estado.peso_promedio, 4),
+            }
+            for estado in self.estados(obj)
+        ]
+    
+    def get_cantidad_peces(self, obj):
+        return sum(estado.cantidad for estado in self.estados(obj))
+    
+    def get_biomasa_siembra(self, obj):
+        return round(sum(estado.biomasa for estado in self.estados(obj)), 3)
 
 # Nuevos serializadores para los modelos de información nutricional
 class VitaminaSerializer(serializers.ModelSerializer):
@@ -109,7 +138,9 @@ class TasaCrecimientoSerializer(serializers.ModelSerializer):
     class Meta:
         model = TasaCrecimiento
         fields = ['idTasaCrecimiento', 'descripcion', 'crecimiento_mensual_promedio', 
-                 'tiempo_para_peso_maximo', 'peso_maximo']
+                 'tiempo_para_peso_maximo', 'peso_maximo',
+                 'crecimiento_mensual_kg', 'peso_maximo_kg', 'meses_peso_maximo']
+        read_only_fields = ['crecimiento_mensual_kg', 'peso_maximo_kg', 'meses_peso_maximo']
 
 class TasaReproduccionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -153,6 +184,42 @@ class EspecieSerializer(serializers.ModelSerializer):
     def get_ph_rango(self, obj):
         return obj.get_ph_rango()
 
+def actualizar_si_cambia(instancia, datos):
+    """Asigna `datos` a la instancia y la guarda solo con los campos que cambiaron"""
+    cambiados = [campo for campo, valor in datos.items() if getattr(instancia, campo) != valor]
+    for campo in cambiados:
+        setattr(instancia, campo, datos[campo])
+    if cambiados:
+        instancia.save(update_fields=cambiados)
+
+def sincronizar_nutrientes(modelo, informacion, datos):
+    """
+    Sincroniza las vitaminas o minerales (`modelo`) de una información
+    nutricional con `datos`, comparando por nombre: inserta los nuevos con un
+    bulk_create, actualiza con un bulk_update solo los que cambiaron de
+    cantidad y elimina los que ya no vienen. Si un nombre se repite se
+    conserva el último.
+    """
+    deseados = {dato['nombre']: dato for dato in datos}
+    existentes = {nutriente.nombre: nutriente for nutriente in modelo.objects.filter(informacion_nutricional=informacion)}
+    
+    nuevos, cambiados = [], []
+    for nombre, dato in deseados.items():
+        actual = existentes.get(nombre)
+        if actual is None:
+            nuevos.append(modelo(informacion_nutricional=informacion, **dato))
+        elif actual.cantidad != dato['cantidad']:
+            actual.cantidad = dato['cantidad']
+            cambiados.append(actual)
+    sobrantes = [nutriente.pk for nombre, nutriente in existentes.items() if nombre not in deseados]
+    
+    if sobrantes:
+        modelo.objects.filter(pk__in=sobrantes).delete()
+    if cambiados:
+        modelo.objects.bulk_update(cambiados, ['cantidad'])
+    if nuevos:
+        modelo.objects.bulk_create(nuevos)
+
 # Serializador para crear/actualizar especies con información relacionada
 class EspecieCreateUpdateSerializer(serializers.ModelSerializer):
     informacion_nutricional = InformacionNutricionalSerializer(required=False)
@@ -188,13 +255,13 @@ class EspecieCreateUpdateSerializer(serializers.ModelSerializer):
             info_nutricional = InformacionNutricional.objects.create(**informacion_nutricional_data)
             especie.informacion_nutricional = info_nutricional
             
-            # Crear vitaminas
-            for vitamina_data in vitaminas_data:
-                Vitamina.objects.create(informacion_nutricional=info_nutricional, **vitamina_data)
-            
-            # Crear minerales
-            for mineral_data in minerales_data:
-                Mineral.objects.create(informacion_nutricional=info_nutricional, **mineral_data)
+            # Crear vitaminas y minerales con un INSERT por tabla
+            Vitamina.objects.bulk_create([
+                Vitamina(informacion_nutricional=info_nutricional, **vitamina_data) for vitamina_data in vitaminas_data
+            ])
+            Mineral.objects.bulk_create([
+                Mineral(informacion_nutricional=info_nutricional, **mineral_data) for mineral_data in minerales_data
+            ])
         
         # Crear tasa de crecimiento si existe
         if tasa_crecimiento_data:
@@ -223,35 +290,23 @@ class EspecieCreateUpdateSerializer(serializers.ModelSerializer):
         # Actualizar o crear información nutricional
         if informacion_nutricional_data:
             if instance.informacion_nutricional:
-                for attr, value in informacion_nutricional_data.items():
-                    setattr(instance.informacion_nutricional, attr, value)
-                instance.informacion_nutricional.save()
+                actualizar_si_cambia(instance.informacion_nutricional, informacion_nutricional_data)
             else:
                 info_nutricional = InformacionNutricional.objects.create(**informacion_nutricional_data)
                 instance.informacion_nutricional = info_nutricional
             
-            # Actualizar vitaminas
+            # Actualizar vitaminas: solo se tocan las filas que cambiaron
             if vitaminas_data and instance.informacion_nutricional:
-                # Eliminar vitaminas existentes
-                instance.informacion_nutricional.vitaminas.all().delete()
-                # Crear nuevas vitaminas
-                for vitamina_data in vitaminas_data:
-                    Vitamina.objects.create(informacion_nutricional=instance.informacion_nutricional, **vitamina_data)
+                sincronizar_nutrientes(Vitamina, instance.informacion_nutricional, vitaminas_data)
             
-            # Actualizar minerales
+            # Actualizar minerales: solo se tocan las filas que cambiaron
             if minerales_data and instance.informacion_nutricional:
-                # Eliminar minerales existentes
-                instance.informacion_nutricional.minerales.all().delete()
-                # Crear nuevos minerales
-                for mineral_data in minerales_data:
-                    Mineral.objects.create(informacion_nutricional=instance.informacion_nutricional, **mineral_data)
+                sincronizar_nutrientes(Mineral, instance.informacion_nutricional, minerales_data)
         
         # Actualizar o crear tasa de crecimiento
         if tasa_crecimiento_data:
             if instance.tasa_crecimiento:
-                for attr, value in tasa_crecimiento_data.items():
-                    setattr(instance.tasa_crecimiento, attr, value)
-                instance.tasa_crecimiento.save()
+                actualizar_si_cambia(instance.tasa_crecimiento, tasa_crecimiento_data)
             else:
                 tasa_crecimiento = TasaCrecimiento.objects.create(**tasa_crecimiento_data)
                 instance.tasa_crecimiento = tasa_crecimiento
@@ -259,9 +314,7 @@ class EspecieCreateUpdateSerializer(serializers.ModelSerializer):
         # Actualizar o crear tasa de reproducción
         if tasa_reproduccion_data:
             if instance.tasa_reproduccion:
-                for attr, value in tasa_reproduccion_data.items():
-                    setattr(instance.tasa_reproduccion, attr, value)
-                instance.tasa_reproduccion.save()
+                actualizar_si_cambia(instance.tasa_reproduccion, tasa_reproduccion_data)
             else:
                 tasa_reproduccion = TasaReproduccion.objects.create(**tasa_reproduccion_data)
                 instance.tasa_reproduccion = tasa_reproduccion
@@ -284,19 +337,36 @@ class InventarioSerializer(serializers.ModelSerializer):
     def get_finca(self, obj):
         return obj.idFinca.nombre if obj.idFinca else None
 
+class MovimientoInventarioSerializer(serializers.ModelSerializer):
+    especie = serializers.SerializerMethodField()
+    finca = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = MovimientoInventario
+        fields = [
+            'idMovimientoInventario', 'idEspecie', 'especie', 'idFinca', 'finca',
+            'tipo', 'cantidad', 'fecha', 'idSiembra', 'descripcion', 'fechaCreacion'
+        ]
+    
+    def get_especie(self, obj):
+        return obj.idEspecie.nombre if obj.idEspecie else None
+    
+    def get_finca(self, obj):
+        return obj.idFinca.nombre if obj.idFinca else None
+
 class SiembraSerializer(serializers.ModelSerializer):
     especie = serializers.SerializerMethodField()
     estanque = serializers.SerializerMethodField()
     
     class Meta:
         model = Siembra
-        fields = ['idSiembra', 'idEspecie', 'especie', 'idEstanque', 'estanque', 'cantidad', 'fecha', 'inversion']
+        fields = ['idSiembra', 'idEspecie', 'especie', 'idEstanque', 'estanque', 'cantidad', 'fecha', 'inversion', 'pesoInicial']
     
     def get_especie(self, obj):
         return obj.idEspecie.nombre if obj.idEspecie else None
     
     def get_estanque(self, obj):
-        return f"Estanque {obj.idEstanque.idEstanque}" if obj.idEstanque else None
+        return f"Estanque {obj.idEstanque_id}" if obj.idEstanque_id else None
 
 # Serializador actualizado para HistorialSiembra
 class HistorialSiembraSerializer(serializers.ModelSerializer):
@@ -318,7 +388,7 @@ class HistorialSiembraSerializer(serializers.ModelSerializer):
         ]
     
     def get_siembra(self, obj):
-        return f"Siembra {obj.idSiembra.idSiembra}" if obj.idSiembra else None
+        return f"Siembra {obj.idSiembra_id}" if obj.idSiembra_id else None
     
     def get_ingresos_totales(self, obj):
         return obj.calcular_ingresos_totales()
@@ -339,16 +409,29 @@ class DesdobleSerializer(serializers.ModelSerializer):
     
     class Meta:
         model = Desdoble
-        fields = ['idDesdoble', 'idEstanqueOrigen', 'estanque_origen', 'idEstanqueDestino', 'estanque_destino', 'idSiembra', 'siembra', 'fecha']
+        fields = ['idDesdoble', 'idEstanqueOrigen', 'estanque_origen', 'idEstanqueDestino', 'estanque_destino', 'idSiembra', 'siembra', 'fecha', 'cantidad']
+        extra_kwargs = {'cantidad': {'min_value': 1}}
     
     def get_estanque_origen(self, obj):
-        return f"Estanque {obj.idEstanqueOrigen.idEstanque}" if obj.idEstanqueOrigen else None
+        return f"Estanque {obj.idEstanqueOrigen_id}" if obj.idEstanqueOrigen_id else None
     
     def get_estanque_destino(self, obj):
-        return f"Estanque {obj.idEstanqueDestino.idEstanque}" if obj.idEstanqueDestino else None
+        return f"Estanque {obj.idEstanqueDestino_id}" if obj.idEstanqueDestino_id else None
     
     def get_siembra(self, obj):
-        return f"Siembra {obj.idSiembra.idSiembra}" if obj.idSiembra else None
+        return f"Siembra {obj.idSiembra_id}" if obj.idSiembra_id else None
+
+class MortalidadSerializer(serializers.ModelSerializer):
+    especie = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = Mortalidad
+        fields = ['idMortalidad', 'idEstanque', 'idEspecie', 'especie', 'cantidad', 'fecha', 'causa', 'fechaCreacion']
+        read_only_fields = ['idEstanque']
+        extra_kwargs = {'cantidad': {'min_value': 1}}
+    
+    def get_especie(self, obj):
+        return obj.idEspecie.nombre if obj.idEspecie else None
 
 # Serializador actualizado para BitacoraDesdoble
 class BitacoraDesdobleSerializer(serializers.ModelSerializer):
@@ -359,7 +442,7 @@ class BitacoraDesdobleSerializer(serializers.ModelSerializer):
         fields = ['idBitacoraDesdoble', 'idDesdoble', 'desdoble', 'fechaCreacion', 'cambioRealizado']
     
     def get_desdoble(self, obj):
-        return f"Desdoble {obj.idDesdoble.idDesdoble}" if obj.idDesdoble else None
+        return f"Desdoble {obj.idDesdoble_id}" if obj.idDesdoble_id else None
 
 class HistorialEstanquesSerializer(serializers.ModelSerializer):
     estanque = serializers.SerializerMethodField()
@@ -369,13 +452,32 @@ class HistorialEstanquesSerializer(serializers.ModelSerializer):
         fields = ['idHistorialEstanques', 'idEstanque', 'estanque', 'fecha', 'cambioRealizado']
     
     def get_estanque(self, obj):
-        return f"Estanque {obj.idEstanque.idEstanque}" if obj.idEstanque else None
+        return f"Estanque {obj.idEstanque_id}" if obj.idEstanque_id else None
 
 class SensorSerializer(serializers.ModelSerializer):
     class Meta:
         model = Sensor
         fields = '__all__'
 
+class ReglaUmbralSerializer(serializers.ModelSerializer):
+    especie = serializers.SerializerMethodField()
+    
+    class Meta:
+        model = ReglaUmbral
+        fields = ['idReglaUmbral', 'idEspecie', 'especie', 'tipoSensor', 'minimo', 'maximo', 'severidad', 'activa']
+    
+    def get_especie(self, obj):
+        return obj.idEspecie.nombre if obj.idEspecie else None
+    
+    def validate(self, data):
+        minimo = data.get('minimo', getattr(self.instance, 'minimo', None))
+        maximo = data.get('maximo', getattr(self.instance, 'maximo', None))
+        if minimo is None and maximo is None:
+            raise serializers.ValidationError("Se requiere al menos un valor mínimo o máximo.")
+        if minimo is not None and maximo is not None and minimo > maximo:
+            raise serializers.ValidationError("El valor mínimo no puede ser mayor que el máximo.")
+        return data
+
 class MonitoreoSerializer(serializers.ModelSerializer):
     estanque = serializers.SerializerMethodField()
     sensor = serializers.SerializerMethodField()
@@ -385,11 +487,34 @@ class MonitoreoSerializer(serializers.ModelSerializer):
         fields = ['idMonitoreo', 'idEstanque', 'estanque', 'idSensor', 'sensor', 'valor', 'fecha']
     
     def get_estanque(self, obj):
-        return f"Estanque {obj.idEstanque.idEstanque}" if obj.idEstanque else None
+        return f"Estanque {obj.idEstanque_id}" if obj.idEstanque_id else None
     
     def get_sensor(self, obj):
         return obj.idSensor.nombreSensor if obj.idSensor else None
 
+class MonitoreoBulkSerializer(serializers.Serializer):
+    """
+    Serializador liviano para la carga masiva de monitoreos. Usa campos
+    planos para que validar miles de lecturas no consulte la base de datos
+    por cada fila; la existencia de estanques y sensores se valida por lote.
+    """
+    idEstanque = serializers.IntegerField()
+    idSensor = serializers.IntegerField()
+    valor = serializers.FloatField()
+    fecha = serializers.DateTimeField()
+
+class SiembraBulkSerializer(serializers.Serializer):
+    """
+    Serializador liviano para la carga masiva de siembras; como en los
+    monitoreos, especies y estanques se validan por lote y no por fila.
+    """
+    idEspecie = serializers.IntegerField()
+    idEstanque = serializers.IntegerField()
+    cantidad = serializers.IntegerField(min_value=1)
+    fecha = serializers.DateTimeField()
+    inversion = serializers.FloatField()
+    pesoInicial = serializers.FloatField(min_value=0, required=False, allow_null=True)
+
 # Serializador actualizado para Alerta
 class AlertaSerializer(serializers.ModelSerializer):
     monitoreo = serializers.SerializerMethodField()
@@ -398,17 +523,150 @@ class AlertaSerializer(serializers.ModelSerializer):
     class Meta:
         model = Alerta
         fields = [
-            'idAlerta', 'idMonitoreo', 'monitoreo', 'idEspecie', 'especie',
-            'tipoAlerta', 'mensaje', 'valorMedido', 'valorLimite',
+            'idAlerta', 'idMonitoreo', 'monitoreo', 'idEstanque', 'idFinca', 'idEspecie', 'especie',
+            'tipoAlerta', 'severidad', 'mensaje', 'valorMedido', 'valorLimite',
+            'conteo', 'ultimoValor', 'fechaUltimaLectura',
             'estado', 'fechaCreacion', 'fechaResolucion'
         ]
+        read_only_fields = ['idEstanque', 'idFinca']  # Se copian del monitoreo al guardar
     
     def get_monitoreo(self, obj):
-        return f"Monitoreo {obj.idMonitoreo.idMonitoreo}" if obj.idMonitoreo else None
+        return f"Monitoreo {obj.idMonitoreo_id}" if obj.idMonitoreo_id else None
     
     def get_especie(self, obj):
         return obj.idEspecie.nombre if obj.idEspecie else None
 
+# Serializadores de lectura rápida para listados grandes
+class Columna:
+    """Campo de un serializador de lectura rápida: el valor de una columna de values() tal cual"""
+    
+    def __init__(self, columna):
+        self.columna = columna
+    
+    def representar(self, fila, serializador):
+        return fila[self.columna]
+
+class ColumnaFecha(Columna):
+    """Fecha formateada como la formatea DateTimeField"""
+    
+    def representar(self, fila, serializador):
+        return serializador.fecha(fila[self.columna])
+
+class ColumnaEtiqueta(Columna):
+    """Texto '<prefijo> <id>' de los get_* de los ModelSerializer, o None si no hay ID"""
+    
+    def __init__(self, prefijo, columna):
+        super().__init__(columna)
+        self.prefijo = prefijo
+    
+    def representar(self, fila, serializador):
+        valor = fila[self.columna]
+        return f"{self.prefijo} {valor}" if valor else None
+
+class LecturaRapidaSerializer:
+    """
+    Serializador de solo lectura que arma cada fila a partir de
+    QuerySet.values(), con los nombres relacionados unidos en el mismo SQL,
+    sin instanciar modelos ni recorrer los campos de DRF.
+    
+    Cada subclase declara `campos`: pares (nombre en el JSON, columna) en el
+    orden de su ModelSerializer equivalente, donde la columna es un nombre de
+    values() o una Columna que la transforma. Las columnas a consultar se
+    derivan de esos campos al definir la subclase.
+    """
+    campos = ()
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not cls.campos:
+            raise TypeError(f"{cls.__name__} debe declarar sus campos")
+        cls.campos_columna = tuple(
+            (nombre, campo if isinstance(campo, Columna) else Columna(campo)) for nombre, campo in cls.campos
+        )
+        cls.columnas = tuple(dict.fromkeys(campo.columna for _, campo in cls.campos_columna))
+    
+    def __init__(self, filas):
+        self.filas = filas
+        # La zona horaria se resuelve una vez por listado y no en cada fecha
+        self.campo_fecha = serializers.DateTimeField(
+            default_timezone=serializers.DateTimeField().default_timezone()
+        )
+    
+    @classmethod
+    def consultar(cls, queryset):
+        return queryset.values(*cls.columnas)
+    
+    @property
+    def data(self):
+        return [self.representar(fila) for fila in self.filas]
+    
+    def fecha(self, valor):
+        return self.campo_fecha.to_representation(valor)
+    
+    def representar(self, fila):
+        return {nombre: campo.representar(fila, self) for nombre, campo in self.campos_columna}
+
+class MonitoreoLecturaSerializer(LecturaRapidaSerializer):
+    """Misma forma que MonitoreoSerializer"""
+    campos = (
+        ('idMonitoreo', 'idMonitoreo'),
+        ('idEstanque', 'idEstanque'),
+        ('estanque', ColumnaEtiqueta('Estanque', 'idEstanque')),
+        ('idSensor', 'idSensor'),
+        ('sensor', 'idSensor__nombreSensor'),
+        ('valor', 'valor'),
+        ('fecha', ColumnaFecha('fecha')),
+    )
+
+class AlertaLecturaSerializer(LecturaRapidaSerializer):
+    """Misma forma que AlertaSerializer"""
+    campos = (
+        ('idAlerta', 'idAlerta'),
+        ('idMonitoreo', 'idMonitoreo'),
+        ('monitoreo', ColumnaEtiqueta('Monitoreo', 'idMonitoreo')),
+        ('idEstanque', 'idEstanque'),
+        ('idFinca', 'idFinca'),
+        ('idEspecie', 'idEspecie'),
+        ('especie', 'idEspecie__nombre'),
+        ('tipoAlerta', 'tipoAlerta'),
+        ('severidad', 'severidad'),
+        ('mensaje', 'mensaje'),
+        ('valorMedido', 'valorMedido'),
+        ('valorLimite', 'valorLimite'),
+        ('conteo', 'conteo'),
+        ('ultimoValor', 'ultimoValor'),
+        ('fechaUltimaLectura', ColumnaFecha('fechaUltimaLectura')),
+        ('estado', 'estado'),
+        ('fechaCreacion', ColumnaFecha('fechaCreacion')),
+        ('fechaResolucion', ColumnaFecha('fechaResolucion')),
+    )
+
+class SiembraLecturaSerializer(LecturaRapidaSerializer):
+    """Misma forma que SiembraSerializer"""
+    campos = (
+        ('idSiembra', 'idSiembra'),
+        ('idEspecie', 'idEspecie'),
+        ('especie', 'idEspecie__nombre'),
+        ('idEstanque', 'idEstanque'),
+        ('estanque', ColumnaEtiqueta('Estanque', 'idEstanque')),
+        ('cantidad', 'cantidad'),
+        ('fecha', ColumnaFecha('fecha')),
+        ('inversion', 'inversion'),
+        ('pesoInicial', 'pesoInicial'),
+    )
+
+class InventarioLecturaSerializer(LecturaRapidaSerializer):
+    """Misma forma que InventarioSerializer"""
+    campos = (
+        ('idInventario', 'idInventario'),
+        ('idEspecie', 'idEspecie'),
+        ('especie', 'idEspecie__nombre'),
+        ('idFinca', 'idFinca'),
+        ('finca', 'idFinca__nombre'),
+        ('cantidad', 'cantidad'),
+        ('fechaActualizacion', ColumnaFecha('fechaActualizacion')),
+    )
+
 class RegistroUsuarioSerializer(serializers.Serializer):
     username = serializers.CharField(max_length=150)
     password = serializers.CharField(max_length=128, write_only=True)
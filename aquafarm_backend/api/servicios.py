@@ -0,0 +1,867 @@
+"""
+Reglas de negocio de las escrituras de siembras, comercializaciones,
+cancelaciones, desdobles, mortalidades y monitoreos (incluidas la edición y
+la eliminación de siembras, desdobles y monitoreos).
+
+Antes vivían en receivers de post_save, que se disparaban uno por uno en
+cada save(), también durante importaciones y loaddata, y no se podían
+agrupar. Ahora las vistas (y el admin) llaman a estas funciones después de
+guardar, dentro de la misma transacción. Cada regla tiene una entrada por
+lote, que recibe instancias ya guardadas (p. ej. con bulk_create) y aplica
+los efectos con un número de consultas que no depende del tamaño del lote,
+y una entrada por registro que es el lote de uno.
+
+También están aquí las operaciones sobre las que se construyen: sumas y
+restas condicionadas de inventario y de población de los estanques, el libro
+de movimientos de inventario y el último monitoreo y los resúmenes por
+intervalo. Los receivers que quedan en models.py solo invalidan contadores
+de versión y cachés; no escriben datos de negocio.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Case, Count, F, Max, Min, Q, Sum, Value, When
+from django.db.models.functions import Greatest, Least
+from django.utils import timezone
+
+from .alertas import resolver_alertas_lote, verificar_alertas_lote
+from .models import (
+    BitacoraDesdoble, DURACION_INTERVALO, Desdoble, EstadoEstanque, Estanque, HistorialSiembra, Inventario,
+    Monitoreo, MonitoreoResumen, MonitoreoUltimo, MovimientoInventario, RECURSOS_POR_MODELO, Siembra,
+    SnapshotInventario, existencias_al, inicio_intervalo, invalidar_tableros
+)
+from .versiones import incrementar_version
+
+
+def invalidar_inventario(finca_id):
+    """Cambia las versiones que dependen del inventario de una finca; los UPDATE no disparan signals"""
+    for recurso in RECURSOS_POR_MODELO['Inventario']:
+        incrementar_version(recurso)
+    invalidar_tableros(fincas=[finca_id])
+
+def registrar_movimiento(especie_id, finca_id, tipo, cantidad, fecha=None, siembra_id=None, descripcion=None):
+    """
+    Agrega un movimiento al libro de inventario. Si su fecha es anterior a
+    algún corte de snapshots, corrige los snapshots de la especie y finca
+    desde esa fecha para que las consultas a una fecha sigan cuadrando.
+    """
+    fecha = fecha or timezone.now()
+    MovimientoInventario.objects.create(
+        idEspecie_id=especie_id, idFinca_id=finca_id, tipo=tipo, cantidad=cantidad,
+        fecha=fecha, idSiembra_id=siembra_id, descripcion=descripcion
+    )
+    corregir_snapshots(especie_id, finca_id, cantidad, fecha)
+
+def registrar_movimientos(movimientos):
+    """Agrega al libro una lista de MovimientoInventario con un bulk_create"""
+    if not movimientos:
+        return
+    MovimientoInventario.objects.bulk_create(movimientos)
+    # Lo usual es que no haya cortes posteriores y baste una consulta
+    if SnapshotInventario.objects.filter(fecha__gte=min(movimiento.fecha for movimiento in movimientos)).exists():
+        for movimiento in movimientos:
+            corregir_snapshots(movimiento.idEspecie_id, movimiento.idFinca_id, movimiento.cantidad, movimiento.fecha)
+
+def corregir_snapshots(especie_id, finca_id, cantidad, fecha):
+    """Suma un movimiento ya registrado a los snapshots de la especie y finca con corte desde su fecha"""
+    cortes = set(SnapshotInventario.objects.filter(fecha__gte=fecha).values_list('fecha', flat=True).distinct())
+    if not cortes:
+        return
+    snapshots = SnapshotInventario.objects.filter(idEspecie_id=especie_id, idFinca_id=finca_id, fecha__gte=fecha)
+    existentes = set(snapshots.values_list('fecha', flat=True))
+    snapshots.update(cantidad=F('cantidad') + cantidad)
+    # Primer movimiento de la especie en la finca con fecha anterior a un corte: se crean sus snapshots
+    SnapshotInventario.objects.bulk_create([
+        SnapshotInventario(
+            idEspecie_id=especie_id, idFinca_id=finca_id, fecha=corte,
+            cantidad=existencias_al(corte, idEspecie=especie_id, idFinca=finca_id).get((especie_id, finca_id), 0)
+        )
+        for corte in sorted(cortes - existentes)
+    ])
+
+def sumar_inventario(especie_id, finca_id, cantidad, tipo='AJUSTE', **movimiento):
+    """
+    Suma `cantidad` peces al inventario de la especie en la finca con un único
+    UPDATE (cantidad = cantidad + n) que la base de datos aplica sobre el
+    valor vigente, de modo que siembras concurrentes no pierden cantidades.
+    Crea el registro si no existe y registra el movimiento en el libro en la
+    misma transacción.
+    """
+    with transaction.atomic():
+        incrementar_inventario(especie_id, finca_id, cantidad)
+        registrar_movimiento(especie_id, finca_id, tipo, cantidad, **movimiento)
+        invalidar_inventario(finca_id)
+
+def incrementar_inventario(especie_id, finca_id, cantidad):
+    """UPDATE cantidad = cantidad + n del inventario, creándolo si no existe; no toca el libro"""
+    inventario = Inventario.objects.filter(idEspecie_id=especie_id, idFinca_id=finca_id)
+    if inventario.update(cantidad=F('cantidad') + cantidad, fechaActualizacion=timezone.now()):
+        return
+    try:
+        with transaction.atomic():
+            Inventario.objects.create(idEspecie_id=especie_id, idFinca_id=finca_id, cantidad=cantidad)
+    except IntegrityError:
+        # Otro proceso creó el registro entre el UPDATE y el INSERT
+        inventario.update(cantidad=F('cantidad') + cantidad, fechaActualizacion=timezone.now())
+
+def restar_inventario(especie_id, finca_id, cantidad, tipo='AJUSTE', **movimiento):
+    """
+    Resta `cantidad` peces del inventario de la especie en la finca (ver
+    decrementar_inventario) y registra el movimiento en el libro en la misma
+    transacción. Lanza ValueError si no alcanzan e Inventario.DoesNotExist si
+    no hay registro.
+    """
+    with transaction.atomic():
+        decrementar_inventario(especie_id, finca_id, cantidad)
+        registrar_movimiento(especie_id, finca_id, tipo, -cantidad, **movimiento)
+        invalidar_inventario(finca_id)
+
+def decrementar_inventario(especie_id, finca_id, cantidad):
+    """
+    UPDATE cantidad = cantidad - n del inventario condicionado a que alcancen
+    (cantidad >= n), por lo que dos cosechas concurrentes nunca lo dejan en
+    negativo; no toca el libro. Lanza ValueError si no alcanzan e
+    Inventario.DoesNotExist si no hay registro.
+    """
+    inventario = Inventario.objects.filter(idEspecie_id=especie_id, idFinca_id=finca_id)
+    if inventario.filter(cantidad__gte=cantidad).update(
+        cantidad=F('cantidad') - cantidad, fechaActualizacion=timezone.now()
+    ):
+        return
+    disponible = inventario.values_list('cantidad', flat=True).first()
+    if disponible is None:
+        raise Inventario.DoesNotExist("No existe inventario de la especie en la finca")
+    raise ValueError(f"No hay suficientes peces en inventario. Disponible: {disponible}, Solicitado: {cantidad}")
+
+def trasladar_inventario(especie_id, finca_origen_id, finca_destino_id, cantidad, fecha=None):
+    """Mueve peces de una especie entre dos fincas como dos movimientos de traslado en una transacción"""
+    with transaction.atomic():
+        restar_inventario(
+            especie_id, finca_origen_id, cantidad, tipo='TRASLADO', fecha=fecha,
+            descripcion=f"Traslado a la finca {finca_destino_id}"
+        )
+        sumar_inventario(
+            especie_id, finca_destino_id, cantidad, tipo='TRASLADO', fecha=fecha,
+            descripcion=f"Traslado desde la finca {finca_origen_id}"
+        )
+
+def invalidar_poblacion(estanque_id):
+    """Cambia las versiones que dependen de la población de un estanque; los UPDATE no disparan signals"""
+    for recurso in RECURSOS_POR_MODELO['EstadoEstanque']:
+        incrementar_version(recurso)
+    invalidar_tableros(estanques=[estanque_id])
+
+def sumar_poblacion(estanque_id, especie_id, cantidad, biomasa=None):
+    """
+    Suma `cantidad` peces de la especie a la población del estanque con un
+    único UPDATE sobre los valores vigentes, creando el estado si no existe.
+    `biomasa` es la de los peces que entran (en kg); si no se conoce entran
+    con el peso promedio actual del estanque.
+    """
+    if biomasa is None:
+        biomasa_nueva = Case(
+            When(cantidad__gt=0, then=F('biomasa') * (F('cantidad') + cantidad) / F('cantidad')),
+            default=F('biomasa')
+        )
+    else:
+        biomasa_nueva = F('biomasa') + biomasa
+    estado = EstadoEstanque.objects.filter(idEstanque_id=estanque_id, idEspecie_id=especie_id)
+    with transaction.atomic():
+        if not estado.update(cantidad=F('cantidad') + cantidad, biomasa=biomasa_nueva, fechaActualizacion=timezone.now()):
+            try:
+                with transaction.atomic():
+                    EstadoEstanque.objects.create(
+                        idEstanque_id=estanque_id, idEspecie_id=especie_id, cantidad=cantidad, biomasa=biomasa or 0
+                    )
+            except IntegrityError:
+                # Otro proceso creó el estado entre el UPDATE y el INSERT
+                estado.update(cantidad=F('cantidad') + cantidad, biomasa=biomasa_nueva, fechaActualizacion=timezone.now())
+    invalidar_poblacion(estanque_id)
+
+def restar_poblacion(estanque_id, especie_id, cantidad, limitar=False, biomasa=None):
+    """
+    Resta `cantidad` peces de la especie de la población del estanque; la
+    biomasa baja en proporción, al peso promedio actual, o en `biomasa` (en
+    kg) si se conoce la de los peces que salen. Como en el inventario, el
+    UPDATE está condicionado a que alcancen y lanza ValueError si no; con
+    `limitar` (cosechas, cuyo número de peces se calcula desde los kilos)
+    deja la población en cero en lugar de fallar.
+    """
+    estado = EstadoEstanque.objects.filter(idEstanque_id=estanque_id, idEspecie_id=especie_id)
+    if limitar:
+        estado.filter(cantidad__gt=0).update(
+            cantidad=Greatest(F('cantidad') - cantidad, Value(0)),
+            biomasa=Case(
+                When(cantidad__gt=cantidad, then=F('biomasa') * (F('cantidad') - cantidad) / F('cantidad')),
+                default=Value(0.0)
+            ),
+            fechaActualizacion=timezone.now()
+        )
+    elif not estado.filter(cantidad__gte=cantidad).update(
+        cantidad=F('cantidad') - cantidad,
+        biomasa=F('biomasa') * (F('cantidad') - cantidad) / F('cantidad') if biomasa is None else Case(
+            When(cantidad=cantidad, then=Value(0.0)), default=Greatest(F('biomasa') - biomasa, Value(0.0))
+        ),
+        fechaActualizacion=timezone.now()
+    ):
+        disponible = estado.values_list('cantidad', flat=True).first() or 0
+        raise ValueError(f"No hay suficientes peces en el estanque. Disponible: {disponible}, Solicitado: {cantidad}")
+    invalidar_poblacion(estanque_id)
+
+def peces_por_siembra(estanques, especies=None, incluidas=()):
+    """
+    Peces de cada siembra pendiente (y de las siembras `incluidas`, p. ej.
+    las que se están cerrando) en los `estanques` indicados (ids o consulta),
+    de las `especies` indicadas o de todas: lo sembrado en el estanque más lo
+    que entró y menos lo que salió en desdobles con cantidad. Devuelve
+    {(siembra, estanque, especie): peces}, en dos consultas; puede haber
+    valores negativos si un desdoble sacó peces de otra siembra.
+    """
+    vigentes = Q(historialsiembra__estado='PENDIENTE') | Q(idSiembra__in=incluidas)
+    siembras = Siembra.objects.filter(vigentes, idEstanque__in=estanques)
+    desdobles = Desdoble.objects.filter(
+        Q(idSiembra__historialsiembra__estado='PENDIENTE') | Q(idSiembra__in=incluidas),
+        Q(idEstanqueOrigen__in=estanques) | Q(idEstanqueDestino__in=estanques), cantidad__gt=0
+    )
+    if especies is not None:
+        siembras = siembras.filter(idEspecie__in=especies)
+        desdobles = desdobles.filter(idSiembra__idEspecie__in=especies)
+
+    peces = {}
+    # distinct() porque la unión con el historial repite filas si una siembra tiene varios
+    for siembra_id, estanque_id, especie_id, cantidad in siembras.values_list(
+        'idSiembra', 'idEstanque', 'idEspecie', 'cantidad'
+    ).distinct():
+        peces[(siembra_id, estanque_id, especie_id)] = cantidad
+    for _, siembra_id, especie_id, origen_id, destino_id, cantidad in desdobles.values_list(
+        'idDesdoble', 'idSiembra', 'idSiembra__idEspecie', 'idEstanqueOrigen', 'idEstanqueDestino', 'cantidad'
+    ).distinct():
+        for estanque_id, signo in ((origen_id, -1), (destino_id, 1)):
+            clave = (siembra_id, estanque_id, especie_id)
+            peces[clave] = peces.get(clave, 0) + signo * cantidad
+    return peces
+
+def registrar_siembras(siembras, fincas=None):
+    """
+    Aplica a un lote de siembras recién creadas un HistorialSiembra PENDIENTE
+    por siembra (un solo bulk_create), la suma al inventario una vez por
+    (especie, finca), la suma a la población una vez por (estanque, especie)
+    y un movimiento SIEMBRA por siembra en el libro.
+    `fincas` mapea cada estanque del lote a su finca; si no se pasa se
+    consulta. Retorna el número de inventarios actualizados.
+    """
+    if not siembras:
+        return 0
+    if fincas is None:
+        fincas = dict(Estanque.objects.filter(
+            idEstanque__in={siembra.idEstanque_id for siembra in siembras}
+        ).values_list('idEstanque', 'idFinca'))
+
+    HistorialSiembra.objects.bulk_create([HistorialSiembra(idSiembra=siembra, estado='PENDIENTE') for siembra in siembras])
+
+    deltas = {}
+    for siembra in siembras:
+        clave = (siembra.idEspecie_id, fincas[siembra.idEstanque_id])
+        deltas[clave] = deltas.get(clave, 0) + siembra.cantidad
+    for (especie_id, finca_id), cantidad in sorted(deltas.items()):
+        incrementar_inventario(especie_id, finca_id, cantidad)
+    
+    # Por estanque y especie: peces con peso inicial conocido (y su biomasa) y peces sin él
+    poblaciones = {}
+    for siembra in siembras:
+        conocidos, biomasa, desconocidos = poblaciones.get((siembra.idEstanque_id, siembra.idEspecie_id), (0, 0.0, 0))
+        if siembra.pesoInicial is None:
+            desconocidos += siembra.cantidad
+        else:
+            conocidos += siembra.cantidad
+            biomasa += siembra.cantidad * siembra.pesoInicial
+        poblaciones[(siembra.idEstanque_id, siembra.idEspecie_id)] = (conocidos, biomasa, desconocidos)
+    for (estanque_id, especie_id), (conocidos, biomasa, desconocidos) in sorted(poblaciones.items()):
+        if conocidos:
+            sumar_poblacion(estanque_id, especie_id, conocidos, biomasa)
+        if desconocidos:
+            sumar_poblacion(estanque_id, especie_id, desconocidos)
+    registrar_movimientos([
+        MovimientoInventario(
+            idEspecie_id=siembra.idEspecie_id, idFinca_id=fincas[siembra.idEstanque_id], tipo='SIEMBRA',
+            cantidad=siembra.cantidad, fecha=siembra.fecha, idSiembra_id=siembra.pk
+        )
+        for siembra in siembras
+    ])
+
+    # bulk_create no dispara signals: se invalidan las versiones una vez por lote
+    for recurso in {'siembras_activas', *RECURSOS_POR_MODELO['Siembra'], *RECURSOS_POR_MODELO['HistorialSiembra'],
+                    *RECURSOS_POR_MODELO['Inventario']}:
+        incrementar_version(recurso)
+    invalidar_tableros(fincas={finca_id for _, finca_id in deltas})
+    return len(deltas)
+
+def registrar_siembra(siembra):
+    """Efectos de una siembra recién creada"""
+    return registrar_siembras([siembra])
+
+def siembra_pendiente(siembra):
+    """Lanza ValueError si el ciclo de la siembra ya terminó: su población e inventario ya se descontaron"""
+    if not HistorialSiembra.objects.filter(idSiembra=siembra, estado='PENDIENTE').exists():
+        raise ValueError("La siembra ya fue comercializada o cancelada y no se puede modificar")
+
+def actualizar_siembra(siembra, anterior):
+    """
+    Efectos de editar una siembra pendiente; `anterior` es la siembra antes
+    de guardar. En el mismo estanque y especie se aplica a la población y al
+    inventario solo la diferencia de peces (y de biomasa, si se conocen los
+    pesos); si cambian se retiran los peces anteriores y se suman los nuevos,
+    lo que no se permite si la siembra ya tiene desdobles. Lanza ValueError
+    si no quedan peces suficientes para descontar.
+    """
+    siembra_pendiente(siembra)
+    fincas = dict(Estanque.objects.filter(
+        idEstanque__in={siembra.idEstanque_id, anterior.idEstanque_id}
+    ).values_list('idEstanque', 'idFinca'))
+    movimiento = {'tipo': 'SIEMBRA', 'siembra_id': siembra.pk, 'descripcion': "Siembra editada"}
+
+    def biomasa(instancia):
+        return None if instancia.pesoInicial is None else instancia.cantidad * instancia.pesoInicial
+
+    if (siembra.idEstanque_id, siembra.idEspecie_id) == (anterior.idEstanque_id, anterior.idEspecie_id):
+        diferencia = siembra.cantidad - anterior.cantidad
+        delta = None
+        if biomasa(siembra) is not None and biomasa(anterior) is not None:
+            delta = biomasa(siembra) - biomasa(anterior)
+        if diferencia > 0 or (diferencia == 0 and delta):
+            sumar_poblacion(siembra.idEstanque_id, siembra.idEspecie_id, diferencia, delta)
+        elif diferencia < 0:
+            restar_poblacion(siembra.idEstanque_id, siembra.idEspecie_id, -diferencia, biomasa=None if delta is None else -delta)
+    else:
+        if Desdoble.objects.filter(idSiembra=siembra).exists():
+            raise ValueError("No se puede cambiar el estanque o la especie de una siembra con desdobles")
+        restar_poblacion(anterior.idEstanque_id, anterior.idEspecie_id, anterior.cantidad, limitar=True)
+        sumar_poblacion(siembra.idEstanque_id, siembra.idEspecie_id, siembra.cantidad, biomasa(siembra))
+
+    anterior_clave = (anterior.idEspecie_id, fincas[anterior.idEstanque_id])
+    clave = (siembra.idEspecie_id, fincas[siembra.idEstanque_id])
+    if clave == anterior_clave:
+        diferencia = siembra.cantidad - anterior.cantidad
+        if diferencia > 0:
+            sumar_inventario(*clave, diferencia, **movimiento)
+        elif diferencia < 0:
+            restar_inventario(*clave, -diferencia, **movimiento)
+    else:
+        restar_inventario(*anterior_clave, anterior.cantidad, **movimiento)
+        sumar_inventario(*clave, siembra.cantidad, **movimiento)
+
+def eliminar_siembra(siembra):
+    """
+    Deshace los efectos de una siembra pendiente que se va a eliminar (se
+    llama antes de delete(), que también borra sus desdobles): retira de cada
+    estanque los peces que quedan de ella (ver retirar_siembras) y los
+    descuenta del inventario de la finca del estanque. Lanza ValueError si la
+    siembra ya se cerró o el inventario no alcanza.
+    """
+    siembra_pendiente(siembra)
+    retirados = retirar_siembras({siembra.pk})
+    fincas = dict(Estanque.objects.filter(
+        idEstanque__in={estanque_id for estanque_id, _ in retirados}
+    ).values_list('idEstanque', 'idFinca'))
+    inventarios = {}
+    for (estanque_id, especie_id), cantidad in retirados.items():
+        clave = (especie_id, fincas[estanque_id])
+        inventarios[clave] = inventarios.get(clave, 0) + cantidad
+    for (especie_id, finca_id), cantidad in sorted(inventarios.items()):
+        restar_inventario(especie_id, finca_id, cantidad, tipo='SIEMBRA', descripcion=f"Siembra {siembra.pk} eliminada")
+
+def cerrar_siembras(historiales):
+    """
+    Saca de la población de los estanques los peces que quedan de las
+    siembras cuyos historiales acaban de pasar a COMERCIALIZADO o CANCELADO:
+    su ciclo terminó y sus peces ya no están en los estanques (ver
+    retirar_siembras).
+    """
+    retirar_siembras({
+        historial.idSiembra_id for historial in historiales if historial.estado in ('COMERCIALIZADO', 'CANCELADO')
+    })
+
+def retirar_siembras(siembras):
+    """
+    Saca de la población de los estanques los peces que quedan de las
+    `siembras` (ids) y retorna {(estanque, especie): peces retirados}.
+
+    Los peces de una siembra están en el estanque sembrado y en los que
+    recibieron desdobles suyos. En cada uno se resta la parte de la población
+    actual de la especie que corresponde a las siembras que se cierran, según
+    lo que entró y salió de cada siembra (siembra y desdobles con cantidad)
+    frente a las demás siembras pendientes de la especie en ese estanque; así
+    las mortalidades, que no llevan siembra, se reparten en proporción.
+    """
+    cerradas = set(siembras)
+    if not cerradas:
+        return {}
+    especies = {}
+    pares = set()
+    for siembra_id, estanque_id, especie_id in Siembra.objects.filter(idSiembra__in=cerradas).values_list(
+        'idSiembra', 'idEstanque', 'idEspecie'
+    ):
+        especies[siembra_id] = especie_id
+        pares.add((estanque_id, especie_id))
+    for siembra_id, origen_id, destino_id in Desdoble.objects.filter(idSiembra__in=cerradas, cantidad__gt=0).values_list(
+        'idSiembra', 'idEstanqueOrigen', 'idEstanqueDestino'
+    ):
+        pares |= {(origen_id, especies[siembra_id]), (destino_id, especies[siembra_id])}
+    peces = peces_por_siembra(
+        {estanque_id for estanque_id, _ in pares}, {especie_id for _, especie_id in pares}, incluidas=cerradas
+    )
+
+    totales = {}
+    salen = {}
+    for (siembra_id, estanque_id, especie_id), cantidad in peces.items():
+        if (estanque_id, especie_id) not in pares or cantidad <= 0:
+            continue
+        totales[(estanque_id, especie_id)] = totales.get((estanque_id, especie_id), 0) + cantidad
+        if siembra_id in cerradas:
+            salen[(estanque_id, especie_id)] = salen.get((estanque_id, especie_id), 0) + cantidad
+    condicion = Q()
+    for estanque_id, especie_id in salen:
+        condicion |= Q(idEstanque_id=estanque_id, idEspecie_id=especie_id)
+    poblaciones = {}
+    if salen:
+        poblaciones = {
+            (estanque_id, especie_id): cantidad
+            for estanque_id, especie_id, cantidad in EstadoEstanque.objects.filter(condicion).values_list(
+                'idEstanque', 'idEspecie', 'cantidad'
+            )
+        }
+    retirados = {}
+    for clave, cantidad in sorted(salen.items()):
+        parte = round(poblaciones.get(clave, 0) * cantidad / totales[clave])
+        if parte:
+            restar_poblacion(*clave, parte, limitar=True)
+            retirados[clave] = parte
+    return retirados
+
+def registrar_cancelaciones(historiales):
+    """Saca de la población los peces que quedan de las siembras de historiales que acaban de pasar a CANCELADO"""
+    cerrar_siembras([historial for historial in historiales if historial.estado == 'CANCELADO'])
+
+def registrar_cancelacion(historial):
+    """Efectos de un historial que acaba de pasar a CANCELADO"""
+    registrar_cancelaciones([historial])
+
+def registrar_comercializaciones(historiales, cerrar=True):
+    """
+    Cierra la siembra de cada historial que acaba de pasar a COMERCIALIZADO
+    (ver cerrar_siembras) y resta del inventario los peces comercializados,
+    con un movimiento COSECHA por historial en el libro. Como en las
+    siembras, el inventario se descuenta una vez por (especie, finca).
+    Quien llama decide cuándo hubo transición, para que editar un historial
+    ya comercializado no vuelva a descontar, y pasa cerrar=False si el
+    historial venía de CANCELADO, cuya siembra ya se cerró.
+    """
+    historiales = [historial for historial in historiales if historial.estado == 'COMERCIALIZADO']
+    if cerrar:
+        cerrar_siembras(historiales)
+    historiales = [historial for historial in historiales if historial.pecesComercializados]
+    if not historiales:
+        return
+    siembras = {
+        siembra_id: (especie_id, finca_id)
+        for siembra_id, especie_id, finca_id in Siembra.objects.filter(
+            idSiembra__in={historial.idSiembra_id for historial in historiales}
+        ).values_list('idSiembra', 'idEspecie', 'idEstanque__idFinca')
+    }
+
+    inventarios = {}
+    for historial in historiales:
+        clave = siembras[historial.idSiembra_id]
+        inventarios[clave] = inventarios.get(clave, 0) + historial.pecesComercializados
+    descontados = descontar_inventarios(inventarios)
+
+    registrar_movimientos([
+        MovimientoInventario(
+            idEspecie_id=siembras[historial.idSiembra_id][0], idFinca_id=siembras[historial.idSiembra_id][1],
+            tipo='COSECHA', cantidad=-historial.pecesComercializados,
+            fecha=historial.fechaComercializacion or timezone.now(), idSiembra_id=historial.idSiembra_id
+        )
+        for historial in historiales if siembras[historial.idSiembra_id] in descontados
+    ])
+    invalidar_inventarios({finca_id for _, finca_id in inventarios})
+
+def registrar_comercializacion(historial, cerrar=True):
+    """Efectos de un historial que acaba de pasar a COMERCIALIZADO"""
+    registrar_comercializaciones([historial], cerrar=cerrar)
+
+def registrar_desdobles(desdobles):
+    """
+    Mueve los peces de un lote de desdobles recién creados (ver
+    trasladar_desdobles) y crea su bitácora con un solo bulk_create. Los
+    desdobles sin cantidad solo dejan bitácora.
+    """
+    if not desdobles:
+        return
+    estanques = trasladar_desdobles(desdobles)
+    BitacoraDesdoble.objects.bulk_create([
+        BitacoraDesdoble(
+            idDesdoble=desdoble,
+            cambioRealizado=(
+                f"Desdoble automático desde estanque {estanques[desdoble.idEstanqueOrigen_id]} "
+                f"hacia estanque {estanques[desdoble.idEstanqueDestino_id]}"
+            )
+        )
+        for desdoble in desdobles
+    ])
+
+def trasladar_desdobles(desdobles):
+    """
+    Mueve la población de la especie sembrada de cada desdoble del estanque
+    origen al destino, con el peso promedio del origen. Si los estanques son
+    de fincas distintas también traslada el inventario, con un par de
+    movimientos TRASLADO por desdoble en el libro. Lanza ValueError si en el
+    origen no hay suficientes peces. Retorna los estanques de los desdobles
+    por id.
+
+    Los estados de los estanques se leen con una consulta y los desdobles se
+    aplican en orden sobre esa copia (un estanque puede recibir peces y luego
+    entregarlos en el mismo lote); a la base de datos llega el cambio neto,
+    una vez por (estanque, especie) y por (especie, finca).
+    """
+    estanques = Estanque.objects.select_related('idFinca').in_bulk(
+        {desdoble.idEstanqueOrigen_id for desdoble in desdobles} | {desdoble.idEstanqueDestino_id for desdoble in desdobles}
+    )
+    con_cantidad = [desdoble for desdoble in desdobles if desdoble.cantidad]
+    if con_cantidad:
+        especies = dict(Siembra.objects.filter(
+            idSiembra__in={desdoble.idSiembra_id for desdoble in con_cantidad}
+        ).values_list('idSiembra', 'idEspecie'))
+        pares = {
+            (estanque_id, especies[desdoble.idSiembra_id])
+            for desdoble in con_cantidad for estanque_id in (desdoble.idEstanqueOrigen_id, desdoble.idEstanqueDestino_id)
+        }
+        condicion = Q()
+        for estanque_id, especie_id in pares:
+            condicion |= Q(idEstanque_id=estanque_id, idEspecie_id=especie_id)
+        estados = {
+            (estanque_id, especie_id): (cantidad, biomasa)
+            for estanque_id, especie_id, cantidad, biomasa in EstadoEstanque.objects.filter(condicion).values_list(
+                'idEstanque', 'idEspecie', 'cantidad', 'biomasa'
+            )
+        }
+
+        poblaciones = {par: (0, 0.0) for par in pares}
+        inventarios = {}
+        movimientos = []
+        for desdoble in con_cantidad:
+            especie_id = especies[desdoble.idSiembra_id]
+            origen = estanques[desdoble.idEstanqueOrigen_id]
+            destino = estanques[desdoble.idEstanqueDestino_id]
+            cantidad, biomasa = estados.get((origen.pk, especie_id), (0, 0.0))
+            if cantidad < desdoble.cantidad:
+                raise ValueError(
+                    f"No hay suficientes peces en el estanque. Disponible: {cantidad}, Solicitado: {desdoble.cantidad}"
+                )
+            biomasa_movida = desdoble.cantidad * biomasa / cantidad
+            for estanque_id, signo in ((origen.pk, -1), (destino.pk, 1)):
+                cantidad, biomasa = estados.get((estanque_id, especie_id), (0, 0.0))
+                estados[(estanque_id, especie_id)] = (cantidad + signo * desdoble.cantidad, biomasa + signo * biomasa_movida)
+                cantidad, biomasa = poblaciones[(estanque_id, especie_id)]
+                poblaciones[(estanque_id, especie_id)] = (cantidad + signo * desdoble.cantidad, biomasa + signo * biomasa_movida)
+            if origen.idFinca_id != destino.idFinca_id:
+                for finca_id, signo, descripcion in (
+                    (origen.idFinca_id, -1, f"Traslado a la finca {destino.idFinca_id}"),
+                    (destino.idFinca_id, 1, f"Traslado desde la finca {origen.idFinca_id}"),
+                ):
+                    inventarios[(especie_id, finca_id)] = inventarios.get((especie_id, finca_id), 0) + signo * desdoble.cantidad
+                    movimientos.append(MovimientoInventario(
+                        idEspecie_id=especie_id, idFinca_id=finca_id, tipo='TRASLADO', cantidad=signo * desdoble.cantidad,
+                        fecha=desdoble.fecha, descripcion=descripcion
+                    ))
+
+        # Primero las salidas, que pueden fallar si otro proceso se llevó los peces mientras tanto
+        for (estanque_id, especie_id), (cantidad, biomasa) in sorted(poblaciones.items()):
+            if cantidad < 0:
+                restar_poblacion(estanque_id, especie_id, -cantidad, biomasa=-biomasa)
+        for (estanque_id, especie_id), (cantidad, biomasa) in sorted(poblaciones.items()):
+            if cantidad >= 0 and (cantidad or biomasa):
+                sumar_poblacion(estanque_id, especie_id, cantidad, biomasa)
+        if movimientos:
+            descontar_inventarios({clave: -cantidad for clave, cantidad in inventarios.items() if cantidad < 0})
+            for (especie_id, finca_id), cantidad in sorted(inventarios.items()):
+                if cantidad > 0:
+                    incrementar_inventario(especie_id, finca_id, cantidad)
+            registrar_movimientos(movimientos)
+            invalidar_inventarios({finca_id for _, finca_id in inventarios})
+    return estanques
+
+def registrar_desdoble(desdoble):
+    """Efectos de un desdoble recién creado"""
+    registrar_desdobles([desdoble])
+
+def invertir_desdoble(desdoble, cantidad=None):
+    """Desdoble sin guardar que devuelve `cantidad` peces (todos, por defecto) de `desdoble` del destino al origen"""
+    return Desdoble(
+        idSiembra_id=desdoble.idSiembra_id, idEstanqueOrigen_id=desdoble.idEstanqueDestino_id,
+        idEstanqueDestino_id=desdoble.idEstanqueOrigen_id, cantidad=cantidad or desdoble.cantidad, fecha=timezone.now()
+    )
+
+def actualizar_desdoble(desdoble, anterior):
+    """
+    Efectos de editar un desdoble; `anterior` es el desdoble antes de
+    guardar. Entre los mismos estanques y siembra solo se mueve la
+    diferencia de peces; si cambian, se devuelven los del desdoble anterior
+    y se mueven los del nuevo en un solo lote. Lanza ValueError si en algún
+    estanque no quedan peces suficientes.
+    """
+    campos = ('idSiembra_id', 'idEstanqueOrigen_id', 'idEstanqueDestino_id')
+    if all(getattr(desdoble, campo) == getattr(anterior, campo) for campo in campos):
+        diferencia = (desdoble.cantidad or 0) - (anterior.cantidad or 0)
+        if diferencia > 0:
+            trasladar_desdobles([Desdoble(
+                **{campo: getattr(desdoble, campo) for campo in campos}, cantidad=diferencia, fecha=timezone.now()
+            )])
+        elif diferencia < 0:
+            trasladar_desdobles([invertir_desdoble(desdoble, -diferencia)])
+    else:
+        trasladar_desdobles([invertir_desdoble(anterior), desdoble])
+    BitacoraDesdoble.objects.create(
+        idDesdoble=desdoble,
+        cambioRealizado=f"Desdoble editado: {anterior.cantidad or 0} a {desdoble.cantidad or 0} peces"
+    )
+
+def eliminar_desdoble(desdoble):
+    """Devuelve al origen los peces de un desdoble eliminado; lanza ValueError si ya no están en el destino"""
+    trasladar_desdobles([invertir_desdoble(desdoble)])
+
+def registrar_mortalidades(mortalidades):
+    """
+    Resta los peces muertos de la población del estanque (una vez por
+    estanque y especie) y del inventario de su finca (una vez por especie y
+    finca), con un movimiento MORTALIDAD por registro en el libro. Lanza
+    ValueError si el estanque no tiene tantos peces de la especie.
+    """
+    if not mortalidades:
+        return
+    fincas = dict(Estanque.objects.filter(
+        idEstanque__in={mortalidad.idEstanque_id for mortalidad in mortalidades}
+    ).values_list('idEstanque', 'idFinca'))
+    poblaciones = {}
+    inventarios = {}
+    for mortalidad in mortalidades:
+        clave = (mortalidad.idEstanque_id, mortalidad.idEspecie_id)
+        poblaciones[clave] = poblaciones.get(clave, 0) + mortalidad.cantidad
+        clave = (mortalidad.idEspecie_id, fincas[mortalidad.idEstanque_id])
+        inventarios[clave] = inventarios.get(clave, 0) + mortalidad.cantidad
+    for (estanque_id, especie_id), cantidad in sorted(poblaciones.items()):
+        restar_poblacion(estanque_id, especie_id, cantidad)
+    # Población registrada antes que el inventario: no hay nada que descontar
+    descontados = descontar_inventarios(inventarios, crear=False)
+    registrar_movimientos([
+        MovimientoInventario(
+            idEspecie_id=mortalidad.idEspecie_id, idFinca_id=fincas[mortalidad.idEstanque_id], tipo='MORTALIDAD',
+            cantidad=-mortalidad.cantidad, fecha=mortalidad.fecha, descripcion=mortalidad.causa
+        )
+        for mortalidad in mortalidades if (mortalidad.idEspecie_id, fincas[mortalidad.idEstanque_id]) in descontados
+    ])
+    invalidar_inventarios({finca_id for _, finca_id in inventarios})
+
+def registrar_mortalidad(mortalidad):
+    """Efectos de una mortalidad recién registrada"""
+    registrar_mortalidades([mortalidad])
+
+def descontar_inventarios(cantidades, crear=True):
+    """
+    Resta de cada inventario {(especie, finca): cantidad} su cantidad con un
+    UPDATE condicionado (ver decrementar_inventario); no toca el libro.
+    Si un inventario no existe se crea en cero (o, sin `crear`, se omite).
+    Retorna las claves descontadas, las que deben llevar movimiento.
+    """
+    descontados = set()
+    for (especie_id, finca_id), cantidad in sorted(cantidades.items()):
+        try:
+            decrementar_inventario(especie_id, finca_id, cantidad)
+            descontados.add((especie_id, finca_id))
+        except Inventario.DoesNotExist:
+            if crear:
+                Inventario.objects.get_or_create(idEspecie_id=especie_id, idFinca_id=finca_id, defaults={'cantidad': 0})
+    return descontados
+
+def invalidar_inventarios(fincas):
+    """Cambia una vez por lote las versiones que dependen del inventario de las fincas"""
+    if not fincas:
+        return
+    for recurso in RECURSOS_POR_MODELO['Inventario']:
+        incrementar_version(recurso)
+    invalidar_tableros(fincas=fincas)
+
+def actualizar_ultimos_monitoreos(monitoreos):
+    """
+    Actualiza la tabla MonitoreoUltimo con el monitoreo más reciente de cada
+    par (estanque, sensor) del lote. La actualización es condicional sobre la
+    fecha, de modo que una lectura atrasada nunca reemplaza a una más nueva.
+    """
+    recientes = {}
+    for monitoreo in monitoreos:
+        clave = (monitoreo.idEstanque_id, monitoreo.idSensor_id)
+        actual = recientes.get(clave)
+        if actual is None or (monitoreo.fecha, monitoreo.pk) > (actual.fecha, actual.pk):
+            recientes[clave] = monitoreo
+    
+    pendientes = []
+    for (estanque_id, sensor_id), monitoreo in recientes.items():
+        actualizados = MonitoreoUltimo.objects.filter(
+            idEstanque_id=estanque_id,
+            idSensor_id=sensor_id,
+            fecha__lte=monitoreo.fecha
+        ).update(idMonitoreo=monitoreo.pk, valor=monitoreo.valor, fecha=monitoreo.fecha)
+        if not actualizados:
+            pendientes.append(MonitoreoUltimo(
+                idEstanque_id=estanque_id,
+                idSensor_id=sensor_id,
+                idMonitoreo_id=monitoreo.pk,
+                valor=monitoreo.valor,
+                fecha=monitoreo.fecha
+            ))
+    
+    # Los pares sin registro se insertan; si ya existía uno más reciente se conserva
+    if pendientes:
+        MonitoreoUltimo.objects.bulk_create(pendientes, ignore_conflicts=True)
+    
+    invalidar_tableros(estanques=[estanque_id for estanque_id, _ in recientes])
+
+def recalcular_ultimos_monitoreos(pares):
+    """
+    Recalcula desde el historial el último monitoreo de cada par (estanque,
+    sensor), para después de editar o eliminar lecturas: si se eliminó la más
+    reciente se toma la anterior y si ya no quedan lecturas se borra el registro.
+    """
+    pares = set(pares)
+    for estanque_id, sensor_id in pares:
+        ultimo = Monitoreo.objects.filter(
+            idEstanque_id=estanque_id, idSensor_id=sensor_id
+        ).order_by('-fecha', '-idMonitoreo').first()
+        if ultimo is None:
+            MonitoreoUltimo.objects.filter(idEstanque_id=estanque_id, idSensor_id=sensor_id).delete()
+        else:
+            MonitoreoUltimo.objects.update_or_create(
+                idEstanque_id=estanque_id, idSensor_id=sensor_id,
+                defaults={'idMonitoreo_id': ultimo.pk, 'valor': ultimo.valor, 'fecha': ultimo.fecha}
+            )
+    invalidar_tableros(estanques=[estanque_id for estanque_id, _ in pares])
+
+def actualizar_resumenes_monitoreo(monitoreos):
+    """
+    Acumula un lote de monitoreos en los resúmenes por hora y por día.
+    El lote se agrupa primero en memoria y cada intervalo afectado se
+    actualiza con un UPDATE atómico, por lo que el costo depende del número
+    de intervalos del lote y no del número de lecturas.
+    """
+    acumulados = {}
+    for monitoreo in monitoreos:
+        for resolucion, _ in MonitoreoResumen.RESOLUCIONES:
+            clave = (monitoreo.idEstanque_id, monitoreo.idSensor_id, resolucion, inicio_intervalo(monitoreo.fecha, resolucion))
+            actual = acumulados.get(clave)
+            if actual is None:
+                acumulados[clave] = [monitoreo.valor, monitoreo.valor, monitoreo.valor, 1]
+            else:
+                actual[0] = min(actual[0], monitoreo.valor)
+                actual[1] = max(actual[1], monitoreo.valor)
+                actual[2] += monitoreo.valor
+                actual[3] += 1
+    
+    def acumular(clave, minimo, maximo, suma, conteo):
+        estanque_id, sensor_id, resolucion, inicio = clave
+        return MonitoreoResumen.objects.filter(
+            idEstanque_id=estanque_id,
+            idSensor_id=sensor_id,
+            resolucion=resolucion,
+            inicio=inicio
+        ).update(
+            minimo=Least(F('minimo'), Value(minimo)),
+            maximo=Greatest(F('maximo'), Value(maximo)),
+            suma=F('suma') + suma,
+            conteo=F('conteo') + conteo
+        )
+    
+    nuevos = {}
+    for clave, valores in acumulados.items():
+        if not acumular(clave, *valores):
+            nuevos[clave] = valores
+    
+    if not nuevos:
+        return
+    
+    resumenes = [
+        MonitoreoResumen(
+            idEstanque_id=estanque_id, idSensor_id=sensor_id, resolucion=resolucion, inicio=inicio,
+            minimo=minimo, maximo=maximo, suma=suma, conteo=conteo
+        )
+        for (estanque_id, sensor_id, resolucion, inicio), (minimo, maximo, suma, conteo) in nuevos.items()
+    ]
+    try:
+        with transaction.atomic():
+            MonitoreoResumen.objects.bulk_create(resumenes)
+    except IntegrityError:
+        # Otro proceso creó alguno de los intervalos: se insertan o acumulan uno a uno
+        for resumen, (clave, valores) in zip(resumenes, nuevos.items()):
+            try:
+                with transaction.atomic():
+                    resumen.save(force_insert=True)
+            except IntegrityError:
+                acumular(clave, *valores)
+
+def recalcular_resumenes_monitoreo(lecturas):
+    """
+    Recalcula desde el historial los resúmenes por hora y por día que
+    contienen cada lectura (estanque, sensor, fecha), para después de editar
+    o eliminar monitoreos: mínimo y máximo no se pueden descontar de forma
+    incremental. Un intervalo que se queda sin lecturas se borra.
+    """
+    intervalos = {
+        (estanque_id, sensor_id, resolucion, inicio_intervalo(fecha, resolucion))
+        for estanque_id, sensor_id, fecha in lecturas
+        for resolucion, _ in MonitoreoResumen.RESOLUCIONES
+    }
+    for estanque_id, sensor_id, resolucion, inicio in intervalos:
+        agregado = Monitoreo.objects.filter(
+            idEstanque_id=estanque_id, idSensor_id=sensor_id,
+            fecha__gte=inicio, fecha__lt=inicio + DURACION_INTERVALO[resolucion]
+        ).aggregate(minimo=Min('valor'), maximo=Max('valor'), suma=Sum('valor'), conteo=Count('idMonitoreo'))
+        resumen = MonitoreoResumen.objects.filter(
+            idEstanque_id=estanque_id, idSensor_id=sensor_id, resolucion=resolucion, inicio=inicio
+        )
+        if not agregado['conteo']:
+            resumen.delete()
+        elif not resumen.update(**agregado):
+            MonitoreoResumen.objects.create(
+                idEstanque_id=estanque_id, idSensor_id=sensor_id, resolucion=resolucion, inicio=inicio, **agregado
+            )
+
+def registrar_monitoreos(monitoreos):
+    """
+    Aplica a un lote de monitoreos recién creados el último monitoreo por
+    estanque y sensor, los resúmenes por hora y día, y la verificación y
+    resolución de alertas. Retorna (alertas nuevas, alertas actualizadas,
+    alertas resueltas).
+    """
+    actualizar_ultimos_monitoreos(monitoreos)
+    actualizar_resumenes_monitoreo(monitoreos)
+    alertas_nuevas, alertas_actualizadas = verificar_alertas_lote(monitoreos)
+    alertas_resueltas = resolver_alertas_lote(monitoreos)
+    return alertas_nuevas, alertas_actualizadas, alertas_resueltas
+
+def registrar_monitoreo(monitoreo):
+    """Efectos de un monitoreo recién creado"""
+    return registrar_monitoreos([monitoreo])
+
+def corregir_monitoreos(lecturas):
+    """
+    Recalcula el último monitoreo y los resúmenes que se derivan de
+    monitoreos editados o eliminados. `lecturas` son tuplas (estanque,
+    sensor, fecha) con la posición de cada monitoreo antes y después del cambio.
+    """
+    lecturas = list(lecturas)
+    recalcular_ultimos_monitoreos((estanque_id, sensor_id) for estanque_id, sensor_id, _ in lecturas)
+    recalcular_resumenes_monitoreo(lecturas)
+
+def actualizar_monitoreo(monitoreo, anterior):
+    """Efectos de editar un monitoreo; `anterior` es su (estanque, sensor, fecha) antes de guardar"""
+    corregir_monitoreos([anterior, (monitoreo.idEstanque_id, monitoreo.idSensor_id, monitoreo.fecha)])
+
+def eliminar_monitoreo(monitoreo):
+    """Efectos de eliminar un monitoreo (la instancia conserva sus campos tras delete())"""
+    corregir_monitoreos([(monitoreo.idEstanque_id, monitoreo.idSensor_id, monitoreo.fecha)])
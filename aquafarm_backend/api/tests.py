@@ -1,3 +1,1961 @@
-from django.test import TestCase
+import csv
+import io
+import json
+import math
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
 
-# Create your tests here.
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import OperationalError, connection, transaction
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date, parse_http_date
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from .models import (
+    TipoUsuario, MetodoAcuicola, Finca, Usuario, TipoEstanque,
+    Estanque, Especie, Inventario, Siembra, HistorialSiembra,
+    Desdoble, BitacoraDesdoble, HistorialEstanques, Sensor,
+    Monitoreo, MonitoreoUltimo, MonitoreoResumen, Alerta, InformacionNutricional, Vitamina, Mineral,
+    TasaCrecimiento, TasaReproduccion, ReglaUmbral, VersionRecurso
+)
+from .models import MovimientoInventario, SnapshotInventario, existencias_al, recurso_tablero
+from .parsers import ORJSONParser
+from .renderers import ORJSONRenderer
+from .serializers import AlertaSerializer, InventarioSerializer, MonitoreoSerializer, SiembraSerializer
+from .servicios import (
+    eliminar_monitoreo, registrar_comercializacion, registrar_desdoble, registrar_monitoreo, registrar_movimiento,
+    registrar_siembra, restar_inventario, sumar_inventario
+)
+from .versiones import obtener_version
+
+
+def poblar_datos(cantidad=3, prefijo='a'):
+    """
+    Crea `cantidad` registros de cada modelo expuesto por la API, con
+    relaciones distintas por registro para que un acceso a una llave foránea
+    sin select_related se note como una consulta adicional por fila.
+    """
+    ahora = timezone.now()
+    tipo_usuario = TipoUsuario.objects.create(nombre="Productor", descripcion="Productor")
+    metodo = MetodoAcuicola.objects.create(nombre="Intensivo", descripcion="Intensivo")
+    tipo_estanque = TipoEstanque.objects.create(nombre="Geomembrana", descripcion="Geomembrana")
+    sensor = Sensor.objects.create(nombreSensor="Oxigeno", unidadMedida="mg/L", descripcion="Oxígeno disuelto")
+
+    for i in (f"{prefijo}{n}" for n in range(cantidad)):
+        user = User.objects.create_user(username=f"usuario{i}", password="clave")
+        usuario = Usuario.objects.create(
+            user=user, nombre=f"Nombre{i}", apellido=f"Apellido{i}", correo=f"u{i}@aquafarm.co",
+            contrasena="x", idTipoUsuario=tipo_usuario
+        )
+        finca = Finca.objects.create(nombre=f"Finca {i}", idMetodoAcuicola=metodo, ubicacion="Huila", idUsuario=usuario)
+        origen = Estanque.objects.create(idFinca=finca, litros=1000, capacidad=500, idTipoEstanque=tipo_estanque)
+        destino = Estanque.objects.create(idFinca=finca, litros=1000, capacidad=500, idTipoEstanque=tipo_estanque)
+
+        informacion = InformacionNutricional.objects.create(proteinas=20, grasas=5, calorias=120)
+        Vitamina.objects.create(nombre="B12", cantidad="2 mcg", informacion_nutricional=informacion)
+        Mineral.objects.create(nombre="Fósforo", cantidad="200 mg", informacion_nutricional=informacion)
+        especie = Especie.objects.create(
+            nombre=f"Especie {i}", oxigeno_minimo=5, informacion_nutricional=informacion,
+            tasa_crecimiento=TasaCrecimiento.objects.create(descripcion="Rápida", crecimiento_mensual_promedio=50),
+            tasa_reproduccion=TasaReproduccion.objects.create(
+                frecuencia="Mensual", numero_huevos_por_puesta=500, periodo_incubacion=5
+            )
+        )
+        ReglaUmbral.objects.create(idEspecie=especie, tipoSensor='OXIGENO', minimo=4, severidad='ALTA')
+
+        # Crea historial de siembra e inventario
+        siembra = Siembra.objects.create(
+            idEspecie=especie, idEstanque=origen, cantidad=100, fecha=ahora - timedelta(days=30), inversion=1000
+        )
+        registrar_siembra(siembra)
+        # Crea la bitácora del desdoble
+        registrar_desdoble(
+            Desdoble.objects.create(idEstanqueOrigen=origen, idEstanqueDestino=destino, idSiembra=siembra, fecha=ahora)
+        )
+        HistorialEstanques.objects.create(idEstanque=origen, fecha=ahora, cambioRealizado="Limpieza")
+        # Lecturas fuera de rango: crean alertas
+        for minutos in range(2):
+            registrar_monitoreo(Monitoreo.objects.create(
+                idEstanque=origen, idSensor=sensor, valor=2, fecha=ahora - timedelta(minutes=minutos)
+            ))
+
+
+class APITestCase(TestCase):
+    """Base de las pruebas de la API: `cantidad` registros por modelo de poblar_datos y un cliente autenticado"""
+
+    cantidad = 1
+
+    @classmethod
+    def setUpTestData(cls):
+        poblar_datos(cantidad=cls.cantidad)
+        cls.user = User.objects.first()
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+
+class MonitoreosMasivosTestCase(APITestCase):
+    """La carga masiva crea todas las lecturas con sus efectos por lote o rechaza el lote completo"""
+
+    def setUp(self):
+        super().setUp()
+        self.estanque = Estanque.objects.order_by('idEstanque').first()
+        self.sensor = Sensor.objects.get()
+        self.base = timezone.now().replace(minute=0, second=0, microsecond=0) + timedelta(hours=2)
+
+    def lecturas(self, cantidad, valor=6, desde=0):
+        return [
+            {'idEstanque': self.estanque.pk, 'idSensor': self.sensor.pk, 'valor': valor,
+             'fecha': (self.base + timedelta(seconds=desde + i)).isoformat()}
+            for i in range(cantidad)
+        ]
+
+    def test_lote(self):
+        lote = self.lecturas(5) + self.lecturas(3, valor=1, desde=10)
+        respuesta = self.client.post('/api/monitoreos/bulk/', {'monitoreos': lote}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        # Las tres lecturas fuera de rango forman un solo incidente
+        self.assertEqual(respuesta.data, {
+            'monitoreos_creados': 8, 'alertas_creadas': 0, 'alertas_actualizadas': 1, 'alertas_resueltas': 0
+        })
+        alerta = Alerta.objects.get(idEstanque=self.estanque, estado='ACTIVA')
+        self.assertEqual((alerta.conteo, alerta.ultimoValor), (5, 1))
+        ultimo = MonitoreoUltimo.objects.get(idEstanque=self.estanque, idSensor=self.sensor)
+        self.assertEqual((ultimo.valor, ultimo.fecha), (1, self.base + timedelta(seconds=12)))
+
+    def test_consultas_no_crecen_con_el_lote(self):
+        # Un lote previo calienta las reglas compiladas y crea los resúmenes del intervalo
+        self.client.post('/api/monitoreos/bulk/', self.lecturas(2), format='json')
+        conteos = []
+        for cantidad in (10, 100):
+            with CaptureQueriesContext(connection) as consultas:
+                respuesta = self.client.post('/api/monitoreos/bulk/', self.lecturas(cantidad, desde=100), format='json')
+            self.assertEqual(respuesta.status_code, 201)
+            conteos.append(len(consultas))
+        self.assertEqual(conteos[0], conteos[1])
+
+    def test_lote_invalido(self):
+        antes = Monitoreo.objects.count()
+        casos = [
+            [],
+            self.lecturas(2) + [{'idEstanque': self.estanque.pk, 'idSensor': self.sensor.pk, 'valor': 'x', 'fecha': 'hoy'}],
+            self.lecturas(2) + [{'idEstanque': 9999, 'idSensor': self.sensor.pk, 'valor': 1, 'fecha': self.base.isoformat()}],
+        ]
+        for lote in casos:
+            with self.subTest(lote=len(lote)):
+                self.assertEqual(self.client.post('/api/monitoreos/bulk/', lote, format='json').status_code, 400)
+        self.assertEqual(Monitoreo.objects.count(), antes)
+
+
+class UltimoMonitoreoTestCase(APITestCase):
+    """La tabla de últimos monitoreos sigue la lectura más reciente aunque lleguen atrasadas, se editen o se eliminen"""
+
+    def setUp(self):
+        super().setUp()
+        self.estanque = Estanque.objects.order_by('idEstanque').first()
+        self.sensor = Sensor.objects.get()
+        self.ahora = timezone.now()
+
+    def ultimo(self):
+        respuesta = self.client.get(f'/api/monitoreos/by_estanque/?estanque_id={self.estanque.pk}&latest=true')
+        self.assertEqual(respuesta.status_code, 200)
+        return [(fila['idMonitoreo'], fila['valor']) for fila in respuesta.data]
+
+    def crear(self, valor, minutos):
+        respuesta = self.client.post('/api/monitoreos/', {
+            'idEstanque': self.estanque.pk, 'idSensor': self.sensor.pk, 'valor': valor,
+            'fecha': (self.ahora + timedelta(minutes=minutos)).isoformat()
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        return respuesta.data['idMonitoreo']
+
+    def test_lectura_atrasada(self):
+        reciente = self.crear(7, 10)
+        self.crear(6, 5)
+        self.assertEqual(self.ultimo(), [(reciente, 7)])
+
+    def test_edicion_y_eliminacion(self):
+        anterior = self.crear(6, 5)
+        reciente = self.crear(7, 10)
+
+        # Mover la lectura más reciente al pasado deja como última a la otra
+        respuesta = self.client.patch(f'/api/monitoreos/{reciente}/', {
+            'fecha': (self.ahora - timedelta(hours=1)).isoformat()
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.ultimo(), [(anterior, 6)])
+
+        self.assertEqual(self.client.patch(f'/api/monitoreos/{anterior}/', {'valor': 6.5}, format='json').status_code, 200)
+        self.assertEqual(self.ultimo(), [(anterior, 6.5)])
+
+        # Eliminar la última vuelve a la anterior en lugar de borrar el registro
+        self.assertEqual(self.client.delete(f'/api/monitoreos/{anterior}/').status_code, 204)
+        esperado = Monitoreo.objects.filter(idEstanque=self.estanque).order_by('-fecha').first()
+        self.assertEqual(self.ultimo(), [(esperado.pk, esperado.valor)])
+
+        for monitoreo in Monitoreo.objects.filter(idEstanque=self.estanque):
+            self.assertEqual(self.client.delete(f'/api/monitoreos/{monitoreo.pk}/').status_code, 204)
+        self.assertEqual(self.ultimo(), [])
+        self.assertFalse(MonitoreoUltimo.objects.filter(idEstanque=self.estanque).exists())
+
+
+class ResumenesMonitoreoTestCase(APITestCase):
+    """Los resúmenes por hora y día cuadran con las lecturas y la serie nunca pasa del número de puntos"""
+
+    INICIO = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+    def setUp(self):
+        super().setUp()
+        self.estanque = Estanque.objects.order_by('idEstanque').first()
+        self.sensor = Sensor.objects.get()
+        # Tres días con una lectura cada diez minutos
+        respuesta = self.client.post('/api/monitoreos/bulk/', [
+            {
+                'idEstanque': self.estanque.pk, 'idSensor': self.sensor.pk, 'valor': 5 + i % 6,
+                'fecha': (self.INICIO + timedelta(minutes=10 * i)).isoformat()
+            }
+            for i in range(432)
+        ], format='json')
+        self.assertEqual(respuesta.status_code, 201)
+
+    def resumen(self, resolucion, inicio):
+        return MonitoreoResumen.objects.values_list('minimo', 'maximo', 'suma', 'conteo').get(
+            idEstanque=self.estanque, idSensor=self.sensor, resolucion=resolucion, inicio=inicio
+        )
+
+    def serie(self, puntos, **parametros):
+        respuesta = self.client.get('/api/monitoreos/series/', {
+            'estanque_id': self.estanque.pk, 'sensor_id': self.sensor.pk, 'puntos': puntos,
+            'desde': self.INICIO.isoformat(), 'hasta': (self.INICIO + timedelta(days=3, minutes=-1)).isoformat(),
+            **parametros
+        })
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        self.assertLessEqual(len(respuesta.data['puntos']), puntos)
+        return respuesta.data
+
+    def test_resumenes(self):
+        self.assertEqual(self.resumen('HORA', self.INICIO), (5, 10, 45, 6))
+        self.assertEqual(self.resumen('DIA', self.INICIO), (5, 10, 1080, 144))
+        self.assertEqual(MonitoreoResumen.objects.filter(
+            idEstanque=self.estanque, resolucion='HORA', inicio__lt=self.INICIO + timedelta(days=3)
+        ).count(), 72)
+
+    def test_resolucion_de_la_serie(self):
+        for puntos, resolucion, cantidad in ((500, 'CRUDO', 432), (100, 'HORA', 72), (50, 'DIA', 3), (2, 'DIA', 2)):
+            with self.subTest(puntos=puntos):
+                serie = self.serie(puntos)
+                self.assertEqual(serie['resolucion'], resolucion)
+                self.assertEqual(len(serie['puntos']), cantidad)
+                self.assertEqual(sum(punto['conteo'] for punto in serie['puntos']), 432)
+                self.assertEqual(min(punto['minimo'] for punto in serie['puntos']), 5)
+                self.assertEqual(max(punto['maximo'] for punto in serie['puntos']), 10)
+
+        # Dos puntos para tres días: el primero agrupa dos días
+        primero = self.serie(2)['puntos'][0]
+        self.assertEqual((primero['conteo'], primero['promedio']), (288, 7.5))
+
+    def test_edicion_y_eliminacion(self):
+        monitoreo = Monitoreo.objects.get(idEstanque=self.estanque, fecha=self.INICIO + timedelta(minutes=40))
+        self.assertEqual(self.client.patch(f'/api/monitoreos/{monitoreo.pk}/', {'valor': 100}, format='json').status_code, 200)
+        self.assertEqual(self.resumen('HORA', self.INICIO), (5, 100, 136, 6))
+
+        # Mover la lectura a otro día la saca del intervalo anterior
+        respuesta = self.client.patch(f'/api/monitoreos/{monitoreo.pk}/', {
+            'fecha': (self.INICIO + timedelta(days=1, minutes=5)).isoformat()
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(self.resumen('HORA', self.INICIO), (5, 10, 36, 5))
+        self.assertEqual(self.resumen('DIA', self.INICIO + timedelta(days=1)), (5, 100, 1180, 145))
+
+        self.assertEqual(self.client.delete(f'/api/monitoreos/{monitoreo.pk}/').status_code, 204)
+        self.assertEqual(self.resumen('DIA', self.INICIO + timedelta(days=1)), (5, 10, 1080, 144))
+
+    def test_parametros_invalidos(self):
+        respuesta = self.client.get('/api/monitoreos/series/', {'estanque_id': 'uno', 'sensor_id': self.sensor.pk})
+        self.assertEqual(respuesta.status_code, 400)
+
+
+class RangoMonitoreoTestCase(APITestCase):
+    """El rango de monitoreos se recorre por cursor en orden descendente sin repetir ni omitir lecturas"""
+
+    INICIO = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.estanque = Estanque.objects.order_by('idEstanque').first()
+        cls.sensor = Sensor.objects.get()
+        # Lecturas repetidas en la misma fecha para que el desempate sea por ID
+        Monitoreo.objects.bulk_create([
+            Monitoreo(idEstanque=cls.estanque, idSensor=cls.sensor, valor=i, fecha=cls.INICIO + timedelta(minutes=i // 3))
+            for i in range(25)
+        ])
+
+    def recorrer(self, **parametros):
+        url = '/api/monitoreos/rango/'
+        parametros = {'estanque_id': self.estanque.pk, 'sensor_id': self.sensor.pk, 'limite': 10, **parametros}
+        ids = []
+        while url:
+            respuesta = self.client.get(url, parametros)
+            self.assertEqual(respuesta.status_code, 200)
+            self.assertLessEqual(len(respuesta.data['results']), 10)
+            ids.extend(fila['idMonitoreo'] for fila in respuesta.data['results'])
+            # El enlace siguiente ya trae todos los parámetros
+            url, parametros = respuesta.data['next'], {}
+        return ids
+
+    def test_recorrido_completo(self):
+        hasta = self.INICIO + timedelta(minutes=8)
+        ids = self.recorrer(desde=self.INICIO.isoformat(), hasta=hasta.isoformat())
+        esperados = Monitoreo.objects.filter(
+            idEstanque=self.estanque, fecha__gte=self.INICIO, fecha__lte=hasta
+        ).order_by('-fecha', '-idMonitoreo').values_list('pk', flat=True)
+        self.assertEqual(ids, list(esperados))
+        self.assertEqual(len(ids), 25)
+
+    def test_filtro_por_fechas(self):
+        ids = self.recorrer(desde=(self.INICIO + timedelta(minutes=2)).isoformat(), hasta=(self.INICIO + timedelta(minutes=3)).isoformat())
+        valores = Monitoreo.objects.filter(pk__in=ids).values_list('valor', flat=True)
+        self.assertEqual(sorted(valores), [6, 7, 8, 9, 10, 11])
+
+    def test_parametros_invalidos(self):
+        url = '/api/monitoreos/rango/'
+        casos = [
+            {'estanque_id': 'uno', 'sensor_id': self.sensor.pk},
+            {'estanque_id': self.estanque.pk, 'sensor_id': self.sensor.pk, 'desde': 'ayer'},
+            {'sensor_id': self.sensor.pk},
+        ]
+        for parametros in casos:
+            with self.subTest(parametros=parametros):
+                self.assertEqual(self.client.get(url, parametros).status_code, 400)
+        respuesta = self.client.get(url, {'estanque_id': self.estanque.pk, 'sensor_id': self.sensor.pk, 'cursor': 'x'})
+        self.assertEqual(respuesta.status_code, 404)
+
+
+class ExportarMonitoreosTestCase(APITestCase):
+    """La exportación en NDJSON y CSV entrega todas las lecturas filtradas en orden cronológico"""
+
+    INICIO = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.estanque = Estanque.objects.order_by('idEstanque').first()
+        cls.sensor = Sensor.objects.get()
+        cls.otro_sensor = Sensor.objects.create(nombreSensor="Temperatura, agua", unidadMedida="C", descripcion="Termómetro")
+        Monitoreo.objects.bulk_create([
+            Monitoreo(idEstanque=cls.estanque, idSensor=sensor, valor=i, fecha=cls.INICIO + timedelta(minutes=i))
+            for i in range(10) for sensor in (cls.sensor, cls.otro_sensor)
+        ])
+
+    def exportar(self, **parametros):
+        respuesta = self.client.get('/api/monitoreos/exportar/', {
+            'estanque_id': self.estanque.pk, 'hasta': (self.INICIO + timedelta(days=1)).isoformat(), **parametros
+        })
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta, b''.join(respuesta.streaming_content).decode()
+
+    def test_ndjson(self):
+        respuesta, contenido = self.exportar(sensor_id=self.sensor.pk, desde=(self.INICIO + timedelta(minutes=5)).isoformat())
+        self.assertTrue(respuesta['Content-Type'].startswith('application/x-ndjson'))
+        filas = [json.loads(linea) for linea in contenido.splitlines()]
+        self.assertEqual([fila['valor'] for fila in filas], [5, 6, 7, 8, 9])
+        self.assertEqual(list(filas[0]), ['idMonitoreo', 'idEstanque', 'estanque', 'idSensor', 'sensor', 'valor', 'fecha'])
+        self.assertEqual((filas[0]['sensor'], filas[0]['estanque']), ("Oxigeno", f"Estanque {self.estanque.pk}"))
+
+    def test_csv(self):
+        respuesta, contenido = self.exportar(formato='csv')
+        self.assertIn(f'monitoreos_estanque_{self.estanque.pk}.csv', respuesta['Content-Disposition'])
+        filas = list(csv.reader(io.StringIO(contenido)))
+        self.assertEqual(filas[0], ['idMonitoreo', 'idEstanque', 'estanque', 'idSensor', 'sensor', 'valor', 'fecha'])
+        self.assertEqual(len(filas), 21)
+        # Los nombres con comas quedan entre comillas y se leen completos
+        self.assertEqual({fila[4] for fila in filas[1:]}, {"Oxigeno", "Temperatura, agua"})
+        fechas = [fila[6] for fila in filas[1:]]
+        self.assertEqual(fechas, sorted(fechas))
+
+    def test_parametros_invalidos(self):
+        for parametros in ({'estanque_id': self.estanque.pk, 'formato': 'xml'}, {'estanque_id': 'uno'}, {}):
+            with self.subTest(parametros=parametros):
+                self.assertEqual(self.client.get('/api/monitoreos/exportar/', parametros).status_code, 400)
+
+
+class ReglasUmbralTestCase(TestCase):
+    """Las alertas se evalúan con reglas compiladas por especie y tipo de sensor que se recompilan al cambiar su versión"""
+
+    @classmethod
+    def setUpTestData(cls):
+        poblar_datos(cantidad=1)
+        cls.estanque = Estanque.objects.order_by('idEstanque').first()
+        cls.especie = Especie.objects.get()
+        cls.sensor = Sensor.objects.get()
+
+    def test_bandas_por_severidad(self):
+        # Las reglas explícitas reemplazan el oxígeno mínimo de la especie
+        ReglaUmbral.objects.create(idEspecie=self.especie, tipoSensor='OXIGENO', minimo=2, severidad='CRITICA')
+        ReglaUmbral.objects.create(idEspecie=self.especie, tipoSensor='OXIGENO', minimo=9, activa=False)
+        Alerta.objects.all().delete()
+        ahora = timezone.now()
+        for valor in (3, 4.5, 1):
+            registrar_monitoreo(Monitoreo.objects.create(idEstanque=self.estanque, idSensor=self.sensor, valor=valor, fecha=ahora))
+        # El incidente escala a la banda más severa incumplida
+        self.assertEqual(
+            list(Alerta.objects.values_list('conteo', 'severidad', 'valorLimite', 'tipoAlerta')),
+            [(2, 'CRITICA', 2, 'OXIGENO')]
+        )
+
+    def test_recompilacion_por_version(self):
+        from .umbrales import obtener_reglas
+        reglas = obtener_reglas()
+        # Con las reglas compiladas solo se consulta su versión
+        with self.assertNumQueries(1):
+            self.assertIs(obtener_reglas(), reglas)
+        self.assertEqual(reglas.evaluar(self.especie.pk, 'OXIGENO', 3)[0].severidad, 'ALTA')
+
+        ReglaUmbral.objects.create(idEspecie=self.especie, tipoSensor='PH', minimo=6, maximo=9, severidad='BAJA')
+        reglas = obtener_reglas()
+        self.assertEqual(reglas.evaluar(self.especie.pk, 'PH', 9.5)[1:], ('ALTO', 9))
+        self.assertIsNone(reglas.evaluar(self.especie.pk, 'PH', 7))
+
+    def test_version_revertida_con_la_transaccion(self):
+        from .versiones import incrementar_version, obtener_version
+        version = obtener_version('umbrales')
+        with transaction.atomic():
+            incrementar_version('umbrales')
+            self.assertEqual(obtener_version('umbrales'), version + 1)
+            transaction.set_rollback(True)
+        self.assertEqual(obtener_version('umbrales'), version)
+
+    def test_tipo_de_sensor(self):
+        casos = [
+            (("Temperatura", "°C"), 'TEMPERATURA'),
+            (("pH", "pH"), 'PH'),
+            (("Nivel", "cm"), 'OTRO'),
+        ]
+        for (nombre, unidad), tipo in casos:
+            with self.subTest(nombre=nombre):
+                sensor = Sensor.objects.create(nombreSensor=nombre, unidadMedida=unidad, descripcion=nombre)
+                self.assertEqual(sensor.tipo, tipo)
+        # El tipo elegido explícitamente no se reemplaza
+        sensor = Sensor.objects.create(nombreSensor="Nivel", unidadMedida="cm", descripcion="Nivel", tipo='TURBIDEZ')
+        self.assertEqual(sensor.tipo, 'TURBIDEZ')
+
+
+class EvaluacionLecturasTestCase(TestCase):
+    """La evaluación vectorizada de lecturas coincide con la evaluación lectura por lectura"""
+
+    @classmethod
+    def setUpTestData(cls):
+        poblar_datos(cantidad=2)
+        cls.especie_a, cls.especie_b = Especie.objects.order_by('idEspecie')
+        Especie.objects.filter(pk=cls.especie_a.pk).update(
+            temperatura_optima_min=24, temperatura_optima_max=30, ph_optimo_min=6.5, ph_optimo_max=8.5
+        )
+        ReglaUmbral.objects.create(idEspecie=cls.especie_a, tipoSensor='OXIGENO', minimo=2, severidad='CRITICA')
+        ReglaUmbral.objects.create(idEspecie=cls.especie_b, tipoSensor='PH', minimo=6, maximo=9, severidad='BAJA')
+        cls.sensores = [
+            Sensor.objects.get(),
+            Sensor.objects.create(nombreSensor="Temperatura", unidadMedida="°C", descripcion="Temperatura"),
+            Sensor.objects.create(nombreSensor="pH", unidadMedida="pH", descripcion="pH"),
+            Sensor.objects.create(nombreSensor="Nivel", unidadMedida="cm", descripcion="Nivel del agua"),
+        ]
+
+    def setUp(self):
+        from .alertas import _evaluar_lecturas_python, evaluar_lecturas, np
+        if np is None:
+            self.skipTest("NumPy no está instalado")
+        self.vectorizada = evaluar_lecturas
+        self.python = _evaluar_lecturas_python
+
+    def evaluar(self, funcion, lecturas, siembras):
+        from .umbrales import obtener_reglas
+        alertas = funcion(*zip(*lecturas), siembras, obtener_reglas())
+        return sorted(
+            (a.idMonitoreo_id, a.idEstanque_id, a.idEspecie_id, a.tipoAlerta, a.severidad, a.valorLimite,
+             a.mensaje, a.fechaUltimaLectura)
+            for a in alertas
+        )
+
+    def test_numpy_y_python_coinciden(self):
+        estanques = list(Estanque.objects.order_by('idEstanque').values_list('idEstanque', flat=True))
+        inicio = datetime(2025, 1, 1, tzinfo=dt_timezone.utc).timestamp()
+        # Dos especies en el primer estanque, una siembra histórica repetida y un estanque sin siembras
+        siembras = {
+            estanques[0]: [
+                (self.especie_a.pk, -math.inf, math.inf), (self.especie_b.pk, inicio + 3600, inicio + 7200)
+            ],
+            estanques[1]: [(self.especie_b.pk, -math.inf, math.inf)],
+            estanques[2]: [(self.especie_a.pk, inicio, inicio + 1800), (self.especie_a.pk, inicio + 900, math.inf)],
+        }
+        valores = [0, 1.5, 2, 3, 4.5, 5.5, 6, 7, 8.9, 9.5, 23, 31]
+        lecturas = []
+        for i in range(600):
+            lecturas.append((
+                i + 1, estanques[i % len(estanques)], self.sensores[(i // len(estanques)) % len(self.sensores)].pk,
+                valores[(i * 7) % len(valores)], inicio + 37 * i
+            ))
+
+        esperadas = self.evaluar(self.python, lecturas, siembras)
+        self.assertTrue(esperadas)
+        self.assertEqual({alerta[4] for alerta in esperadas}, {'CRITICA', 'ALTA', 'MEDIA', 'BAJA'})
+        self.assertEqual(self.evaluar(self.vectorizada, lecturas, siembras), esperadas)
+        # Una especie con dos siembras vigentes se evalúa una sola vez por lectura
+        self.assertEqual(len({(alerta[0], alerta[2], alerta[3]) for alerta in esperadas}), len(esperadas))
+
+    def test_bandas_por_severidad(self):
+        estanque = Estanque.objects.order_by('idEstanque').first()
+        sensor = self.sensores[0]
+        siembras = {estanque.pk: [(self.especie_a.pk, -math.inf, math.inf)]}
+        lecturas = [(1, estanque.pk, sensor.pk, 1.0, 0.0), (2, estanque.pk, sensor.pk, 3.0, 0.0),
+                    (3, estanque.pk, sensor.pk, 6.0, 0.0)]
+        for funcion in (self.vectorizada, self.python):
+            alertas = self.evaluar(funcion, lecturas, siembras)
+            self.assertEqual([(a[0], a[4], a[5]) for a in alertas], [(1, 'CRITICA', 2.0), (2, 'ALTA', 4.0)])
+
+    def test_sin_siembras_ni_tipo(self):
+        estanques = list(Estanque.objects.order_by('idEstanque').values_list('idEstanque', flat=True))
+        lecturas = [(1, estanques[-1], self.sensores[0].pk, 0.0, 0.0), (2, estanques[0], self.sensores[3].pk, 0.0, 0.0)]
+        siembras = {estanques[0]: [(self.especie_a.pk, -math.inf, math.inf)]}
+        for funcion in (self.vectorizada, self.python):
+            self.assertEqual(self.evaluar(funcion, lecturas, siembras), [])
+
+
+class IndiceSiembrasActivasTestCase(TestCase):
+    """El índice de siembras activas se reutiliza entre lotes y se reconstruye cuando cambian las siembras"""
+
+    @classmethod
+    def setUpTestData(cls):
+        poblar_datos(cantidad=1)
+
+    def setUp(self):
+        self.origen, self.destino = Estanque.objects.order_by('idEstanque')
+        self.especie = Especie.objects.get()
+
+    def test_reutiliza_y_reconstruye(self):
+        from .alertas import siembras_activas_por_estanque
+        estanques = {self.origen.pk, self.destino.pk}
+        self.assertEqual(list(siembras_activas_por_estanque(estanques)), [self.origen.pk])
+        # Con el índice construido solo se consulta su versión
+        with self.assertNumQueries(1):
+            siembras_activas_por_estanque(estanques)
+
+        # Un lote creado con bulk_create invalida el índice desde el servicio
+        from .servicios import registrar_siembras
+        siembras = Siembra.objects.bulk_create([
+            Siembra(idEspecie=self.especie, idEstanque=self.destino, cantidad=10, fecha=timezone.now(), inversion=1)
+        ])
+        registrar_siembras(siembras)
+        self.assertEqual(sorted(siembras_activas_por_estanque(estanques)), sorted(estanques))
+
+        # Comercializar la siembra del origen lo saca del índice
+        historial = HistorialSiembra.objects.get(idSiembra__idEstanque=self.origen)
+        historial.estado = 'COMERCIALIZADO'
+        historial.save()
+        self.assertEqual(list(siembras_activas_por_estanque(estanques)), [self.destino.pk])
+
+    def test_lecturas_sin_siembra_activa(self):
+        historial = HistorialSiembra.objects.get(idSiembra__idEstanque=self.origen)
+        historial.estado = 'CANCELADO'
+        historial.save()
+        nuevas, _, _ = registrar_monitoreo(Monitoreo.objects.create(
+            idEstanque=self.origen, idSensor=Sensor.objects.get(), valor=0, fecha=timezone.now()
+        ))
+        self.assertEqual(nuevas, [])
+
+
+class IncidentesAlertaTestCase(TestCase):
+    """Las lecturas fuera de rango se agrupan por incidente con histeresis medida en fechas de lectura"""
+
+    INICIO = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        poblar_datos(cantidad=1)
+        Alerta.objects.all().delete()
+
+    def setUp(self):
+        self.estanque = Estanque.objects.order_by('idEstanque').first()
+        self.sensor = Sensor.objects.get()
+
+    def leer(self, valor, minutos):
+        return registrar_monitoreo(Monitoreo.objects.create(
+            idEstanque=self.estanque, idSensor=self.sensor, valor=valor,
+            fecha=self.INICIO + timedelta(minutes=minutos)
+        ))
+
+    def leer_en_rango(self, desde, hasta):
+        for minutos in range(desde, hasta + 1, 10):
+            self.leer(6, minutos)
+
+    def test_histeresis_en_fechas_de_lectura(self):
+        self.leer(2, 0)
+        self.leer_en_rango(10, 60)
+        alerta = Alerta.objects.get()
+        self.assertEqual(alerta.estado, 'RESUELTA')
+        self.assertEqual(alerta.fechaLecturaResolucion, self.INICIO + timedelta(minutes=60))
+
+        # La resolución se procesó hoy, pero la lectura está a 20 minutos de la que resolvió la alerta
+        self.leer(2, 80)
+        alerta.refresh_from_db()
+        self.assertEqual((alerta.estado, alerta.conteo, alerta.fechaLecturaResolucion), ('ACTIVA', 2, None))
+
+        self.leer_en_rango(90, 140)
+        alerta.refresh_from_db()
+        self.assertEqual(alerta.estado, 'RESUELTA')
+        # Pasada la histéresis se abre un incidente nuevo
+        self.leer(2, 200)
+        self.assertEqual(Alerta.objects.count(), 2)
+        alerta.refresh_from_db()
+        self.assertEqual((alerta.estado, alerta.conteo), ('RESUELTA', 2))
+
+    def test_lectura_atrasada_no_reabre(self):
+        self.leer(2, 0)
+        self.leer_en_rango(10, 60)
+        self.leer(1, 30)
+        alerta = Alerta.objects.get()
+        self.assertEqual((alerta.estado, alerta.conteo), ('RESUELTA', 2))
+        self.assertEqual(alerta.fechaUltimaLectura, self.INICIO + timedelta(minutes=30))
+
+    def test_eliminar_lectura_inicial(self):
+        self.leer(2, 0)
+        self.leer(1, 10)
+        primera = Monitoreo.objects.get(idEstanque=self.estanque, fecha=self.INICIO)
+        self.assertEqual(Alerta.objects.get().idMonitoreo, primera)
+        primera.delete()
+        eliminar_monitoreo(primera)
+        # El incidente no desaparece con la lectura que lo abrió y sigue acumulando
+        alerta = Alerta.objects.get()
+        self.assertEqual((alerta.idMonitoreo_id, alerta.idEstanque_id, alerta.conteo), (None, self.estanque.pk, 2))
+        self.leer(1, 20)
+        alerta.refresh_from_db()
+        self.assertEqual((alerta.estado, alerta.conteo), ('ACTIVA', 3))
+
+    def test_ignorada_no_acumula(self):
+        self.leer(2, 0)
+        Alerta.objects.get().marcar_como_ignorada()
+        self.leer(2, 5)
+        ignorada, nueva = Alerta.objects.order_by('idAlerta')
+        self.assertEqual((ignorada.estado, ignorada.conteo), ('IGNORADA', 1))
+        self.assertEqual((nueva.estado, nueva.conteo), ('ACTIVA', 1))
+
+    def test_resolucion_concurrente(self):
+        from .alertas import agrupar_incidentes, clave_incidente, guardar_incidentes, obtener_histeresis
+        self.leer(2, 0)
+        # El ingreso leyó la alerta activa antes de que se resolviera a mano
+        leida = Alerta.objects.get()
+        Alerta.objects.get().marcar_como_resuelta()
+        candidata = Alerta(
+            idEstanque_id=leida.idEstanque_id, idEspecie_id=leida.idEspecie_id, tipoAlerta=leida.tipoAlerta,
+            severidad=leida.severidad, conteo=1, ultimoValor=1, fechaUltimaLectura=self.INICIO + timedelta(minutes=5)
+        )
+        nuevas, actualizadas, reabiertas = agrupar_incidentes(
+            [candidata], {clave_incidente(leida): leida}, obtener_histeresis()
+        )
+        guardar_incidentes(nuevas, actualizadas, reabiertas)
+        alerta = Alerta.objects.get()
+        self.assertEqual((alerta.estado, alerta.conteo, alerta.ultimoValor), ('RESUELTA', 2, 1))
+
+        # Resolver a mano desde una instancia vieja no pisa las lecturas acumuladas
+        leida.marcar_como_ignorada()
+        alerta.refresh_from_db()
+        self.assertEqual((alerta.estado, alerta.conteo), ('IGNORADA', 2))
+
+
+class ResolucionAlertasTestCase(TestCase):
+    """Una alerta se resuelve sola solo si las lecturas dentro de rango cubren la ventana de resolución"""
+
+    INICIO = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+
+    @classmethod
+    def setUpTestData(cls):
+        poblar_datos(cantidad=1)
+        Alerta.objects.all().delete()
+
+    def setUp(self):
+        self.estanque = Estanque.objects.order_by('idEstanque').first()
+        self.sensor = Sensor.objects.get()
+        self.leer(2, 0)
+        self.alerta = Alerta.objects.get()
+
+    def leer(self, valor, *minutos):
+        for minuto in minutos:
+            registrar_monitoreo(Monitoreo.objects.create(
+                idEstanque=self.estanque, idSensor=self.sensor, valor=valor,
+                fecha=self.INICIO + timedelta(minutes=minuto)
+            ))
+
+    def estado(self):
+        self.alerta.refresh_from_db()
+        return self.alerta.estado
+
+    def test_ventana_cubierta(self):
+        self.leer(6, 20, 40)
+        self.assertEqual(self.estado(), 'ACTIVA')
+        self.leer(6, 60)
+        self.assertEqual(self.estado(), 'RESUELTA')
+        self.assertEqual(self.alerta.fechaLecturaResolucion, self.INICIO + timedelta(minutes=60))
+
+    def test_una_lectura_no_basta(self):
+        # Una sola lectura dentro de rango una hora después no cubre la ventana
+        self.leer(6, 60)
+        self.assertEqual(self.estado(), 'ACTIVA')
+        self.leer(6, 30, 45)
+        self.assertEqual(self.estado(), 'ACTIVA')
+        # Las lecturas atrasadas completan la ventana; el comando la resuelve con la lectura que la cierra
+        self.leer(6, 15)
+        call_command('resolver_alertas', stdout=io.StringIO())
+        self.assertEqual(self.estado(), 'RESUELTA')
+        self.assertEqual(self.alerta.fechaLecturaResolucion, self.INICIO + timedelta(minutes=60))
+
+    def test_hueco_en_la_ventana(self):
+        self.leer(6, 10, 20, 70, 80)
+        self.assertEqual(self.estado(), 'ACTIVA')
+
+        salida = io.StringIO()
+        call_command('resolver_alertas', stdout=salida)
+        self.assertIn("1 alertas activas revisadas, 0 resueltas", salida.getvalue())
+        with self.settings(ALERTAS_RESOLUCION_HUECO_MAXIMO_MINUTOS=60):
+            call_command('resolver_alertas', '--dry-run', stdout=salida)
+            self.assertIn("1 se resolverían", salida.getvalue())
+            self.assertEqual(self.estado(), 'ACTIVA')
+            call_command('resolver_alertas', stdout=salida)
+        self.assertEqual(self.estado(), 'RESUELTA')
+        self.assertEqual(self.alerta.fechaLecturaResolucion, self.INICIO + timedelta(minutes=70))
+
+    def test_lectura_fuera_de_rango_concurrente(self):
+        from .alertas import aplicar_resoluciones
+        self.leer(6, 20, 40)
+        vencida = (self.alerta.pk, self.estanque.pk, self.alerta.tipoAlerta, self.alerta.fechaUltimaLectura)
+        # Otra lectura fuera de rango llega entre la revisión y el UPDATE
+        self.leer(2, 50)
+        self.assertEqual(aplicar_resoluciones([vencida], {self.alerta.pk: self.INICIO + timedelta(minutes=60)}), 0)
+        self.assertEqual(self.estado(), 'ACTIVA')
+
+
+class ReevaluarAlertasTestCase(TestCase):
+    """reevaluar_alertas crea las alertas faltantes por incidente, con su estanque y finca, sin duplicar"""
+
+    @classmethod
+    def setUpTestData(cls):
+        poblar_datos(cantidad=1)
+        Alerta.objects.all().delete()
+
+    def setUp(self):
+        self.estanque = Estanque.objects.order_by('idEstanque').first()
+        self.sensor = Sensor.objects.get()
+        self.inicio = timezone.now() - timedelta(days=1)
+        # Lecturas cargadas sin servicios, como en una importación: dos incidentes separados por la histéresis
+        Monitoreo.objects.bulk_create([
+            Monitoreo(idEstanque=self.estanque, idSensor=self.sensor, valor=valor,
+                      fecha=self.inicio + timedelta(minutes=minutos))
+            for valor, minutos in [(2, 0), (1, 5), (6, 10), (2, 15), (6, 60), (3, 120), (2, 125)]
+        ])
+
+    def reevaluar(self, *argumentos):
+        salida = io.StringIO()
+        call_command(
+            'reevaluar_alertas', '--desde', self.inicio.isoformat(),
+            '--hasta', (self.inicio + timedelta(hours=3)).isoformat(), *argumentos, stdout=salida
+        )
+        return salida.getvalue()
+
+    def test_reevaluar(self):
+        self.assertIn("7 monitoreos evaluados, 2 alertas se crearían", self.reevaluar('--dry-run'))
+        self.assertFalse(Alerta.objects.exists())
+
+        self.assertIn("2 alertas creadas, 3 lecturas acumuladas", self.reevaluar('--chunk-size', '3'))
+        primera, segunda = Alerta.objects.order_by('idAlerta')
+        self.assertEqual((primera.conteo, primera.ultimoValor), (3, 2))
+        self.assertEqual((segunda.conteo, segunda.ultimoValor), (2, 2))
+        for alerta in (primera, segunda):
+            self.assertEqual((alerta.idEstanque_id, alerta.idFinca_id), (self.estanque.pk, self.estanque.idFinca_id))
+
+        # Las lecturas ya cubiertas por alertas existentes no se vuelven a contar
+        self.assertIn("0 alertas creadas, 0 lecturas acumuladas", self.reevaluar())
+        self.assertEqual(sorted(Alerta.objects.values_list('conteo', flat=True)), [2, 3])
+
+    def test_estanque_y_finca_desde_el_monitoreo(self):
+        alerta = Alerta.objects.create(
+            idMonitoreo=Monitoreo.objects.first(), tipoAlerta='OTRO', mensaje="Manual", valorMedido=1, valorLimite=2
+        )
+        self.assertEqual((alerta.idEstanque_id, alerta.idFinca_id), (self.estanque.pk, self.estanque.idFinca_id))
+
+
+class PresupuestoConsultasTestCase(APITestCase):
+    """
+    Verifica que cada endpoint de lista y de detalle ejecute un número fijo
+    de consultas, sin importar cuántos registros devuelva. Si un serializador
+    empieza a seguir una relación que el queryset del viewset no declara en
+    select_related/prefetch_related, el conteo sube y la prueba falla.
+    """
+
+    cantidad = 3
+
+    # ruta: (consultas de la lista, consultas del detalle, modelo); los recursos
+    # con GET condicional suman la lectura de su contador de versión
+    PRESUPUESTOS = {
+        'usuarios': (1, 1, Usuario),
+        'tipos-usuario': (1, 1, TipoUsuario),
+        'metodos-acuicolas': (1, 1, MetodoAcuicola),
+        'fincas': (2, 2, Finca),
+        'tipos-estanque': (1, 1, TipoEstanque),
+        'estanques': (3, 3, Estanque),
+        'especies': (4, 4, Especie),
+        'inventarios': (2, 2, Inventario),
+        'movimientos-inventario': (1, 1, MovimientoInventario),
+        'siembras': (1, 1, Siembra),
+        'historiales-siembra': (2, 2, HistorialSiembra),
+        'desdobles': (1, 1, Desdoble),
+        'bitacoras-desdoble': (1, 1, BitacoraDesdoble),
+        'historiales-estanque': (1, 1, HistorialEstanques),
+        'sensores': (1, 1, Sensor),
+        'reglas-umbral': (1, 1, ReglaUmbral),
+        'monitoreos': (1, 1, Monitoreo),
+        'alertas': (1, 1, Alerta),
+        'informacion-nutricional': (3, 3, InformacionNutricional),
+        'vitaminas': (1, 1, Vitamina),
+        'minerales': (1, 1, Mineral),
+        'tasas-crecimiento': (1, 1, TasaCrecimiento),
+        'tasas-reproduccion': (1, 1, TasaReproduccion),
+    }
+
+    def setUp(self):
+        super().setUp()
+        # Las respuestas en caché no cuentan consultas
+        cache.clear()
+
+    def assertPresupuestoConsultas(self, url, presupuesto):
+        with self.assertNumQueries(presupuesto):
+            respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        return respuesta
+
+    def test_listas(self):
+        for ruta, (presupuesto, _, modelo) in self.PRESUPUESTOS.items():
+            with self.subTest(ruta=ruta):
+                respuesta = self.assertPresupuestoConsultas(f'/api/{ruta}/', presupuesto)
+                self.assertEqual(len(respuesta.data['results']), modelo.objects.count())
+
+    def test_detalles(self):
+        for ruta, (_, presupuesto, modelo) in self.PRESUPUESTOS.items():
+            with self.subTest(ruta=ruta):
+                self.assertPresupuestoConsultas(f'/api/{ruta}/{modelo.objects.first().pk}/', presupuesto)
+
+    def test_acciones_por_llave(self):
+        finca = Finca.objects.first()
+        estanque = Estanque.objects.filter(siembra__isnull=False).first()
+        acciones = [
+            (f'/api/estanques/by_finca/?finca_id={finca.pk}', 3),
+            (f'/api/inventarios/by_finca/?finca_id={finca.pk}', 2),
+            (f'/api/siembras/by_finca/?finca_id={finca.pk}', 1),
+            (f'/api/desdobles/by_finca/?finca_id={finca.pk}', 1),
+            (f'/api/monitoreos/by_estanque/?estanque_id={estanque.pk}', 1),
+            (f'/api/monitoreos/by_estanque/?estanque_id={estanque.pk}&latest=true', 1),
+            (f'/api/alertas/by_estanque/?estanque_id={estanque.pk}', 1),
+            (f'/api/alertas/by_finca/?finca_id={finca.pk}', 1),
+            ('/api/alertas/by_estado/?estado=ACTIVA', 1),
+            ('/api/historiales-siembra/by_estado/?estado=PENDIENTE', 2),
+            (f'/api/fincas/by_usuario/?usuario_id={finca.idUsuario_id}', 2),
+        ]
+        for url, presupuesto in acciones:
+            with self.subTest(url=url):
+                self.assertPresupuestoConsultas(url, presupuesto)
+
+    def test_presupuesto_no_crece_con_los_datos(self):
+        poblar_datos(cantidad=10, prefijo='b')
+        for ruta, (presupuesto, _, _) in self.PRESUPUESTOS.items():
+            with self.subTest(ruta=ruta):
+                self.assertPresupuestoConsultas(f'/api/{ruta}/', presupuesto)
+
+
+class CursorPaginacionTestCase(APITestCase):
+    """Los listados y las acciones by_* se recorren por cursor sin repetir ni omitir filas"""
+
+    cantidad = 5
+
+    def recorrer(self, url, campo):
+        ids = []
+        paginas = 0
+        while url:
+            respuesta = self.client.get(url)
+            self.assertEqual(respuesta.status_code, 200, url)
+            self.assertLessEqual(len(respuesta.data['results']), 2)
+            ids.extend(fila[campo] for fila in respuesta.data['results'])
+            url = respuesta.data['next']
+            paginas += 1
+        return ids, paginas
+
+    def test_lista_paginada(self):
+        ids, paginas = self.recorrer('/api/monitoreos/?limite=2', 'idMonitoreo')
+        self.assertEqual(ids, list(Monitoreo.objects.order_by('idMonitoreo').values_list('pk', flat=True)))
+        self.assertEqual(paginas, 5)
+
+    def test_accion_paginada(self):
+        finca = Finca.objects.first()
+        for monitoreo in Monitoreo.objects.filter(idEstanque__idFinca=finca):
+            Alerta.objects.create(
+                idMonitoreo=monitoreo, tipoAlerta='OTRO', mensaje="Prueba", valorMedido=1, valorLimite=2
+            )
+        ids, _ = self.recorrer(f'/api/alertas/by_finca/?finca_id={finca.pk}&limite=2', 'idAlerta')
+        esperados = Alerta.objects.filter(idFinca=finca).order_by('-fechaCreacion', '-idAlerta').values_list('pk', flat=True)
+        self.assertEqual(ids, list(esperados))
+
+    def test_desempate_por_llave(self):
+        # Filas con la misma fecha se recorren en el orden de su llave, sin repetir ni omitir
+        estanque = Estanque.objects.first()
+        fecha = timezone.now()
+        Monitoreo.objects.filter(idEstanque=estanque).update(fecha=fecha)
+        for monitoreo in Monitoreo.objects.filter(idEstanque=estanque):
+            Alerta.objects.create(
+                idMonitoreo=monitoreo, tipoAlerta='OTRO', mensaje="Prueba", valorMedido=1, valorLimite=2
+            )
+        Alerta.objects.update(fechaCreacion=fecha)
+
+        ids, _ = self.recorrer('/api/alertas/by_estado/?estado=ACTIVA&limite=2', 'idAlerta')
+        esperados = Alerta.objects.filter(estado='ACTIVA').order_by('-idAlerta').values_list('pk', flat=True)
+        self.assertEqual(ids, list(esperados))
+        ids, _ = self.recorrer(f'/api/monitoreos/by_estanque/?estanque_id={estanque.pk}&limite=2', 'idMonitoreo')
+        esperados = Monitoreo.objects.filter(idEstanque=estanque).order_by('-idMonitoreo').values_list('pk', flat=True)
+        self.assertEqual(ids, list(esperados))
+
+    def test_cursor_invalido(self):
+        respuesta = self.client.get('/api/monitoreos/?cursor=no-es-un-cursor')
+        self.assertEqual(respuesta.status_code, 404)
+
+
+class LecturaRapidaTestCase(APITestCase):
+    """Los listados servidos desde values() conservan la forma JSON del ModelSerializer"""
+
+    cantidad = 3
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # Alerta sin especie para cubrir las relaciones nulas
+        Alerta.objects.create(
+            idMonitoreo=Monitoreo.objects.first(), tipoAlerta='OTRO', mensaje="Manual",
+            valorMedido=1, valorLimite=2, estado='RESUELTA', fechaResolucion=timezone.now()
+        )
+
+    def assertMismaForma(self, url, serializer_class, queryset):
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200, url)
+        esperado = json.loads(JSONRenderer().render(serializer_class(queryset, many=True).data))
+        self.assertEqual(json.loads(respuesta.content)['results'], esperado)
+
+    def test_listas(self):
+        casos = [
+            ('/api/monitoreos/', MonitoreoSerializer, Monitoreo.objects.order_by('idMonitoreo')),
+            ('/api/alertas/', AlertaSerializer, Alerta.objects.order_by('-fechaCreacion')),
+            ('/api/siembras/', SiembraSerializer, Siembra.objects.order_by('idSiembra')),
+            ('/api/inventarios/', InventarioSerializer, Inventario.objects.order_by('idInventario')),
+        ]
+        for url, serializer_class, queryset in casos:
+            with self.subTest(url=url):
+                self.assertMismaForma(url, serializer_class, queryset)
+
+    def test_acciones(self):
+        estanque = Estanque.objects.filter(siembra__isnull=False).first()
+        finca = estanque.idFinca
+        casos = [
+            (f'/api/monitoreos/by_estanque/?estanque_id={estanque.pk}', MonitoreoSerializer,
+             Monitoreo.objects.filter(idEstanque=estanque).order_by('-fecha')),
+            (f'/api/alertas/by_finca/?finca_id={finca.pk}', AlertaSerializer,
+             Alerta.objects.filter(idFinca=finca).order_by('-fechaCreacion')),
+            (f'/api/siembras/by_finca/?finca_id={finca.pk}', SiembraSerializer,
+             Siembra.objects.filter(idEstanque__idFinca=finca).order_by('idSiembra')),
+            (f'/api/inventarios/by_finca/?finca_id={finca.pk}', InventarioSerializer,
+             Inventario.objects.filter(idFinca=finca).order_by('idInventario')),
+        ]
+        for url, serializer_class, queryset in casos:
+            with self.subTest(url=url):
+                self.assertMismaForma(url, serializer_class, queryset)
+
+    def test_campos_declarados(self):
+        from .serializers import ColumnaEtiqueta, LecturaRapidaSerializer, MonitoreoLecturaSerializer
+        # Las columnas consultadas salen de los campos, sin repetir las que usan dos campos
+        self.assertEqual(
+            MonitoreoLecturaSerializer.columnas,
+            ('idMonitoreo', 'idEstanque', 'idSensor', 'idSensor__nombreSensor', 'valor', 'fecha')
+        )
+        self.assertEqual(
+            [campo for campo, _ in MonitoreoLecturaSerializer.campos],
+            list(MonitoreoSerializer.Meta.fields)
+        )
+        with self.assertRaises(TypeError):
+            type('SinCampos', (LecturaRapidaSerializer,), {})
+
+        class EtiquetaSerializer(LecturaRapidaSerializer):
+            campos = (('id', 'id'), ('nombre', ColumnaEtiqueta('Estanque', 'id')))
+        self.assertEqual(
+            EtiquetaSerializer([{'id': 3}, {'id': None}]).data,
+            [{'id': 3, 'nombre': "Estanque 3"}, {'id': None, 'nombre': None}]
+        )
+
+
+class ORJSONTestCase(TestCase):
+    """El renderer y el parser con orjson producen lo mismo que los de DRF"""
+    datos = {
+        'texto': "Oxígeno bajo \u2028 en el estanque",
+        'fecha': timezone.now(),
+        'dia': timezone.now().date(),
+        'decimal': Decimal('12.50'),
+        'valores': [1, 2.5, None, True],
+        'anidado': {'idEstanque': 1, 'estanque': "Estanque 1"},
+    }
+
+    def test_renderer(self):
+        self.assertEqual(ORJSONRenderer().render(self.datos), JSONRenderer().render(self.datos))
+        self.assertEqual(
+            ORJSONRenderer().render(self.datos, 'application/json; indent=2'),
+            JSONRenderer().render(self.datos, 'application/json; indent=2')
+        )
+
+    def test_parser(self):
+        cuerpo = JSONRenderer().render(self.datos)
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(cuerpo)), JSONParser().parse(io.BytesIO(cuerpo)))
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"valor": NaN}'))
+
+
+class GetCondicionalTestCase(APITestCase):
+    """Los recursos de cambio lento responden 304 mientras su versión no cambie"""
+
+    cantidad = 3
+
+    def test_if_none_match(self):
+        respuesta = self.client.get('/api/especies/')
+        self.assertEqual(respuesta.status_code, 200)
+        etag = respuesta['ETag']
+        self.assertIn('private', respuesta['Cache-Control'])
+
+        # La respuesta 304 solo lee el contador de versión: no consulta los datos ni serializa
+        with self.assertNumQueries(1):
+            respuesta = self.client.get('/api/especies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+        self.assertEqual(respuesta.content, b'')
+
+        # Otra URL del mismo recurso tiene su propio ETag
+        otra = self.client.get('/api/especies/?limite=1', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(otra.status_code, 200)
+
+        # Un cambio en un modelo anidado en la representación invalida el ETag
+        Especie.objects.filter(informacion_nutricional__isnull=False).first().informacion_nutricional.save()
+        respuesta = self.client.get('/api/especies/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+
+    def test_if_modified_since(self):
+        respuesta = self.client.get('/api/fincas/')
+        modificado = parse_http_date(respuesta['Last-Modified'])
+        respuesta = self.client.get('/api/fincas/', HTTP_IF_MODIFIED_SINCE=http_date(modificado + 1))
+        self.assertEqual(respuesta.status_code, 304)
+
+        # Un cambio dentro del mismo segundo conserva el Last-Modified: la fecha igual no valida
+        Finca.objects.first().save()
+        VersionRecurso.objects.filter(recurso='fincas').update(
+            fechaModificacion=datetime.fromtimestamp(modificado + 0.5, tz=dt_timezone.utc)
+        )
+        self.assertEqual(parse_http_date(self.client.get('/api/fincas/')['Last-Modified']), modificado)
+        respuesta = self.client.get('/api/fincas/', HTTP_IF_MODIFIED_SINCE=http_date(modificado))
+        self.assertEqual(respuesta.status_code, 200)
+
+        # Eliminar no cambia ninguna fechaActualizacion, pero sí la versión del recurso
+        Finca.objects.last().delete()
+        respuesta = self.client.get('/api/fincas/', HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(respuesta.status_code, 200)
+
+    def test_loaddata(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = f"{directorio}/fincas.json"
+            call_command('dumpdata', 'api.Finca', 'api.Estanque', output=ruta, stdout=io.StringIO())
+            recursos = ['fincas', 'estanques', 'umbrales', *(recurso_tablero(finca.pk) for finca in Finca.objects.all())]
+            versiones = {recurso: obtener_version(recurso) for recurso in recursos}
+            call_command('loaddata', ruta, stdout=io.StringIO())
+        # Los receivers ignoran los registros con raw y la carga invalida una sola vez al terminar
+        cambios = {recurso: obtener_version(recurso) - version for recurso, version in versiones.items()}
+        self.assertEqual(cambios, {**dict.fromkeys(recursos, 1), 'umbrales': 0})
+
+    def test_especie_renombrada(self):
+        # El nombre de la especie forma parte de la población de cada estanque
+        etag = self.client.get('/api/estanques/')['ETag']
+        especie = Especie.objects.filter(estadoestanque__isnull=False).first()
+        especie.nombre = "Especie renombrada"
+        especie.save()
+        respuesta = self.client.get('/api/estanques/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("Especie renombrada", respuesta.content.decode())
+
+    def test_escrituras_sin_validadores(self):
+        respuesta = self.client.options('/api/estanques/')
+        self.assertNotIn('ETag', respuesta)
+
+    def test_versiones_compartidas(self):
+        etag = self.client.get('/api/fincas/')['ETag']
+        # La versión no depende de la caché local del proceso
+        cache.clear()
+        self.assertEqual(self.client.get('/api/fincas/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Un cambio revertido no invalida; uno confirmado sí
+        try:
+            with transaction.atomic():
+                Finca.objects.first().save()
+                raise OperationalError("revertir")
+        except OperationalError:
+            pass
+        self.assertEqual(self.client.get('/api/fincas/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        Finca.objects.first().save()
+        self.assertEqual(self.client.get('/api/fincas/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+class TableroFincaTestCase(APITestCase):
+    """El tablero de una finca se arma con consultas fijas y se invalida al escribir en la finca"""
+
+    cantidad = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.finca = Finca.objects.first()
+
+    def setUp(self):
+        super().setUp()
+        self.url = f'/api/fincas/{self.finca.pk}/dashboard/'
+        # La caché no se revierte con la transacción de cada prueba
+        cache.clear()
+
+    def test_consultas_fijas(self):
+        # Más estanques con lecturas y alertas no agregan consultas
+        with self.assertNumQueries(9):
+            respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.status_code, 200)
+        estanque = Estanque.objects.filter(idFinca=self.finca).first()
+        for _ in range(3):
+            nuevo = Estanque.objects.create(
+                idFinca=self.finca, litros=500, capacidad=200, idTipoEstanque=estanque.idTipoEstanque
+            )
+            registrar_monitoreo(
+                Monitoreo.objects.create(idEstanque=nuevo, idSensor=Sensor.objects.first(), valor=7, fecha=timezone.now())
+            )
+        with self.assertNumQueries(9):
+            respuesta = self.client.get(self.url)
+
+        datos = respuesta.data
+        self.assertEqual(datos['finca']['idFinca'], self.finca.pk)
+        self.assertEqual(len(datos['estanques']), Estanque.objects.filter(idFinca=self.finca).count())
+        self.assertEqual(len(datos['inventario']), Inventario.objects.filter(idFinca=self.finca).count())
+        self.assertEqual(len(datos['siembras']), Siembra.objects.filter(idEstanque__idFinca=self.finca).count())
+        self.assertEqual(len(datos['desdobles']), Desdoble.objects.filter(idEstanqueOrigen__idFinca=self.finca).count())
+        alertas = sum(len(estanque['alertas_activas']) for estanque in datos['estanques'])
+        self.assertEqual(alertas, Alerta.objects.filter(idFinca=self.finca, estado='ACTIVA').count())
+        ultimos = sum(len(estanque['ultimos_monitoreos']) for estanque in datos['estanques'])
+        self.assertEqual(ultimos, MonitoreoUltimo.objects.filter(idEstanque__idFinca=self.finca).count())
+
+    def test_cache_e_invalidacion(self):
+        self.client.get(self.url)
+        # Con el tablero en caché solo se consultan la versión del tablero y la finca
+        with self.assertNumQueries(2):
+            respuesta = self.client.get(self.url)
+        cantidad = respuesta.data['inventario'][0]['cantidad']
+
+        # Una escritura en otra finca no invalida el tablero
+        Inventario.objects.exclude(idFinca=self.finca).first().save()
+        with self.assertNumQueries(2):
+            self.client.get(self.url)
+
+        inventario = Inventario.objects.get(pk=respuesta.data['inventario'][0]['idInventario'])
+        inventario.agregar_cantidad(5)
+        respuesta = self.client.get(self.url)
+        self.assertEqual(respuesta.data['inventario'][0]['cantidad'], cantidad + 5)
+
+        # Las lecturas nuevas también cambian el tablero y su ETag
+        etag = respuesta['ETag']
+        estanque = Estanque.objects.filter(idFinca=self.finca).first()
+        monitoreo = Monitoreo.objects.create(
+            idEstanque=estanque, idSensor=Sensor.objects.first(), valor=6, fecha=timezone.now() + timedelta(minutes=1)
+        )
+        registrar_monitoreo(monitoreo)
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        ultimos = next(e for e in respuesta.data['estanques'] if e['idEstanque'] == estanque.pk)['ultimos_monitoreos']
+        self.assertEqual([m['idMonitoreo'] for m in ultimos], [monitoreo.pk])
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=respuesta['ETag']).status_code, 304)
+
+    def test_especie_renombrada(self):
+        respuesta = self.client.get(self.url)
+        especie = Especie.objects.get(pk=respuesta.data['inventario'][0]['idEspecie'])
+        especie.nombre = "Especie renombrada"
+        especie.save()
+        respuesta = self.client.get(self.url, HTTP_IF_NONE_MATCH=respuesta['ETag'])
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn("Especie renombrada", respuesta.content.decode())
+
+    def test_finca_inexistente(self):
+        self.assertEqual(self.client.get('/api/fincas/999999/dashboard/').status_code, 404)
+
+
+class CatalogoEspeciesTestCase(APITestCase):
+    """El catálogo de especies se sirve de la caché hasta que cambia cualquiera de sus modelos"""
+
+    cantidad = 3
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+
+    def test_cache_versionada(self):
+        # Consultas fijas sin importar el número de especies: versión, especies, vitaminas y minerales
+        with self.assertNumQueries(4):
+            respuesta = self.client.get('/api/especies/')
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get('/api/especies/').data, respuesta.data)
+
+        especie = Especie.objects.first()
+        with self.assertNumQueries(4):
+            self.client.get(f'/api/especies/{especie.pk}/')
+        with self.assertNumQueries(1):
+            detalle = self.client.get(f'/api/especies/{especie.pk}/')
+
+        cambios = [
+            lambda: Vitamina.objects.create(
+                nombre="D", cantidad="10 UI", informacion_nutricional=especie.informacion_nutricional
+            ),
+            lambda: Mineral.objects.filter(informacion_nutricional=especie.informacion_nutricional).delete(),
+            lambda: TasaCrecimiento.objects.filter(pk=especie.tasa_crecimiento_id).first().save(),
+            lambda: TasaReproduccion.objects.filter(pk=especie.tasa_reproduccion_id).first().save(),
+            lambda: InformacionNutricional.objects.get(pk=especie.informacion_nutricional_id).save(),
+            lambda: Especie.objects.get(pk=especie.pk).save(),
+        ]
+        for cambio in cambios:
+            cambio()
+            with self.assertNumQueries(4):
+                self.client.get('/api/especies/')
+        detalle_nuevo = self.client.get(f'/api/especies/{especie.pk}/')
+        self.assertEqual(len(detalle_nuevo.data['vitaminas']), len(detalle.data['vitaminas']) + 1)
+        self.assertEqual(detalle_nuevo.data['minerales'], [])
+
+
+
+class EscrituraEspeciesTestCase(TestCase):
+    """Las escrituras anidadas de especies y la importación del catálogo se hacen por lotes"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="catalogo", password="clave")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def datos_especie(self, nutrientes=20, **extra):
+        return {
+            'nombre': "Tilapia roja",
+            'informacion_nutricional': {'proteinas': "20g", 'grasas': "5g", 'calorias': "120 kcal"},
+            'tasa_crecimiento': {'descripcion': "Rápida", 'crecimiento_mensual_promedio': "50g"},
+            'vitaminas': [{'nombre': f"V{n}", 'cantidad': "1 mg"} for n in range(nutrientes)],
+            'minerales': [{'nombre': f"M{n}", 'cantidad': "2 mg"} for n in range(nutrientes)],
+            **extra,
+        }
+
+    def test_crear_y_actualizar_por_diferencia(self):
+        respuesta = self.client.post('/api/especies/', self.datos_especie(), format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        especie = Especie.objects.get(nombre="Tilapia roja")
+        informacion = especie.informacion_nutricional
+        self.assertEqual(informacion.vitaminas.count(), 20)
+        vitaminas_antes = dict(informacion.vitaminas.values_list('nombre', 'idVitamina'))
+
+        # Cambia una vitamina, agrega otra y quita la última; los minerales quedan igual
+        datos = self.datos_especie()
+        datos['vitaminas'][0]['cantidad'] = "3 mg"
+        datos['vitaminas'][-1] = {'nombre': "D", 'cantidad': "10 UI"}
+        respuesta = self.client.put(f'/api/especies/{especie.pk}/', datos, format='json')
+        self.assertEqual(respuesta.status_code, 200)
+
+        vitaminas = {v.nombre: v for v in informacion.vitaminas.all()}
+        self.assertEqual(len(vitaminas), 20)
+        self.assertEqual(vitaminas['V0'].cantidad, "3 mg")
+        self.assertNotIn('V19', vitaminas)
+        # Las filas sin cambios conservan su llave primaria
+        self.assertEqual(vitaminas['V1'].pk, vitaminas_antes['V1'])
+        self.assertEqual(informacion.minerales.count(), 20)
+
+    def test_importar_catalogo(self):
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta_json = f"{directorio}/catalogo.json"
+            with open(ruta_json, 'w', encoding='utf-8') as archivo:
+                json.dump([self.datos_especie(3, nombre=f"Especie {n}") for n in range(50)], archivo)
+            ruta_csv = f"{directorio}/catalogo.csv"
+            with open(ruta_csv, 'w', encoding='utf-8') as archivo:
+                archivo.write(
+                    "nombre,oxigeno_minimo,informacion_nutricional.proteinas,informacion_nutricional.grasas,"
+                    "informacion_nutricional.calorias,vitaminas\n"
+                    "Cachama,4.5,18g,6g,110 kcal,A:5 UI;B12:2 mcg\n"
+                    "Especie 0,5,20g,5g,120 kcal,C:1 mg\n"
+                )
+
+            salida = io.StringIO()
+            versiones = {recurso: obtener_version(recurso) for recurso in ('especies', 'inventarios', 'umbrales')}
+            call_command('importar_especies', ruta_json, lote=20, stdout=salida)
+            # Las versiones que dependen de las especies cambian una vez por importación
+            self.assertEqual({recurso: obtener_version(recurso) - version for recurso, version in versiones.items()},
+                             dict.fromkeys(versiones, 1))
+            self.assertEqual(Especie.objects.count(), 50)
+            self.assertEqual(Vitamina.objects.count(), 150)
+            self.assertEqual(Mineral.objects.filter(informacion_nutricional__especie__nombre="Especie 7").count(), 3)
+            self.assertEqual(TasaCrecimiento.objects.count(), 50)
+
+            call_command('importar_especies', ruta_csv, actualizar=True, stdout=salida)
+            cachama = Especie.objects.get(nombre="Cachama")
+            self.assertEqual(cachama.oxigeno_minimo, 4.5)
+            self.assertEqual(cachama.get_vitaminas_list(), ["A: 5 UI", "B12: 2 mcg"])
+            especie = Especie.objects.get(nombre="Especie 0")
+            self.assertEqual(especie.get_vitaminas_list(), ["C: 1 mg"])
+            self.assertIn("1 especies creadas, 1 actualizadas", salida.getvalue())
+
+
+class InventarioConcurrenteTestCase(TransactionTestCase):
+    """Las sumas y restas concurrentes sobre el mismo inventario no pierden cantidades"""
+    hilos = 8
+    operaciones = 25
+
+    def setUp(self):
+        poblar_datos(cantidad=1)
+        self.inventario = Inventario.objects.get()
+        self.inventario.agregar_cantidad(1000 - self.inventario.cantidad)
+
+    def reintentar_bloqueo(self, funcion, numero):
+        """
+        La base de pruebas SQLite en memoria usa caché compartida: una escritura
+        concurrente falla con 'table is locked' en lugar de esperar como en un
+        archivo o en otros motores. Repetir la operación es seguro porque cada
+        una es un único UPDATE que se aplica completo o no se aplica.
+        """
+        while True:
+            try:
+                return funcion(numero)
+            except OperationalError as e:
+                if 'locked' not in str(e):
+                    raise
+                time.sleep(0.001)
+
+    def en_paralelo(self, funcion):
+        barrera = threading.Barrier(self.hilos)
+        errores = []
+
+        def trabajar(numero):
+            try:
+                barrera.wait()
+                for _ in range(self.operaciones):
+                    self.reintentar_bloqueo(funcion, numero)
+            except Exception as e:  # pragma: no cover - se reporta en la aserción
+                errores.append(e)
+            finally:
+                connection.close()
+
+        trabajadores = [threading.Thread(target=trabajar, args=(n,)) for n in range(self.hilos)]
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        self.assertEqual(errores, [])
+
+    def test_sumas_y_restas(self):
+        especie_id, finca_id = self.inventario.idEspecie_id, self.inventario.idFinca_id
+
+        def operar(numero):
+            if numero % 2:
+                sumar_inventario(especie_id, finca_id, 3)
+            else:
+                restar_inventario(especie_id, finca_id, 2)
+
+        self.en_paralelo(operar)
+        mitad = self.hilos // 2 * self.operaciones
+        self.inventario.refresh_from_db()
+        self.assertEqual(self.inventario.cantidad, 1000 + mitad * 3 - mitad * 2)
+
+    def test_restas_sin_negativos(self):
+        Inventario.objects.filter(pk=self.inventario.pk).update(cantidad=100)
+        rechazos = []
+
+        def cosechar(numero):
+            try:
+                restar_inventario(self.inventario.idEspecie_id, self.inventario.idFinca_id, 1)
+            except ValueError:
+                rechazos.append(numero)
+
+        # 200 cosechas de un pez sobre 100 disponibles: exactamente 100 se rechazan
+        self.en_paralelo(cosechar)
+        self.inventario.refresh_from_db()
+        self.assertEqual(self.inventario.cantidad, 0)
+        self.assertEqual(len(rechazos), self.hilos * self.operaciones - 100)
+
+
+class LibroInventarioTestCase(APITestCase):
+    """Cada cambio de inventario queda en el libro y las existencias a una fecha cuadran con él"""
+
+    cantidad = 2
+
+    def setUp(self):
+        super().setUp()
+        self.inventario = Inventario.objects.first()
+        self.par = (self.inventario.idEspecie_id, self.inventario.idFinca_id)
+
+    def saldo_por_libro(self, fecha):
+        """Existencias sumando todo el libro, sin snapshots"""
+        saldos = {}
+        for especie_id, finca_id, cantidad in MovimientoInventario.objects.filter(fecha__lte=fecha).values_list(
+            'idEspecie', 'idFinca', 'cantidad'
+        ):
+            saldos[(especie_id, finca_id)] = saldos.get((especie_id, finca_id), 0) + cantidad
+        return saldos
+
+    def test_movimientos_por_origen(self):
+        siembra = Siembra.objects.filter(idEstanque__idFinca=self.inventario.idFinca_id).first()
+        self.client.post(f'/api/inventarios/{self.inventario.pk}/agregar_cantidad/', {'cantidad': 10})
+        self.client.post(f'/api/inventarios/{self.inventario.pk}/reducir_cantidad/', {'cantidad': 4})
+        historial = HistorialSiembra.objects.get(idSiembra=siembra)
+        historial.estado = 'COMERCIALIZADO'
+        historial.pecesComercializados = 50
+        historial.fechaComercializacion = timezone.now()
+        historial.save()
+        registrar_comercializacion(historial)
+        destino = Finca.objects.exclude(pk=self.inventario.idFinca_id).first()
+        respuesta = self.client.post(
+            f'/api/inventarios/{self.inventario.pk}/trasladar/', {'finca_destino_id': destino.pk, 'cantidad': 6}
+        )
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.data['cantidad'], 100 + 10 - 4 - 50 - 6)
+
+        movimientos = list(MovimientoInventario.objects.filter(
+            idEspecie=self.inventario.idEspecie_id
+        ).order_by('idMovimientoInventario').values_list('idFinca', 'tipo', 'cantidad'))
+        finca_id = self.inventario.idFinca_id
+        self.assertEqual(movimientos, [
+            (finca_id, 'SIEMBRA', 100), (finca_id, 'AJUSTE', 10), (finca_id, 'AJUSTE', -4),
+            (finca_id, 'COSECHA', -50), (finca_id, 'TRASLADO', -6), (destino.pk, 'TRASLADO', 6),
+        ])
+        # El libro cuadra con las cantidades vigentes
+        saldos = self.saldo_por_libro(timezone.now())
+        for inventario in Inventario.objects.all():
+            self.assertEqual(saldos.get((inventario.idEspecie_id, inventario.idFinca_id), 0), inventario.cantidad)
+
+        # Un traslado que no alcanza no deja movimientos a medias
+        antes = MovimientoInventario.objects.count()
+        respuesta = self.client.post(
+            f'/api/inventarios/{self.inventario.pk}/trasladar/', {'finca_destino_id': destino.pk, 'cantidad': 1000}
+        )
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(MovimientoInventario.objects.count(), antes)
+
+    def test_existencias_con_snapshots(self):
+        ahora = timezone.now()
+        especie_id, finca_id = self.par
+        for dias in range(20, 0, -1):
+            registrar_movimiento(especie_id, finca_id, 'AJUSTE', dias, fecha=ahora - timedelta(days=dias))
+        call_command('generar_snapshots_inventario', fecha=(ahora - timedelta(days=10)).isoformat(), stdout=io.StringIO())
+        call_command('generar_snapshots_inventario', fecha=(ahora - timedelta(days=5)).isoformat(), stdout=io.StringIO())
+
+        # Movimientos con fecha anterior a los cortes: corrigen o crean los snapshots afectados
+        registrar_movimiento(especie_id, finca_id, 'AJUSTE', -7, fecha=ahora - timedelta(days=12))
+        otra_especie = Especie.objects.exclude(pk=especie_id).first()
+        registrar_movimiento(otra_especie.pk, finca_id, 'AJUSTE', 9, fecha=ahora - timedelta(days=8))
+        self.assertEqual(SnapshotInventario.objects.filter(idEspecie=otra_especie, idFinca=finca_id).count(), 1)
+
+        for dias in (40, 25, 15, 10, 9, 5, 3, 0):
+            fecha = ahora - timedelta(days=dias)
+            esperado = self.saldo_por_libro(fecha)
+            with self.subTest(dias=dias), self.assertNumQueries(2):
+                self.assertEqual(existencias_al(fecha), esperado)
+
+    def test_historico(self):
+        especie_id, finca_id = self.par
+        ayer = timezone.now() - timedelta(days=1)
+        self.client.post(f'/api/inventarios/{self.inventario.pk}/agregar_cantidad/', {'cantidad': 10})
+        respuesta = self.client.get('/api/inventarios/historico/', {'fecha': ayer.isoformat(), 'finca_id': finca_id})
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(
+            [(fila['idEspecie'], fila['cantidad']) for fila in respuesta.data['existencias']],
+            [(especie_id, 100)]
+        )
+        self.assertEqual(self.client.get('/api/inventarios/historico/').status_code, 400)
+        self.assertEqual(self.client.get('/api/inventarios/historico/', {'fecha': 'ayer'}).status_code, 400)
+
+
+class SiembrasMasivasTestCase(APITestCase):
+    """La carga masiva de siembras deja el mismo estado que crearlas una a una por signal"""
+
+    cantidad = 2
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.ahora = timezone.now()
+
+    def lote(self, filas):
+        especies = list(Especie.objects.order_by('idEspecie').values_list('idEspecie', flat=True))
+        estanques = list(Estanque.objects.order_by('idEstanque').values_list('idEstanque', flat=True))
+        return [
+            {
+                'idEspecie': especies[i % len(especies)],
+                'idEstanque': estanques[i % len(estanques)],
+                'cantidad': 10 + i,
+                'fecha': (self.ahora - timedelta(hours=i)).isoformat(),
+                'inversion': 100.0 * (i + 1),
+            }
+            for i in range(filas)
+        ]
+
+    def estado(self):
+        return {
+            'inventarios': sorted(Inventario.objects.values_list('idEspecie', 'idFinca', 'cantidad')),
+            'historiales': sorted(HistorialSiembra.objects.values_list('idSiembra__cantidad', 'estado')),
+            'movimientos': sorted(MovimientoInventario.objects.values_list('idEspecie', 'idFinca', 'tipo', 'cantidad', 'fecha')),
+        }
+
+    def test_mismo_estado_que_por_signal(self):
+        lote = self.lote(7)
+        # Estado de referencia creando las siembras una a una, descartado al salir
+        with transaction.atomic():
+            self.assertEqual(self.client.post('/api/siembras/', lote[0], format='json').status_code, 201)
+            for fila in lote[1:]:
+                self.client.post('/api/siembras/', fila, format='json')
+            esperado = self.estado()
+            transaction.set_rollback(True)
+
+        version = obtener_version('inventarios')
+        respuesta = self.client.post('/api/siembras/bulk/', {'siembras': lote}, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data['siembras_creadas'], 7)
+        self.assertEqual(respuesta.data['inventarios_actualizados'], 4)
+        self.assertEqual([fila['cantidad'] for fila in respuesta.data['siembras']], [fila['cantidad'] for fila in lote])
+        self.assertEqual(self.estado(), esperado)
+        self.assertNotEqual(obtener_version('inventarios'), version)
+
+    def test_consultas_fijas(self):
+        # Una corrida previa calienta los contadores de versión en la cache
+        self.client.post('/api/siembras/bulk/', self.lote(4), format='json')
+        consultas = []
+        for filas in (4, 40):
+            with CaptureQueriesContext(connection) as contexto:
+                respuesta = self.client.post('/api/siembras/bulk/', self.lote(filas), format='json')
+            self.assertEqual(respuesta.status_code, 201)
+            consultas.append(len(contexto))
+        self.assertEqual(consultas[0], consultas[1])
+
+    def test_lote_invalido(self):
+        lote = self.lote(3)
+        lote[1]['idEstanque'] = 9999
+        antes = Siembra.objects.count()
+        respuesta = self.client.post('/api/siembras/bulk/', lote, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(respuesta.data['estanques'], [9999])
+        lote[1]['cantidad'] = 0
+        self.assertEqual(self.client.post('/api/siembras/bulk/', lote, format='json').status_code, 400)
+        self.assertEqual(self.client.post('/api/siembras/bulk/', [], format='json').status_code, 400)
+        self.assertEqual(Siembra.objects.count(), antes)
+
+
+class ServiciosTestCase(APITestCase):
+    """Las reglas de negocio se aplican al escribir por la API y no en cada save() del ORM"""
+
+    def setUp(self):
+        super().setUp()
+        self.siembra = Siembra.objects.first()
+        self.inventario = Inventario.objects.get(
+            idEspecie=self.siembra.idEspecie_id, idFinca=self.siembra.idEstanque.idFinca_id
+        )
+
+    def test_orm_sin_efectos(self):
+        # Como en loaddata o una importación: guardar no crea historiales, bitácoras ni alertas
+        siembra = Siembra.objects.create(
+            idEspecie_id=self.siembra.idEspecie_id, idEstanque_id=self.siembra.idEstanque_id,
+            cantidad=30, fecha=timezone.now(), inversion=10
+        )
+        Monitoreo.objects.create(
+            idEstanque_id=self.siembra.idEstanque_id, idSensor=Sensor.objects.first(), valor=1, fecha=timezone.now()
+        )
+        self.assertFalse(HistorialSiembra.objects.filter(idSiembra=siembra).exists())
+        self.assertEqual(Inventario.objects.get(pk=self.inventario.pk).cantidad, 100)
+        self.assertEqual(Alerta.objects.count(), 1)
+
+    def test_escrituras_por_api(self):
+        origen, destino = Estanque.objects.order_by('idEstanque')
+        respuesta = self.client.post('/api/siembras/', {
+            'idEspecie': self.siembra.idEspecie_id, 'idEstanque': origen.pk, 'cantidad': 30,
+            'fecha': timezone.now().isoformat(), 'inversion': 10
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertTrue(HistorialSiembra.objects.filter(idSiembra=respuesta.data['idSiembra'], estado='PENDIENTE').exists())
+        self.assertEqual(Inventario.objects.get(pk=self.inventario.pk).cantidad, 130)
+
+        respuesta = self.client.post('/api/desdobles/', {
+            'idEstanqueOrigen': origen.pk, 'idEstanqueDestino': destino.pk, 'idSiembra': self.siembra.pk,
+            'fecha': timezone.now().isoformat()
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(BitacoraDesdoble.objects.get(idDesdoble=respuesta.data['idDesdoble']).cambioRealizado,
+                         f"Desdoble automático desde estanque {origen} hacia estanque {destino}")
+
+        # Editar un historial ya comercializado no vuelve a descontar
+        historial = HistorialSiembra.objects.get(idSiembra=self.siembra)
+        url = f'/api/historiales-siembra/{historial.pk}/'
+        datos = {'estado': 'COMERCIALIZADO', 'totalKilos': 20, 'kiloPorPez': 0.5, 'fechaComercializacion': timezone.now().isoformat()}
+        self.assertEqual(self.client.patch(url, datos, format='json').status_code, 200)
+        self.assertEqual(Inventario.objects.get(pk=self.inventario.pk).cantidad, 90)
+        self.assertEqual(self.client.patch(url, {'precioVenta': 9}, format='json').status_code, 200)
+        self.assertEqual(Inventario.objects.get(pk=self.inventario.pk).cantidad, 90)
+
+    def test_comercializaciones_por_lote(self):
+        from .servicios import registrar_comercializaciones, registrar_siembras
+        siembras = Siembra.objects.bulk_create([
+            Siembra(
+                idEspecie_id=self.siembra.idEspecie_id, idEstanque_id=self.siembra.idEstanque_id,
+                cantidad=50, fecha=timezone.now(), inversion=1
+            )
+            for _ in range(2)
+        ])
+        registrar_siembras(siembras)
+        historiales = list(HistorialSiembra.objects.filter(idSiembra__in=siembras))
+        for historial in historiales:
+            historial.estado = 'COMERCIALIZADO'
+            historial.pecesComercializados = 20
+            historial.fechaComercializacion = timezone.now()
+        # El inventario se descuenta una vez por (especie, finca), con un movimiento por historial
+        with CaptureQueriesContext(connection) as consultas:
+            registrar_comercializaciones(historiales)
+        with CaptureQueriesContext(connection) as una:
+            registrar_comercializaciones(historiales[:1])
+        self.assertEqual(len(consultas), len(una))
+        self.assertEqual(Inventario.objects.get(pk=self.inventario.pk).cantidad, 200 - 60)
+        self.assertEqual(MovimientoInventario.objects.filter(tipo='COSECHA').count(), 3)
+
+
+class PoblacionEstanqueTestCase(APITestCase):
+    """La población de cada estanque se mantiene con cada evento y coincide con recorrer el historial"""
+
+    def setUp(self):
+        super().setUp()
+        self.origen, self.destino = Estanque.objects.order_by('idEstanque')
+        self.especie = Especie.objects.get()
+
+    def poblacion(self, estanque):
+        datos = self.client.get(f'/api/estanques/{estanque.pk}/').data
+        return datos['cantidad_peces'], datos['biomasa_siembra']
+
+    def test_eventos(self):
+        self.assertEqual(self.poblacion(self.origen), (100, 0))
+        respuesta = self.client.post('/api/siembras/', {
+            'idEspecie': self.especie.pk, 'idEstanque': self.destino.pk, 'cantidad': 200,
+            'fecha': timezone.now().isoformat(), 'inversion': 50, 'pesoInicial': 0.01
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(self.poblacion(self.destino), (200, 2.0))
+        siembra = respuesta.data['idSiembra']
+
+        # El desdoble lleva el peso promedio del origen
+        respuesta = self.client.post('/api/desdobles/', {
+            'idEstanqueOrigen': self.destino.pk, 'idEstanqueDestino': self.origen.pk,
+            'idSiembra': siembra, 'fecha': timezone.now().isoformat(), 'cantidad': 50
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(self.poblacion(self.destino), (150, 1.5))
+        self.assertEqual(self.poblacion(self.origen), (150, 0.5))
+
+        respuesta = self.client.post(f'/api/estanques/{self.destino.pk}/mortalidad/', {
+            'idEspecie': self.especie.pk, 'cantidad': 30, 'causa': 'Oxígeno bajo'
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+        self.assertEqual(respuesta.data['estanque']['cantidad_peces'], 120)
+        self.assertEqual(respuesta.data['estanque']['biomasa_siembra'], 1.2)
+        self.assertEqual(Inventario.objects.get(idEspecie=self.especie).cantidad, 300 - 30)
+        self.assertTrue(MovimientoInventario.objects.filter(tipo='MORTALIDAD', cantidad=-30).exists())
+
+        # Cosechar la siembra de poblar_datos saca sus 100 peces del origen y deja los 50 desdoblados
+        historial = HistorialSiembra.objects.filter(idSiembra__idEstanque=self.origen).first()
+        respuesta = self.client.post(f'/api/historiales-siembra/{historial.pk}/comercializar/', {
+            'fechaComercializacion': timezone.now().isoformat(), 'kilosVendidos': 80, 'precioVenta': 5,
+            'totalKilos': 80, 'kiloPorPez': 0.5
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        self.assertEqual(self.poblacion(self.origen), (50, round(0.5 * 50 / 150, 3)))
+        self.assertEqual(self.poblacion(self.destino), (120, 1.2))
+
+        # Cancelar la otra siembra saca lo que queda de ella en los dos estanques
+        historial = HistorialSiembra.objects.get(idSiembra=siembra)
+        respuesta = self.client.post(f'/api/historiales-siembra/{historial.pk}/cancelar/')
+        self.assertEqual(respuesta.status_code, 200, respuesta.data)
+        self.assertEqual(self.poblacion(self.origen), (0, 0))
+        self.assertEqual(self.poblacion(self.destino), (0, 0))
+        self.assertEqual(self.client.get(f'/api/estanques/{self.origen.pk}/').data['poblacion'], [])
+
+    def test_sin_peces_suficientes(self):
+        siembra = Siembra.objects.get()
+        respuesta = self.client.post('/api/desdobles/', {
+            'idEstanqueOrigen': self.origen.pk, 'idEstanqueDestino': self.destino.pk,
+            'idSiembra': siembra.pk, 'fecha': timezone.now().isoformat(), 'cantidad': 101
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(Desdoble.objects.count(), 1)
+        respuesta = self.client.post(f'/api/estanques/{self.destino.pk}/mortalidad/', {
+            'idEspecie': self.especie.pk, 'cantidad': 1
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+        self.assertEqual(self.poblacion(self.origen), (100, 0))
+        self.assertEqual(Inventario.objects.get(idEspecie=self.especie).cantidad, 100)
+
+    def test_editar_y_eliminar_siembra(self):
+        respuesta = self.client.post('/api/siembras/', {
+            'idEspecie': self.especie.pk, 'idEstanque': self.destino.pk, 'cantidad': 200,
+            'fecha': timezone.now().isoformat(), 'inversion': 50, 'pesoInicial': 0.01
+        }, format='json')
+        url = f"/api/siembras/{respuesta.data['idSiembra']}/"
+        inventario = Inventario.objects.get(idEspecie=self.especie)
+
+        # Se aplica solo la diferencia de peces y de biomasa
+        self.assertEqual(self.client.patch(url, {'cantidad': 150}, format='json').status_code, 200)
+        self.assertEqual(self.poblacion(self.destino), (150, 1.5))
+        inventario.refresh_from_db()
+        self.assertEqual(inventario.cantidad, 250)
+        self.assertTrue(MovimientoInventario.objects.filter(tipo='SIEMBRA', cantidad=-50).exists())
+        self.assertEqual(self.client.patch(url, {'pesoInicial': 0.02}, format='json').status_code, 200)
+        self.assertEqual(self.poblacion(self.destino), (150, 3.0))
+
+        # Cambiar de estanque mueve los peces de la siembra
+        self.assertEqual(self.client.patch(url, {'idEstanque': self.origen.pk}, format='json').status_code, 200)
+        self.assertEqual(self.poblacion(self.destino), (0, 0))
+        self.assertEqual(self.poblacion(self.origen), (250, 3.0))
+
+        # Eliminarla retira su parte de la población y del inventario
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.poblacion(self.origen), (100, 1.2))
+        inventario.refresh_from_db()
+        self.assertEqual(inventario.cantidad, 100)
+
+        # Una siembra cerrada ya no se puede editar ni eliminar
+        siembra = Siembra.objects.get()
+        historial = HistorialSiembra.objects.get(idSiembra=siembra)
+        self.assertEqual(self.client.post(f'/api/historiales-siembra/{historial.pk}/cancelar/').status_code, 200)
+        self.assertEqual(self.client.patch(f'/api/siembras/{siembra.pk}/', {'cantidad': 10}, format='json').status_code, 400)
+        self.assertEqual(self.client.delete(f'/api/siembras/{siembra.pk}/').status_code, 400)
+        self.assertEqual(Siembra.objects.get().cantidad, 100)
+
+    def test_editar_y_eliminar_desdoble(self):
+        def desdoblar(cantidad):
+            respuesta = self.client.post('/api/desdobles/', {
+                'idEstanqueOrigen': self.origen.pk, 'idEstanqueDestino': self.destino.pk,
+                'idSiembra': Siembra.objects.get().pk, 'fecha': timezone.now().isoformat(), 'cantidad': cantidad
+            }, format='json')
+            return f"/api/desdobles/{respuesta.data['idDesdoble']}/"
+
+        url = desdoblar(40)
+        self.assertEqual(self.client.patch(url, {'cantidad': 10}, format='json').status_code, 200)
+        self.assertEqual(self.poblacion(self.origen), (90, 0))
+        self.assertEqual(self.poblacion(self.destino), (10, 0))
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.poblacion(self.origen), (100, 0))
+        self.assertEqual(self.poblacion(self.destino), (0, 0))
+
+        # Sin los peces en el destino no se puede deshacer, pero sí devolver los que quedan
+        url = desdoblar(10)
+        self.client.post(f'/api/estanques/{self.destino.pk}/mortalidad/', {
+            'idEspecie': self.especie.pk, 'cantidad': 5
+        }, format='json')
+        self.assertEqual(self.client.delete(url).status_code, 400)
+        self.assertEqual(self.client.patch(url, {'cantidad': 5}, format='json').status_code, 200)
+        self.assertEqual(self.poblacion(self.origen), (95, 0))
+        self.assertEqual(self.poblacion(self.destino), (0, 0))
+
+    def test_lotes(self):
+        from .servicios import registrar_comercializaciones, registrar_desdobles, registrar_siembras
+        finca = self.origen.idFinca
+        otra_finca = Finca.objects.create(
+            nombre="Otra", idMetodoAcuicola=finca.idMetodoAcuicola, ubicacion="Huila", idUsuario=finca.idUsuario
+        )
+        tercero = Estanque.objects.create(
+            idFinca=otra_finca, litros=1000, capacidad=500, idTipoEstanque=self.origen.idTipoEstanque
+        )
+        ahora = timezone.now()
+        siembras = Siembra.objects.bulk_create([
+            Siembra(idEspecie=self.especie, idEstanque=self.destino, cantidad=100, fecha=ahora, inversion=1, pesoInicial=0.01)
+            for _ in range(2)
+        ])
+        registrar_siembras(siembras)
+
+        def desdoblar(movimientos):
+            desdobles = Desdoble.objects.bulk_create([
+                Desdoble(idEstanqueOrigen=origen, idEstanqueDestino=destino, idSiembra=siembras[0], fecha=ahora, cantidad=cantidad)
+                for origen, destino, cantidad in movimientos
+            ])
+            with CaptureQueriesContext(connection) as consultas:
+                registrar_desdobles(desdobles)
+            return len(consultas)
+
+        # El destino entrega al origen y el origen, ya con esos peces, a un estanque de otra finca
+        consultas = desdoblar([(self.destino, self.origen, 50), (self.origen, tercero, 100)])
+        self.assertEqual(self.poblacion(self.destino), (150, 1.5))
+        self.assertEqual(self.poblacion(self.origen), (50, round(0.5 * 50 / 150, 3)))
+        self.assertEqual(self.poblacion(tercero), (100, round(0.5 * 100 / 150, 3)))
+        self.assertEqual(Inventario.objects.get(idEspecie=self.especie, idFinca=finca).cantidad, 200)
+        self.assertEqual(Inventario.objects.get(idEspecie=self.especie, idFinca=otra_finca).cantidad, 100)
+        self.assertEqual(MovimientoInventario.objects.filter(tipo='TRASLADO').count(), 2)
+        # Más desdobles entre los mismos estanques no agregan consultas
+        consultas = desdoblar([(self.destino, self.origen, 10), (self.origen, tercero, 15)])
+        self.assertEqual(desdoblar([(self.destino, self.origen, 10)] * 2 + [(self.origen, tercero, 15)] * 2), consultas)
+        self.assertEqual(self.poblacion(self.destino)[0], 120)
+        self.assertEqual(self.poblacion(tercero)[0], 145)
+        self.assertEqual(Inventario.objects.get(idEspecie=self.especie, idFinca=finca).cantidad, 155)
+        self.assertEqual(MovimientoInventario.objects.filter(tipo='TRASLADO').count(), 8)
+
+        respuesta = self.client.post('/api/desdobles/', {
+            'idEstanqueOrigen': tercero.pk, 'idEstanqueDestino': self.destino.pk,
+            'idSiembra': siembras[0].pk, 'fecha': ahora.isoformat(), 'cantidad': 146
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 400)
+
+        # Dos cosechas cierran sus siembras y descuentan el inventario una vez, con un movimiento cada una
+        historiales = list(HistorialSiembra.objects.filter(idSiembra__in=siembras))
+        for historial in historiales:
+            historial.estado = 'COMERCIALIZADO'
+            historial.pecesComercializados = 40
+            historial.fechaComercializacion = ahora
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as una:
+                registrar_comercializaciones(historiales[:1])
+            transaction.set_rollback(True)
+        with CaptureQueriesContext(connection) as consultas:
+            registrar_comercializaciones(historiales)
+        self.assertEqual(len(consultas), len(una))
+        self.assertEqual(self.poblacion(self.destino), (0, 0))
+        self.assertEqual(self.poblacion(tercero), (0, 0))
+        # Lo que salió del origen supera lo que entró: sus peces son de la siembra de poblar_datos
+        self.assertEqual(self.poblacion(self.origen)[0], 100 + 80 - 145)
+        self.assertEqual(Inventario.objects.get(idEspecie=self.especie, idFinca=finca).cantidad, 155 - 80)
+        self.assertEqual(MovimientoInventario.objects.filter(tipo='COSECHA').count(), 2)
+
+
+class ProyeccionCrecimientoTestCase(APITestCase):
+    """Los textos de crecimiento se guardan como números y la proyección vectorizada coincide con la fila por fila"""
+
+    def setUp(self):
+        super().setUp()
+        self.finca = Finca.objects.get()
+        self.especie = Especie.objects.get()
+        self.tasa = self.especie.tasa_crecimiento
+
+    def test_parametros_numericos(self):
+        self.assertAlmostEqual(self.tasa.crecimiento_mensual_kg, 0.05)
+        tasa = TasaCrecimiento.objects.create(
+            descripcion="Media", crecimiento_mensual_promedio="50-80g por mes", peso_maximo="2-3 kg",
+            tiempo_para_peso_maximo="1 año"
+        )
+        self.assertEqual(
+            (tasa.crecimiento_mensual_kg, tasa.peso_maximo_kg, tasa.meses_peso_maximo), (0.065, 2.5, 12.0)
+        )
+        tasa.peso_maximo = "800 g"
+        tasa.tiempo_para_peso_maximo = "sin dato"
+        tasa.save(update_fields=['peso_maximo', 'tiempo_para_peso_maximo'])
+        tasa.refresh_from_db()
+        self.assertEqual((tasa.peso_maximo_kg, tasa.meses_peso_maximo), (0.8, None))
+
+    def test_proyeccion(self):
+        self.tasa.crecimiento_mensual_promedio = "60 g"
+        self.tasa.peso_maximo = "0,5 kg"
+        self.tasa.save()
+        origen, destino = Estanque.objects.order_by('idEstanque')
+        self.client.post('/api/siembras/', {
+            'idEspecie': self.especie.pk, 'idEstanque': destino.pk, 'cantidad': 200,
+            'fecha': timezone.now().isoformat(), 'inversion': 50, 'pesoInicial': 0.1
+        }, format='json')
+
+        url = f'/api/fincas/{self.finca.pk}/proyeccion/'
+        with self.assertNumQueries(5):
+            respuesta = self.client.get(url, {'dias': 304})
+        self.assertEqual(respuesta.status_code, 200)
+        filas = {fila['idEstanque']: fila for fila in respuesta.data['estanques']}
+        self.assertEqual(len(filas), 2)
+        # La siembra de poblar_datos no registra peso: se marca en lugar de proyectarse desde 0 kg
+        fila = filas[origen.pk]
+        self.assertTrue(fila['peso_desconocido'])
+        self.assertEqual((fila['peso_proyectado'], fila['fecha_cosecha_estimada']), (None, None))
+        self.assertEqual(respuesta.data['peces_sin_peso'], 100)
+        fila = filas[destino.pk]
+        self.assertFalse(fila['peso_desconocido'])
+        self.assertAlmostEqual(fila['peso_actual'], 0.1, places=3)
+        # 10 meses a 60 g por mes superan el peso máximo
+        self.assertEqual(fila['peso_proyectado'], 0.5)
+        self.assertEqual(fila['biomasa_proyectada'], 100)
+        meses = (fila['fecha_cosecha_estimada'] - timezone.now()).days / 30.4375
+        self.assertAlmostEqual(meses, 0.4 / 0.06, delta=0.1)
+        self.assertEqual(respuesta.data['biomasa_proyectada'], fila['biomasa_proyectada'])
+
+        self.assertEqual(self.client.get(url, {'dias': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'peso_objetivo': '-1'}).status_code, 400)
+        # Un peso objetivo por encima del máximo no tiene fecha de cosecha
+        respuesta = self.client.get(url, {'peso_objetivo': '0.3'})
+        self.assertIsNotNone(respuesta.data['estanques'][1]['fecha_cosecha_estimada'])
+        respuesta = self.client.get(url, {'peso_objetivo': '3'})
+        self.assertIsNone(respuesta.data['estanques'][1]['fecha_cosecha_estimada'])
+
+    def test_cohortes(self):
+        """Cada siembra de un estanque crece desde su propia fecha, también después de un desdoble"""
+        self.tasa.crecimiento_mensual_promedio = "60 g"
+        self.tasa.peso_maximo = "1 kg"
+        self.tasa.save()
+        origen, destino = Estanque.objects.order_by('idEstanque')
+        ahora = timezone.now()
+        siembras = []
+        for fecha, cantidad, peso in ((ahora - timedelta(days=6 * 30.4375), 100, 0.1), (ahora, 200, 0.05)):
+            respuesta = self.client.post('/api/siembras/', {
+                'idEspecie': self.especie.pk, 'idEstanque': destino.pk, 'cantidad': cantidad,
+                'fecha': fecha.isoformat(), 'inversion': 50, 'pesoInicial': peso
+            }, format='json')
+            self.assertEqual(respuesta.status_code, 201)
+            siembras.append(respuesta.data['idSiembra'])
+        self.client.post('/api/desdobles/', {
+            'idEstanqueOrigen': destino.pk, 'idEstanqueDestino': origen.pk,
+            'idSiembra': siembras[0], 'fecha': ahora.isoformat(), 'cantidad': 50
+        }, format='json')
+        # La mortalidad sin siembra se reparte entre las cohortes del estanque
+        respuesta = self.client.post(f'/api/estanques/{destino.pk}/mortalidad/', {
+            'idEspecie': self.especie.pk, 'cantidad': 25
+        }, format='json')
+        self.assertEqual(respuesta.status_code, 201)
+
+        respuesta = self.client.get(f'/api/fincas/{self.finca.pk}/proyeccion/', {'dias': 0})
+        filas = {(fila['idEstanque'], fila['idSiembra']): fila for fila in respuesta.data['estanques']}
+        self.assertEqual(filas[(destino.pk, siembras[0])]['cantidad'], 45)
+        self.assertEqual(filas[(destino.pk, siembras[1])]['cantidad'], 180)
+        self.assertAlmostEqual(filas[(destino.pk, siembras[0])]['peso_actual'], 0.1 + 0.06 * 6, places=3)
+        self.assertAlmostEqual(filas[(destino.pk, siembras[1])]['peso_actual'], 0.05, places=3)
+        self.assertAlmostEqual(filas[(origen.pk, siembras[0])]['peso_actual'], 0.1 + 0.06 * 6, places=3)
+        self.assertEqual(filas[(origen.pk, siembras[0])]['cantidad'], 50)
+        self.assertTrue(filas[(origen.pk, Siembra.objects.order_by('idSiembra').first().pk)]['peso_desconocido'])
+
+    def test_numpy_y_python_coinciden(self):
+        from .crecimiento import _proyectar_numpy, _proyectar_python, np, poblaciones_activas
+        if np is None:
+            self.skipTest("NumPy no está instalado")
+        TasaCrecimiento.objects.filter(pk=self.tasa.pk).update(
+            crecimiento_mensual_kg=None, peso_maximo_kg=1.2, meses_peso_maximo=8
+        )
+        filas = poblaciones_activas(self.finca.pk)
+        ahora = timezone.now()
+        for peso_objetivo in (None, 0.6, 5):
+            argumentos = (filas, ahora.timestamp(), (ahora + timedelta(days=90)).timestamp(), peso_objetivo)
+            for vectorizado, fila in zip(_proyectar_numpy(*argumentos), _proyectar_python(*argumentos)):
+                self.assertEqual(vectorizado[3], fila[3])
+                for a, b in zip(vectorizado[:3], fila[:3]):
+                    if math.isnan(b):
+                        self.assertTrue(math.isnan(a))
+                    else:
+                        self.assertAlmostEqual(a, b)
@@ -0,0 +1,137 @@
+"""
+Motor de umbrales por especie para las alertas de monitoreo.
+
+Las reglas se compilan una sola vez en un diccionario (especie, tipo de
+sensor) -> bandas ordenadas por severidad, junto con el tipo de cada sensor.
+Verificar una lectura es entonces una búsqueda en diccionario. La compilación
+se invalida con la versión 'umbrales', que se incrementa al guardar o eliminar
+especies, sensores o reglas de umbral.
+"""
+from collections import namedtuple
+
+from .versiones import obtener_version
+
+# Orden de severidad: se evalúan primero las bandas más severas
+SEVERIDAD_ORDEN = {'CRITICA': 4, 'ALTA': 3, 'MEDIA': 2, 'BAJA': 1}
+
+# Etiqueta, terminación de género y unidad de cada tipo de sensor para los mensajes
+ETIQUETAS_TIPO = {
+    'TEMPERATURA': ('Temperatura', 'A', '°C'),
+    'PH': ('pH', 'O', ''),
+    'OXIGENO': ('Oxígeno', 'O', ' mg/L'),
+    'CONDUCTIVIDAD': ('Conductividad', 'A', ' μS/cm'),
+    'TURBIDEZ': ('Turbidez', 'A', ' NTU'),
+    'AMONIO': ('Amonio', 'O', ' mg/L'),
+}
+
+Umbral = namedtuple('Umbral', ['minimo', 'maximo', 'severidad'])
+
+
+def clasificar_sensor(nombre, unidad):
+    """
+    Deduce el tipo de un sensor a partir de su nombre y unidad de medida.
+    Solo se usa al guardar el sensor; las alertas leen el tipo ya guardado.
+    """
+    nombre = (nombre or '').strip().lower()
+    unidad = (unidad or '').strip().lower()
+
+    if nombre in ['temperatura', 'temp'] and unidad in ['°c', 'celsius', 'c']:
+        return 'TEMPERATURA'
+    if nombre == 'ph':
+        return 'PH'
+    if nombre in ['oxigeno', 'oxígeno', 'o2'] and unidad in ['mg/l', 'ppm']:
+        return 'OXIGENO'
+    if nombre.startswith('conductiv') or unidad in ['μs/cm', 'µs/cm', 'us/cm', 'ms/cm']:
+        return 'CONDUCTIVIDAD'
+    if nombre.startswith('turbid') or unidad == 'ntu':
+        return 'TURBIDEZ'
+    if nombre.startswith('amoni') or nombre in ['nh3', 'nh4']:
+        return 'AMONIO'
+    return 'OTRO'
+
+
+class ReglasCompiladas:
+    """Reglas de umbrales compiladas en memoria para una versión dada"""
+
+    def __init__(self, version, umbrales, nombres_especie, tipos_sensor):
+        self.version = version
+        self.umbrales = umbrales
+        self.nombres_especie = nombres_especie
+        self.tipos_sensor = tipos_sensor
+
+    def tipo_sensor(self, sensor_id):
+        return self.tipos_sensor.get(sensor_id)
+
+    def evaluar(self, especie_id, tipo, valor):
+        """
+        Retorna (umbral, 'BAJO' | 'ALTO', límite) de la banda más severa que
+        el valor incumple, o None si el valor está dentro del rango.
+        """
+        for umbral in self.umbrales.get((especie_id, tipo), ()):
+            if umbral.minimo is not None and valor < umbral.minimo:
+                return umbral, 'BAJO', umbral.minimo
+            if umbral.maximo is not None and valor > umbral.maximo:
+                return umbral, 'ALTO', umbral.maximo
+        return None
+
+    def mensaje(self, especie_id, tipo, valor, direccion, limite):
+        etiqueta, genero, unidad = ETIQUETAS_TIPO.get(tipo, (tipo.capitalize(), 'O', ''))
+        nivel = ('BAJ' if direccion == 'BAJO' else 'ALT') + genero
+        referencia = 'Mínimo' if direccion == 'BAJO' else 'Máximo'
+        nombre = self.nombres_especie.get(especie_id, '')
+        return (
+            f"{etiqueta} {nivel} detectad{genero.lower()}: {valor}{unidad}. "
+            f"{referencia} recomendado para {nombre}: {limite}{unidad}"
+        )
+
+
+def compilar_reglas(version=None):
+    """
+    Construye las reglas a partir de los rangos óptimos de cada especie y de
+    la tabla ReglaUmbral. Si una especie tiene reglas explícitas para un tipo
+    de sensor, estas reemplazan al rango derivado de los campos de la especie.
+    """
+    from .models import Especie, ReglaUmbral, Sensor
+
+    umbrales = {}
+    nombres_especie = {}
+    especies = Especie.objects.values_list(
+        'idEspecie', 'nombre', 'temperatura_optima_min', 'temperatura_optima_max',
+        'ph_optimo_min', 'ph_optimo_max', 'oxigeno_minimo'
+    )
+    for especie_id, nombre, temp_min, temp_max, ph_min, ph_max, oxigeno_min in especies:
+        nombres_especie[especie_id] = nombre
+        for tipo, minimo, maximo in (
+            ('TEMPERATURA', temp_min, temp_max),
+            ('PH', ph_min, ph_max),
+            ('OXIGENO', oxigeno_min, None),
+        ):
+            if minimo is not None or maximo is not None:
+                umbrales[(especie_id, tipo)] = [Umbral(minimo, maximo, 'MEDIA')]
+
+    explicitas = {}
+    reglas = ReglaUmbral.objects.filter(activa=True).values_list(
+        'idEspecie', 'tipoSensor', 'minimo', 'maximo', 'severidad'
+    )
+    for especie_id, tipo, minimo, maximo, severidad in reglas:
+        explicitas.setdefault((especie_id, tipo), []).append(Umbral(minimo, maximo, severidad))
+    umbrales.update(explicitas)
+
+    compiladas = {
+        clave: tuple(sorted(bandas, key=lambda umbral: -SEVERIDAD_ORDEN.get(umbral.severidad, 0)))
+        for clave, bandas in umbrales.items()
+    }
+    tipos_sensor = dict(Sensor.objects.values_list('idSensor', 'tipo'))
+    return ReglasCompiladas(version, compiladas, nombres_especie, tipos_sensor)
+
+
+_reglas = None
+
+
+def obtener_reglas():
+    """Retorna las reglas compiladas, reconstruyéndolas solo si cambió su versión"""
+    global _reglas
+    version = obtener_version('umbrales')
+    if _reglas is None or _reglas.version != version:
+        _reglas = compilar_reglas(version)
+    return _reglas
@@ -12,12 +12,14 @@ router.register(r'tipos-estanque', views.TipoEstanqueViewSet)
 router.register(r'estanques', views.EstanqueViewSet)
 router.register(r'especies', views.EspecieViewSet)
 router.register(r'inventarios', views.InventarioViewSet)
+router.register(r'movimientos-inventario', views.MovimientoInventarioViewSet)
 router.register(r'siembras', views.SiembraViewSet)
 router.register(r'historiales-siembra', views.HistorialSiembraViewSet)
 router.register(r'desdobles', views.DesdobleViewSet)
 router.register(r'bitacoras-desdoble', views.BitacoraDesdobleViewSet)
 router.register(r'historiales-estanque', views.HistorialEstanquesViewSet)
 router.register(r'sensores', views.SensorViewSet)
+router.register(r'reglas-umbral', views.ReglaUmbralViewSet)
 router.register(r'monitoreos', views.MonitoreoViewSet)
 router.register(r'alertas', views.AlertaViewSet)
 router.register(r'users', views.UserViewSet)
@@ -0,0 +1,60 @@
+"""
+Contadores de versión por recurso guardados en la tabla VersionRecurso.
+
+Las estructuras que se compilan o cachean (reglas de umbrales, índices en
+memoria, catálogos y tableros en la caché de Django) guardan la versión con
+la que se construyeron y se reconstruyen cuando la versión cambia. Como el
+contador está en la base de datos, todos los procesos del servidor ven el
+mismo valor aunque la caché de Django sea local a cada proceso, y un cambio
+hecho dentro de una transacción solo se ve cuando la transacción se confirma.
+Leer una versión cuesta una consulta por la llave única del recurso.
+
+Cada recurso guarda además la fecha de su último cambio, que las vistas usan
+junto con la versión como validadores de GET condicional (ETag y
+Last-Modified).
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+
+def obtener_validadores(recurso):
+    """Retorna (versión, instante epoch en segundos del último cambio) del recurso en una consulta"""
+    from .models import VersionRecurso
+    fila = VersionRecurso.objects.filter(recurso=recurso).values_list('version', 'fechaModificacion').first()
+    if fila is None:
+        # Sin registro se asume que el recurso acaba de cambiar
+        fila = _crear(recurso)
+    version, fecha = fila
+    return version, fecha.timestamp()
+
+
+def obtener_version(recurso):
+    """Retorna la versión actual del recurso, inicializándola si no existe"""
+    return obtener_validadores(recurso)[0]
+
+
+def obtener_fecha_modificacion(recurso):
+    """Retorna el instante (epoch en segundos) del último cambio de versión del recurso"""
+    return obtener_validadores(recurso)[1]
+
+
+def incrementar_version(recurso):
+    """Invalida todo lo construido con la versión actual del recurso"""
+    from .models import VersionRecurso
+    actualizados = VersionRecurso.objects.filter(recurso=recurso).update(
+        version=F('version') + 1, fechaModificacion=timezone.now()
+    )
+    if not actualizados:
+        _crear(recurso)
+
+
+def _crear(recurso):
+    """Crea el contador del recurso (si otro proceso se adelantó se usa el suyo) y retorna (versión, fecha)"""
+    from .models import VersionRecurso
+    try:
+        with transaction.atomic():
+            VersionRecurso.objects.create(recurso=recurso, fechaModificacion=timezone.now())
+    except IntegrityError:
+        pass
+    return VersionRecurso.objects.filter(recurso=recurso).values_list('version', 'fechaModificacion').get()
@@ -1,36 +1,179 @@
-from rest_framework import viewsets, permissions, status
+from rest_framework import viewsets, permissions, status, serializers
 from rest_framework.decorators import action, permission_classes, api_view, authentication_classes
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.dateparse import parse_datetime
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
 from .models import (
     TipoUsuario, MetodoAcuicola, Finca, Usuario, TipoEstanque, 
     Estanque, Especie, Inventario, Siembra, HistorialSiembra, 
     Desdoble, BitacoraDesdoble, HistorialEstanques, Sensor, 
-    Monitoreo, Alerta, InformacionNutricional, Vitamina, Mineral,
-    TasaCrecimiento, TasaReproduccion
+    Monitoreo, MonitoreoUltimo, MonitoreoResumen, Alerta, InformacionNutricional, Vitamina, Mineral,
+    TasaCrecimiento, TasaReproduccion, ReglaUmbral, DURACION_INTERVALO, inicio_intervalo, recurso_tablero,
+    MovimientoInventario, existencias_al, EstadoEstanque
 )
+from .servicios import (
+    actualizar_desdoble, actualizar_monitoreo, actualizar_siembra, eliminar_desdoble, eliminar_monitoreo,
+    eliminar_siembra, registrar_cancelacion, registrar_comercializacion, registrar_desdoble, registrar_monitoreo,
+    registrar_monitoreos, registrar_movimiento, registrar_mortalidad, registrar_siembra, registrar_siembras,
+    trasladar_inventario
+)
+from .crecimiento import proyectar_finca
+from .pagination import KeysetPagination
+from .versiones import obtener_validadores, obtener_version
 from .serializers import (
     UserSerializer, TipoUsuarioSerializer, MetodoAcuicolaSerializer, 
     FincaSerializer, UsuarioSerializer, TipoEstanqueSerializer, 
     EstanqueSerializer, EspecieSerializer, EspecieCreateUpdateSerializer,
     InventarioSerializer, SiembraSerializer, HistorialSiembraSerializer, 
     DesdobleSerializer, BitacoraDesdobleSerializer, HistorialEstanquesSerializer, 
-    SensorSerializer, MonitoreoSerializer, AlertaSerializer,
+    SensorSerializer, MonitoreoSerializer, MonitoreoBulkSerializer, SiembraBulkSerializer, AlertaSerializer,
     RegistroUsuarioSerializer, InformacionNutricionalSerializer,
     VitaminaSerializer, MineralSerializer, TasaCrecimientoSerializer,
-    TasaReproduccionSerializer
+    TasaReproduccionSerializer, ReglaUmbralSerializer,
+    MonitoreoLecturaSerializer, AlertaLecturaSerializer,
+    SiembraLecturaSerializer, InventarioLecturaSerializer, MovimientoInventarioSerializer, MortalidadSerializer
 )
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.db import transaction
+from django.db.models import Prefetch, Q
+from datetime import timedelta
+import csv
+import hashlib
 import json
 import logging
 
 # Configurar logger
 logger = logging.getLogger(__name__)
 
+# Límites para la carga masiva de monitoreos
+MONITOREO_BULK_MAX = 10000
+MONITOREO_BULK_BATCH_SIZE = 1000
+
+# Límite para la carga masiva de siembras
+SIEMBRA_BULK_MAX = 1000
+
+def prefetch_poblacion():
+    """Precarga la población de cada estanque que EstanqueSerializer muestra, en una consulta"""
+    return Prefetch('estados', queryset=EstadoEstanque.objects.select_related('idEspecie').order_by('idEspecie'))
+
+# Límites de puntos para las series de monitoreo
+SERIE_PUNTOS_DEFECTO = 500
+SERIE_PUNTOS_MAX = 5000
+SERIE_RANGO_DEFECTO = timedelta(days=7)
+
+# Filas leídas por consulta al exportar historiales
+EXPORTAR_CHUNK_SIZE = 2000
+EXPORTAR_COLUMNAS = ['idMonitoreo', 'idEstanque', 'estanque', 'idSensor', 'sensor', 'valor', 'fecha']
+
+class _BufferEco:
+    """Objeto tipo archivo que retorna lo escrito, para usar csv.writer en un generador"""
+    def write(self, valor):
+        return valor
+
+def _con_encabezado(encabezado, filas):
+    """Generador que antepone la fila de encabezado a las filas de datos"""
+    yield encabezado
+    yield from filas
+
+def parsear_fecha(valor):
+    """
+    Convierte un parámetro de consulta ISO 8601 en un datetime con zona horaria.
+    Lanza ValueError si el valor no es una fecha válida.
+    """
+    fecha = parse_datetime(valor)
+    if fecha is None:
+        raise ValueError(f"Fecha inválida: {valor}")
+    if timezone.is_naive(fecha):
+        fecha = timezone.make_aware(fecha)
+    return fecha
+
+class LecturaRapidaMixin:
+    """
+    Responde el listado y las acciones by_* con un serializador de lectura
+    rápida (filas de values() con los nombres relacionados unidos en SQL) en
+    lugar de instanciar modelos. El detalle y la escritura siguen usando
+    serializer_class.
+    """
+    lectura_serializer_class = None
+    
+    def list(self, request, *args, **kwargs):
+        return self.listar_rapido(self.filter_queryset(self.get_queryset()))
+    
+    def listar_rapido(self, queryset):
+        pagina = self.paginate_queryset(self.lectura_serializer_class.consultar(queryset))
+        return self.get_paginated_response(self.lectura_serializer_class(pagina).data)
+
+class NoModificado(Exception):
+    """El cliente ya tiene la versión vigente del recurso"""
+
+class GetCondicionalMixin:
+    """
+    GET condicional (ETag / Last-Modified) a partir del contador de versión
+    del recurso en api.versiones, que se incrementa por signal al guardar o
+    eliminar los modelos que forman su representación. La validación ocurre
+    después de autenticar y antes de consultar o serializar: si el cliente
+    envía la versión vigente se responde 304 sin cuerpo.
+    """
+    recurso_version = None
+    
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validadores = None
+        self.version_recurso = None
+        recurso = self.get_recurso_version()
+        if request.method not in ('GET', 'HEAD') or not recurso:
+            return
+        
+        version, modificado = obtener_validadores(recurso)
+        modificado = int(modificado)
+        self.version_recurso = version
+        # La representación depende también de la URL, del formato y del usuario (p. ej. mis_fincas)
+        llave = f"{recurso}:{version}:{request.get_full_path()}:{request.accepted_renderer.format}:{request.user.pk}"
+        etag = quote_etag(hashlib.md5(llave.encode()).hexdigest())
+        self.validadores = (etag, modificado)
+        
+        if_none_match = request.headers.get('If-None-Match')
+        if if_none_match:
+            etags = [valor.removeprefix('W/') for valor in parse_etags(if_none_match)]
+            if '*' in etags or etag in etags:
+                raise NoModificado()
+        else:
+            # Last-Modified tiene resolución de segundos: otro cambio en el mismo segundo
+            # no se distingue de la fecha enviada, así que solo una fecha posterior valida
+            if_modified_since = parse_http_date_safe(request.headers.get('If-Modified-Since', ''))
+            if if_modified_since is not None and modificado < if_modified_since:
+                raise NoModificado()
+    
+    def get_recurso_version(self):
+        """Recurso cuya versión valida la acción actual"""
+        return self.recurso_version
+    
+    def handle_exception(self, exc):
+        if isinstance(exc, NoModificado):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+    
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        validadores = getattr(self, 'validadores', None)
+        if validadores and response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            etag, modificado = validadores
+            response['ETag'] = etag
+            response['Last-Modified'] = http_date(modificado)
+            # El navegador guarda la respuesta pero la revalida en cada uso
+            patch_cache_control(response, private=True, no_cache=True)
+            patch_vary_headers(response, ['Authorization'])
+        return response
+
 class UserViewSet(viewsets.ModelViewSet):
     queryset = User.objects.all().order_by('id')
     serializer_class = UserSerializer
@@ -252,10 +395,20 @@ class TipoEstanqueViewSet(viewsets.ModelViewSet):
     serializer_class = TipoEstanqueSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class FincaViewSet(viewsets.ModelViewSet):
-    queryset = Finca.objects.all().order_by('idFinca')
+class FincaViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
+    queryset = Finca.objects.select_related('idMetodoAcuicola', 'idUsuario').order_by('idFinca')
     serializer_class = FincaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    recurso_version = 'fincas'
+    
+    def get_recurso_version(self):
+        # El tablero cambia con cada lectura y alerta: se valida con la versión de la finca
+        if self.action == 'dashboard':
+            return recurso_tablero(self.kwargs.get('pk'))
+        # La proyección depende de la hora de la consulta: no admite GET condicional
+        if self.action == 'proyeccion':
+            return None
+        return super().get_recurso_version()
     
     def perform_create(self, serializer):
         # Imprimir los datos recibidos para depuración
@@ -319,9 +472,10 @@ class FincaViewSet(viewsets.ModelViewSet):
         """Obtener todas las fincas del usuario actual"""
         try:
             usuario = Usuario.objects.get(user=request.user)
-            fincas = Finca.objects.filter(idUsuario=usuario).order_by('idFinca')
-            serializer = self.get_serializer(fincas, many=True)
-            return Response(serializer.data)
+            fincas = self.get_queryset().filter(idUsuario=usuario).order_by('idFinca')
+            pagina = self.paginate_queryset(fincas)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Usuario.DoesNotExist:
             return Response({"error": "Perfil de usuario no encontrado"}, status=status.HTTP_404_NOT_FOUND)
     
@@ -333,14 +487,99 @@ class FincaViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID del usuario"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            fincas = Finca.objects.filter(idUsuario=usuario_id).order_by('idFinca')
-            serializer = self.get_serializer(fincas, many=True)
-            return Response(serializer.data)
+            fincas = self.get_queryset().filter(idUsuario=usuario_id).order_by('idFinca')
+            pagina = self.paginate_queryset(fincas)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener fincas: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+    @action(detail=True, methods=['get'])
+    def dashboard(self, request, pk=None):
+        """
+        Tablero de la finca en una sola respuesta: estanques con sus últimas
+        lecturas y alertas activas, inventario, siembras y desdobles
+        """
+        finca = self.get_object()
+        version = getattr(self, 'version_recurso', None) or obtener_version(recurso_tablero(finca.pk))
+        clave = f"aquafarm:tablero:{finca.pk}:{version}"
+        tablero = cache.get(clave)
+        if tablero is None:
+            tablero = self._armar_tablero(finca)
+            cache.set(clave, tablero, timeout=getattr(settings, 'TABLERO_FINCA_TTL_SEGUNDOS', 30))
+        return Response(tablero)
+    
+    def _armar_tablero(self, finca):
+        """Arma el tablero con una consulta por sección, sin importar el número de estanques"""
+        estanques = Estanque.objects.select_related('idFinca', 'idTipoEstanque').prefetch_related(
+            prefetch_poblacion()
+        ).filter(idFinca=finca).order_by('idEstanque')
+        ultimos = Monitoreo.objects.filter(
+            idMonitoreo__in=MonitoreoUltimo.objects.filter(idEstanque__idFinca=finca).values('idMonitoreo')
+        ).order_by('idEstanque', 'idSensor')
+        alertas = Alerta.objects.filter(idFinca=finca, estado='ACTIVA').order_by('-fechaCreacion', '-idAlerta')
+        inventario = Inventario.objects.filter(idFinca=finca).order_by('idInventario')
+        siembras = Siembra.objects.filter(idEstanque__idFinca=finca).order_by('idSiembra')
+        desdobles = Desdoble.objects.filter(
+            Q(idEstanqueOrigen__idFinca=finca) | Q(idEstanqueDestino__idFinca=finca)
+        ).order_by('idDesdoble')
+        
+        estanques = EstanqueSerializer(estanques, many=True).data
+        por_estanque = {estanque['idEstanque']: estanque for estanque in estanques}
+        for estanque in estanques:
+            estanque['ultimos_monitoreos'] = []
+            estanque['alertas_activas'] = []
+        for monitoreo in MonitoreoLecturaSerializer(MonitoreoLecturaSerializer.consultar(ultimos)).data:
+            por_estanque[monitoreo['idEstanque']]['ultimos_monitoreos'].append(monitoreo)
+        for alerta in AlertaLecturaSerializer(AlertaLecturaSerializer.consultar(alertas)).data:
+            if alerta['idEstanque'] in por_estanque:
+                por_estanque[alerta['idEstanque']]['alertas_activas'].append(alerta)
+        
+        return {
+            'finca': self.get_serializer(finca).data,
+            'estanques': estanques,
+            'inventario': InventarioLecturaSerializer(InventarioLecturaSerializer.consultar(inventario)).data,
+            'siembras': SiembraLecturaSerializer(SiembraLecturaSerializer.consultar(siembras)).data,
+            'desdobles': DesdobleSerializer(desdobles, many=True).data,
+        }
+    
+    @action(detail=True, methods=['get'])
+    def proyeccion(self, request, pk=None):
+        """
+        Proyección de peso y biomasa de cada cohorte activa de la finca a una
+        fecha (`fecha` ISO 8601 o `dias` desde hoy, 30 por defecto) y fecha
+        estimada de cosecha al peso máximo de la especie o a `peso_objetivo` (kg).
+        Las cohortes sin peso inicial vienen con `peso_desconocido` y no suman
+        a los totales.
+        """
+        finca = self.get_object()
+        ahora = timezone.now()
+        try:
+            fecha = request.query_params.get('fecha')
+            if fecha:
+                fecha = parsear_fecha(fecha)
+            else:
+                fecha = ahora + timedelta(days=int(request.query_params.get('dias', 30)))
+            peso_objetivo = request.query_params.get('peso_objetivo')
+            peso_objetivo = float(peso_objetivo) if peso_objetivo else None
+            if peso_objetivo is not None and peso_objetivo <= 0:
+                raise ValueError("El peso objetivo debe ser mayor a cero")
+        except (ValueError, OverflowError) as e:
+            return Response({"error": f"Parámetros inválidos: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        proyecciones = proyectar_finca(finca.pk, fecha, peso_objetivo=peso_objetivo, ahora=ahora)
+        conocidas = [fila for fila in proyecciones if not fila['peso_desconocido']]
+        return Response({
+            'idFinca': finca.pk,
+            'fecha': fecha,
+            'estanques': proyecciones,
+            'biomasa_actual': round(sum(fila['biomasa_actual'] for fila in conocidas), 3),
+            'biomasa_proyectada': round(sum(fila['biomasa_proyectada'] for fila in conocidas), 3),
+            'peces_sin_peso': sum(fila['cantidad'] for fila in proyecciones if fila['peso_desconocido']),
+        })
+
 class UsuarioViewSet(viewsets.ModelViewSet):
-    queryset = Usuario.objects.all().order_by('idUsuario')
+    queryset = Usuario.objects.select_related('user', 'idTipoUsuario').order_by('idUsuario')
     serializer_class = UsuarioSerializer
     permission_classes = [permissions.IsAuthenticated]
     
@@ -348,16 +587,19 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     def me(self, request):
         """Obtener el perfil del usuario actual"""
         try:
-            usuario = Usuario.objects.get(user=request.user)
+            usuario = self.get_queryset().get(user=request.user)
             serializer = self.get_serializer(usuario)
             return Response(serializer.data)
         except Usuario.DoesNotExist:
             return Response({"error": "Perfil de usuario no encontrado"}, status=status.HTTP_404_NOT_FOUND)
 
-class EstanqueViewSet(viewsets.ModelViewSet):
-    queryset = Estanque.objects.all().order_by('idEstanque')
+class EstanqueViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
+    queryset = Estanque.objects.select_related('idFinca', 'idTipoEstanque').prefetch_related(
+        prefetch_poblacion()
+    ).order_by('idEstanque')
     serializer_class = EstanqueSerializer
     permission_classes = [permissions.IsAuthenticated]
+    recurso_version = 'estanques'
     
     @action(detail=False, methods=['get'])
     def by_finca(self, request):
@@ -367,15 +609,37 @@ class EstanqueViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID de la finca"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            estanques = Estanque.objects.filter(idFinca=finca_id).order_by('idEstanque')
-            serializer = self.get_serializer(estanques, many=True)
-            return Response(serializer.data)
+            estanques = self.get_queryset().filter(idFinca=finca_id).order_by('idEstanque')
+            pagina = self.paginate_queryset(estanques)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener estanques: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=True, methods=['post'])
+    def mortalidad(self, request, pk=None):
+        """Registrar peces muertos de una especie en el estanque; descuenta población e inventario"""
+        estanque = self.get_object()
+        serializer = MortalidadSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            with transaction.atomic():
+                mortalidad = serializer.save(idEstanque=estanque)
+                registrar_mortalidad(mortalidad)
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        estanque = self.get_queryset().get(pk=estanque.pk)
+        return Response({
+            "mortalidad": serializer.data,
+            "estanque": self.get_serializer(estanque).data
+        }, status=status.HTTP_201_CREATED)
 
 # Vistas para los nuevos modelos
 class InformacionNutricionalViewSet(viewsets.ModelViewSet):
-    queryset = InformacionNutricional.objects.all()
+    queryset = InformacionNutricional.objects.prefetch_related('vitaminas', 'minerales')
     serializer_class = InformacionNutricionalSerializer
     permission_classes = [permissions.IsAuthenticated]
 
@@ -392,9 +656,10 @@ class VitaminaViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID de la información nutricional"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            vitaminas = Vitamina.objects.filter(informacion_nutricional_id=info_id)
-            serializer = self.get_serializer(vitaminas, many=True)
-            return Response(serializer.data)
+            vitaminas = self.get_queryset().filter(informacion_nutricional_id=info_id)
+            pagina = self.paginate_queryset(vitaminas)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener vitaminas: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -411,9 +676,10 @@ class MineralViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID de la información nutricional"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            minerales = Mineral.objects.filter(informacion_nutricional_id=info_id)
-            serializer = self.get_serializer(minerales, many=True)
-            return Response(serializer.data)
+            minerales = self.get_queryset().filter(informacion_nutricional_id=info_id)
+            pagina = self.paginate_queryset(minerales)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener minerales: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -427,16 +693,46 @@ class TasaReproduccionViewSet(viewsets.ModelViewSet):
     serializer_class = TasaReproduccionSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class EspecieViewSet(viewsets.ModelViewSet):
-    queryset = Especie.objects.all().order_by('idEspecie')
+class EspecieViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
+    queryset = Especie.objects.select_related(
+        'informacion_nutricional', 'tasa_crecimiento', 'tasa_reproduccion'
+    ).prefetch_related(
+        'informacion_nutricional__vitaminas', 'informacion_nutricional__minerales'
+    ).order_by('idEspecie')
     serializer_class = EspecieSerializer
     permission_classes = [permissions.IsAuthenticated]
+    recurso_version = 'especies'
     
     def get_serializer_class(self):
         if self.action in ['create', 'update', 'partial_update']:
             return EspecieCreateUpdateSerializer
         return EspecieSerializer
     
+    def list(self, request, *args, **kwargs):
+        return self._respuesta_catalogo(request, lambda: super(EspecieViewSet, self).list(request, *args, **kwargs))
+    
+    def retrieve(self, request, *args, **kwargs):
+        return self._respuesta_catalogo(request, lambda: super(EspecieViewSet, self).retrieve(request, *args, **kwargs))
+    
+    def _respuesta_catalogo(self, request, generar):
+        """
+        Sirve el catálogo desde la caché con la versión 'especies', que cambia
+        al guardar o eliminar especies, su información nutricional, vitaminas,
+        minerales o tasas; el catálogo casi nunca se escribe y se lee en cada
+        pantalla de estanques
+        """
+        ruta = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        # La versión ya se leyó para los validadores del GET condicional
+        version = getattr(self, 'version_recurso', None) or obtener_version('especies')
+        clave = f"aquafarm:catalogo_especies:{version}:{ruta}"
+        datos = cache.get(clave)
+        if datos is not None:
+            return Response(datos)
+        respuesta = generar()
+        if respuesta.status_code == status.HTTP_200_OK:
+            cache.set(clave, respuesta.data, timeout=getattr(settings, 'CATALOGO_ESPECIES_TTL_SEGUNDOS', 3600))
+        return respuesta
+    
     @action(detail=True, methods=['get'])
     def info_completa(self, request, pk=None):
         """Obtener información completa de una especie, incluyendo relaciones"""
@@ -504,10 +800,75 @@ class EspecieViewSet(viewsets.ModelViewSet):
             return Response({"error": f"Error al eliminar especie: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
 
 # Vista actualizada para Inventario
-class InventarioViewSet(viewsets.ModelViewSet):
-    queryset = Inventario.objects.all().order_by('idInventario')
+class InventarioViewSet(GetCondicionalMixin, LecturaRapidaMixin, viewsets.ModelViewSet):
+    queryset = Inventario.objects.select_related('idEspecie', 'idFinca').order_by('idInventario')
     serializer_class = InventarioSerializer
+    lectura_serializer_class = InventarioLecturaSerializer
     permission_classes = [permissions.IsAuthenticated]
+    recurso_version = 'inventarios'
+    
+    # Las escrituras directas de la cantidad quedan en el libro como ajustes manuales
+    def perform_create(self, serializer):
+        inventario = serializer.save()
+        if inventario.cantidad:
+            registrar_movimiento(inventario.idEspecie_id, inventario.idFinca_id, 'AJUSTE', inventario.cantidad)
+    
+    def perform_update(self, serializer):
+        anterior = Inventario.objects.get(pk=serializer.instance.pk)
+        inventario = serializer.save()
+        if (anterior.idEspecie_id, anterior.idFinca_id) != (inventario.idEspecie_id, inventario.idFinca_id):
+            registrar_movimiento(anterior.idEspecie_id, anterior.idFinca_id, 'AJUSTE', -anterior.cantidad)
+            registrar_movimiento(inventario.idEspecie_id, inventario.idFinca_id, 'AJUSTE', inventario.cantidad)
+        elif inventario.cantidad != anterior.cantidad:
+            registrar_movimiento(inventario.idEspecie_id, inventario.idFinca_id, 'AJUSTE', inventario.cantidad - anterior.cantidad)
+    
+    def perform_destroy(self, instance):
+        if instance.cantidad:
+            registrar_movimiento(instance.idEspecie_id, instance.idFinca_id, 'AJUSTE', -instance.cantidad, descripcion="Inventario eliminado")
+        instance.delete()
+    
+    @action(detail=False, methods=['get'])
+    def historico(self, request):
+        """
+        Existencias a una fecha (parámetro fecha, ISO 8601), opcionalmente por
+        finca o especie, a partir del snapshot más cercano y los movimientos
+        posteriores del libro de inventario
+        """
+        if 'fecha' not in request.query_params:
+            return Response({"error": "Se requiere la fecha"}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fecha = parsear_fecha(request.query_params['fecha'])
+        except ValueError as e:
+            return Response({"error": f"Parámetros inválidos: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        filtros = {}
+        for parametro, campo in (('finca_id', 'idFinca'), ('especie_id', 'idEspecie')):
+            if request.query_params.get(parametro):
+                filtros[campo] = request.query_params[parametro]
+        
+        try:
+            existencias = existencias_al(fecha, **filtros)
+            especies = dict(Especie.objects.filter(
+                idEspecie__in={especie_id for especie_id, _ in existencias}
+            ).values_list('idEspecie', 'nombre'))
+            fincas = dict(Finca.objects.filter(
+                idFinca__in={finca_id for _, finca_id in existencias}
+            ).values_list('idFinca', 'nombre'))
+            return Response({
+                'fecha': fecha,
+                'existencias': [
+                    {
+                        'idEspecie': especie_id,
+                        'especie': especies.get(especie_id),
+                        'idFinca': finca_id,
+                        'finca': fincas.get(finca_id),
+                        'cantidad': cantidad,
+                    }
+                    for (especie_id, finca_id), cantidad in sorted(existencias.items())
+                ],
+            })
+        except Exception as e:
+            return Response({"error": f"Error al obtener existencias: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=False, methods=['get'])
     def by_especie(self, request):
@@ -517,9 +878,8 @@ class InventarioViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID de la especie"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            inventario = Inventario.objects.filter(idEspecie=especie_id).order_by('idInventario')
-            serializer = self.get_serializer(inventario, many=True)
-            return Response(serializer.data)
+            inventario = self.get_queryset().filter(idEspecie=especie_id).order_by('idInventario')
+            return self.listar_rapido(inventario)
         except Exception as e:
             return Response({"error": f"Error al obtener inventario: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -531,15 +891,14 @@ class InventarioViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID de la finca"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            inventario = Inventario.objects.filter(idFinca=finca_id).order_by('idInventario')
-            serializer = self.get_serializer(inventario, many=True)
-            return Response(serializer.data)
+            inventario = self.get_queryset().filter(idFinca=finca_id).order_by('idInventario')
+            return self.listar_rapido(inventario)
         except Exception as e:
             return Response({"error": f"Error al obtener inventario: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     @action(detail=True, methods=['post'])
     def agregar_cantidad(self, request, pk=None):
-        """Agregar cantidad al inventario"""
+        """Agregar cantidad al inventario con un UPDATE atómico"""
         try:
             inventario = self.get_object()
             cantidad = request.data.get('cantidad')
@@ -551,8 +910,10 @@ class InventarioViewSet(viewsets.ModelViewSet):
                 cantidad = int(cantidad)
             except (ValueError, TypeError):
                 return Response({"error": "La cantidad debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
+            if cantidad <= 0:
+                return Response({"error": "La cantidad debe ser mayor que cero"}, status=status.HTTP_400_BAD_REQUEST)
             
-            inventario.agregar_cantidad(cantidad)
+            inventario.agregar_cantidad(cantidad, descripcion=request.data.get('descripcion'))
             serializer = self.get_serializer(inventario)
             return Response(serializer.data)
         except Exception as e:
@@ -560,7 +921,7 @@ class InventarioViewSet(viewsets.ModelViewSet):
     
     @action(detail=True, methods=['post'])
     def reducir_cantidad(self, request, pk=None):
-        """Reducir cantidad del inventario"""
+        """Reducir cantidad del inventario con un UPDATE condicionado a que alcance"""
         try:
             inventario = self.get_object()
             cantidad = request.data.get('cantidad')
@@ -572,9 +933,11 @@ class InventarioViewSet(viewsets.ModelViewSet):
                 cantidad = int(cantidad)
             except (ValueError, TypeError):
                 return Response({"error": "La cantidad debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
+            if cantidad <= 0:
+                return Response({"error": "La cantidad debe ser mayor que cero"}, status=status.HTTP_400_BAD_REQUEST)
             
             try:
-                inventario.reducir_cantidad(cantidad)
+                inventario.reducir_cantidad(cantidad, descripcion=request.data.get('descripcion'))
                 serializer = self.get_serializer(inventario)
                 return Response(serializer.data)
             except ValueError as e:
@@ -582,11 +945,92 @@ class InventarioViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({"error": f"Error al reducir cantidad: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
-class SiembraViewSet(viewsets.ModelViewSet):
-    queryset = Siembra.objects.all().order_by('idSiembra')
+    @action(detail=True, methods=['post'])
+    def trasladar(self, request, pk=None):
+        """Trasladar peces de este inventario a la misma especie en otra finca"""
+        try:
+            inventario = self.get_object()
+            finca_destino_id = request.data.get('finca_destino_id')
+            cantidad = request.data.get('cantidad')
+            
+            if not finca_destino_id or not cantidad:
+                return Response({"error": "Se requieren la finca destino y la cantidad"}, status=status.HTTP_400_BAD_REQUEST)
+            
+            try:
+                cantidad = int(cantidad)
+            except (ValueError, TypeError):
+                return Response({"error": "La cantidad debe ser un número entero"}, status=status.HTTP_400_BAD_REQUEST)
+            if cantidad <= 0:
+                return Response({"error": "La cantidad debe ser mayor que cero"}, status=status.HTTP_400_BAD_REQUEST)
+            
+            try:
+                destino = Finca.objects.get(pk=finca_destino_id)
+            except (Finca.DoesNotExist, ValueError):
+                return Response({"error": "Finca destino no encontrada"}, status=status.HTTP_404_NOT_FOUND)
+            if destino.pk == inventario.idFinca_id:
+                return Response({"error": "La finca destino debe ser distinta de la de origen"}, status=status.HTTP_400_BAD_REQUEST)
+            
+            try:
+                trasladar_inventario(inventario.idEspecie_id, inventario.idFinca_id, destino.pk, cantidad)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            
+            inventario.refresh_from_db()
+            serializer = self.get_serializer(inventario)
+            return Response(serializer.data)
+        except Exception as e:
+            return Response({"error": f"Error al trasladar inventario: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class MovimientoInventarioViewSet(viewsets.ReadOnlyModelViewSet):
+    """Libro de movimientos de inventario (solo lectura: se escribe al cambiar el inventario)"""
+    queryset = MovimientoInventario.objects.select_related('idEspecie', 'idFinca').order_by('-fecha', '-idMovimientoInventario')
+    serializer_class = MovimientoInventarioSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @action(detail=False, methods=['get'])
+    def by_finca(self, request):
+        """Obtener los movimientos de inventario de una finca, opcionalmente de una especie"""
+        finca_id = request.query_params.get('finca_id')
+        if not finca_id:
+            return Response({"error": "Se requiere el ID de la finca"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            movimientos = self.get_queryset().filter(idFinca=finca_id)
+            especie_id = request.query_params.get('especie_id')
+            if especie_id:
+                movimientos = movimientos.filter(idEspecie=especie_id)
+            pagina = self.paginate_queryset(movimientos)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
+        except Exception as e:
+            return Response({"error": f"Error al obtener movimientos: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class SiembraViewSet(LecturaRapidaMixin, viewsets.ModelViewSet):
+    queryset = Siembra.objects.select_related('idEspecie').order_by('idSiembra')
     serializer_class = SiembraSerializer
+    lectura_serializer_class = SiembraLecturaSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            registrar_siembra(serializer.save())
+    
+    def perform_update(self, serializer):
+        anterior = Siembra.objects.get(pk=serializer.instance.pk)
+        try:
+            with transaction.atomic():
+                actualizar_siembra(serializer.save(), anterior)
+        except (ValueError, Inventario.DoesNotExist) as e:
+            raise serializers.ValidationError({"error": str(e)})
+    
+    def perform_destroy(self, instance):
+        try:
+            with transaction.atomic():
+                eliminar_siembra(instance)
+                instance.delete()
+        except (ValueError, Inventario.DoesNotExist) as e:
+            raise serializers.ValidationError({"error": str(e)})
+    
     @action(detail=False, methods=['get'])
     def by_estanque(self, request):
         """Obtener todas las siembras de un estanque específico"""
@@ -595,9 +1039,8 @@ class SiembraViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID del estanque"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            siembras = Siembra.objects.filter(idEstanque=estanque_id).order_by('idSiembra')
-            serializer = self.get_serializer(siembras, many=True)
-            return Response(serializer.data)
+            siembras = self.get_queryset().filter(idEstanque=estanque_id).order_by('idSiembra')
+            return self.listar_rapido(siembras)
         except Exception as e:
             return Response({"error": f"Error al obtener siembras: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -613,17 +1056,95 @@ class SiembraViewSet(viewsets.ModelViewSet):
             estanques = Estanque.objects.filter(idFinca=finca_id)
             
             # Obtener todas las siembras de esos estanques
-            siembras = Siembra.objects.filter(idEstanque__in=estanques).order_by('idSiembra')
-            serializer = self.get_serializer(siembras, many=True)
-            return Response(serializer.data)
+            siembras = self.get_queryset().filter(idEstanque__in=estanques).order_by('idSiembra')
+            return self.listar_rapido(siembras)
         except Exception as e:
             return Response({"error": f"Error al obtener siembras: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """
+        Registrar un lote de siembras en una transacción: un bulk_create de
+        siembras y otro de historiales, y el inventario actualizado una vez
+        por especie y finca en lugar de una vez por siembra
+        """
+        filas = request.data
+        if isinstance(filas, dict):
+            filas = filas.get('siembras')
+        
+        if not isinstance(filas, list) or not filas:
+            return Response({"error": "Se requiere una lista de siembras"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(filas) > SIEMBRA_BULK_MAX:
+            return Response(
+                {"error": f"El lote excede el máximo de {SIEMBRA_BULK_MAX} siembras"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = SiembraBulkSerializer(data=filas, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        datos = serializer.validated_data
+        
+        # Validar especies y estanques con una consulta por tabla, no por fila
+        especie_ids = {dato['idEspecie'] for dato in datos}
+        estanque_ids = {dato['idEstanque'] for dato in datos}
+        especies_faltantes = especie_ids - set(
+            Especie.objects.filter(idEspecie__in=especie_ids).values_list('idEspecie', flat=True)
+        )
+        fincas = dict(Estanque.objects.filter(idEstanque__in=estanque_ids).values_list('idEstanque', 'idFinca'))
+        estanques_faltantes = estanque_ids - set(fincas)
+        if especies_faltantes or estanques_faltantes:
+            return Response({
+                "error": "Existen especies o estanques inexistentes en el lote",
+                "especies": sorted(especies_faltantes),
+                "estanques": sorted(estanques_faltantes)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            with transaction.atomic():
+                siembras = Siembra.objects.bulk_create([
+                    Siembra(
+                        idEspecie_id=dato['idEspecie'],
+                        idEstanque_id=dato['idEstanque'],
+                        cantidad=dato['cantidad'],
+                        fecha=dato['fecha'],
+                        inversion=dato['inversion'],
+                        pesoInicial=dato.get('pesoInicial')
+                    )
+                    for dato in datos
+                ])
+                
+                # Historiales, inventario y libro se aplican una vez por lote
+                inventarios_actualizados = registrar_siembras(siembras, fincas)
+            
+            creadas = Siembra.objects.filter(idSiembra__in=[siembra.pk for siembra in siembras]).order_by('idSiembra')
+            return Response({
+                "siembras_creadas": len(siembras),
+                "inventarios_actualizados": inventarios_actualizados,
+                "siembras": SiembraLecturaSerializer(SiembraLecturaSerializer.consultar(creadas)).data
+            }, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            logger.error("Error en carga masiva de siembras: %s", str(e))
+            return Response({"error": f"Error al registrar siembras: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Vista actualizada para HistorialSiembra
-class HistorialSiembraViewSet(viewsets.ModelViewSet):
-    queryset = HistorialSiembra.objects.all().order_by('idHistorialSiembra')
+class HistorialSiembraViewSet(GetCondicionalMixin, viewsets.ModelViewSet):
+    queryset = HistorialSiembra.objects.select_related('idSiembra').order_by('idHistorialSiembra')
     serializer_class = HistorialSiembraSerializer
     permission_classes = [permissions.IsAuthenticated]
+    recurso_version = 'historiales_siembra'
+    
+    def perform_update(self, serializer):
+        estado_anterior = serializer.instance.estado
+        with transaction.atomic():
+            historial = serializer.save()
+            # Solo la transición a COMERCIALIZADO descuenta del inventario, y solo
+            # la salida de PENDIENTE cierra la siembra
+            if estado_anterior != 'COMERCIALIZADO' and historial.estado == 'COMERCIALIZADO':
+                registrar_comercializacion(historial, cerrar=estado_anterior == 'PENDIENTE')
+            elif estado_anterior == 'PENDIENTE' and historial.estado == 'CANCELADO':
+                registrar_cancelacion(historial)
     
     @action(detail=False, methods=['get'])
     def by_siembra(self, request):
@@ -633,9 +1154,10 @@ class HistorialSiembraViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID de la siembra"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            historial = HistorialSiembra.objects.filter(idSiembra=siembra_id).order_by('idHistorialSiembra')
-            serializer = self.get_serializer(historial, many=True)
-            return Response(serializer.data)
+            historial = self.get_queryset().filter(idSiembra=siembra_id).order_by('idHistorialSiembra')
+            pagina = self.paginate_queryset(historial)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener historial: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -647,9 +1169,10 @@ class HistorialSiembraViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el estado"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            historial = HistorialSiembra.objects.filter(estado=estado).order_by('idHistorialSiembra')
-            serializer = self.get_serializer(historial, many=True)
-            return Response(serializer.data)
+            historial = self.get_queryset().filter(estado=estado).order_by('idHistorialSiembra')
+            pagina = self.paginate_queryset(historial)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener historial: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -681,6 +1204,14 @@ class HistorialSiembraViewSet(viewsets.ModelViewSet):
             if not precio_venta:
                 return Response({"error": "Se requiere el precio de venta"}, status=status.HTTP_400_BAD_REQUEST)
             
+            # La fecha también se registra en el libro de inventario: se convierte antes de guardar
+            try:
+                fecha_comercializacion = HistorialSiembra._meta.get_field('fechaComercializacion').to_python(fecha_comercializacion)
+            except DjangoValidationError:
+                return Response({"error": "Fecha de comercialización inválida"}, status=status.HTTP_400_BAD_REQUEST)
+            if timezone.is_naive(fecha_comercializacion):
+                fecha_comercializacion = timezone.make_aware(fecha_comercializacion)
+            
             # Actualizar historial
             historial.fechaComercializacion = fecha_comercializacion
             historial.kilosVendidos = float(kilos_vendidos)
@@ -694,7 +1225,9 @@ class HistorialSiembraViewSet(viewsets.ModelViewSet):
             
             # Cambiar estado a COMERCIALIZADO
             historial.estado = 'COMERCIALIZADO'
-            historial.save()
+            with transaction.atomic():
+                historial.save()
+                registrar_comercializacion(historial)
             
             serializer = self.get_serializer(historial)
             return Response(serializer.data)
@@ -716,7 +1249,9 @@ class HistorialSiembraViewSet(viewsets.ModelViewSet):
             
             # Cambiar estado a CANCELADO
             historial.estado = 'CANCELADO'
-            historial.save()
+            with transaction.atomic():
+                historial.save()
+                registrar_cancelacion(historial)
             
             serializer = self.get_serializer(historial)
             return Response(serializer.data)
@@ -728,6 +1263,29 @@ class DesdobleViewSet(viewsets.ModelViewSet):
     serializer_class = DesdobleSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def perform_create(self, serializer):
+        try:
+            with transaction.atomic():
+                registrar_desdoble(serializer.save())
+        except ValueError as e:
+            raise serializers.ValidationError({"cantidad": [str(e)]})
+    
+    def perform_update(self, serializer):
+        anterior = Desdoble.objects.get(pk=serializer.instance.pk)
+        try:
+            with transaction.atomic():
+                actualizar_desdoble(serializer.save(), anterior)
+        except ValueError as e:
+            raise serializers.ValidationError({"cantidad": [str(e)]})
+    
+    def perform_destroy(self, instance):
+        try:
+            with transaction.atomic():
+                instance.delete()
+                eliminar_desdoble(instance)
+        except ValueError as e:
+            raise serializers.ValidationError({"cantidad": [str(e)]})
+    
     @action(detail=False, methods=['get'])
     def by_finca(self, request):
         """Obtener todos los desdobles de una finca específica"""
@@ -740,10 +1298,11 @@ class DesdobleViewSet(viewsets.ModelViewSet):
             estanques = Estanque.objects.filter(idFinca=finca_id)
             
             # Obtener todos los desdobles donde el estanque origen o destino pertenece a la finca
-            desdobles = Desdoble.objects.filter(idEstanqueOrigen__in=estanques) | Desdoble.objects.filter(idEstanqueDestino__in=estanques)
+            desdobles = self.get_queryset().filter(Q(idEstanqueOrigen__in=estanques) | Q(idEstanqueDestino__in=estanques))
             desdobles = desdobles.order_by('idDesdoble')
-            serializer = self.get_serializer(desdobles, many=True)
-            return Response(serializer.data)
+            pagina = self.paginate_queryset(desdobles)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener desdobles: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -755,9 +1314,10 @@ class DesdobleViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID del estanque"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            desdobles = Desdoble.objects.filter(idEstanqueOrigen=estanque_id).order_by('idDesdoble')
-            serializer = self.get_serializer(desdobles, many=True)
-            return Response(serializer.data)
+            desdobles = self.get_queryset().filter(idEstanqueOrigen=estanque_id).order_by('idDesdoble')
+            pagina = self.paginate_queryset(desdobles)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener desdobles: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -769,9 +1329,10 @@ class DesdobleViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID del estanque"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            desdobles = Desdoble.objects.filter(idEstanqueDestino=estanque_id).order_by('idDesdoble')
-            serializer = self.get_serializer(desdobles, many=True)
-            return Response(serializer.data)
+            desdobles = self.get_queryset().filter(idEstanqueDestino=estanque_id).order_by('idDesdoble')
+            pagina = self.paginate_queryset(desdobles)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener desdobles: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -789,9 +1350,10 @@ class BitacoraDesdobleViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID del desdoble"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            bitacoras = BitacoraDesdoble.objects.filter(idDesdoble=desdoble_id).order_by('idBitacoraDesdoble')
-            serializer = self.get_serializer(bitacoras, many=True)
-            return Response(serializer.data)
+            bitacoras = self.get_queryset().filter(idDesdoble=desdoble_id).order_by('idBitacoraDesdoble')
+            pagina = self.paginate_queryset(bitacoras)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
         except Exception as e:
             return Response({"error": f"Error al obtener bitácoras: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
@@ -805,11 +1367,47 @@ class SensorViewSet(viewsets.ModelViewSet):
     serializer_class = SensorSerializer
     permission_classes = [permissions.IsAuthenticated]
 
-class MonitoreoViewSet(viewsets.ModelViewSet):
-    queryset = Monitoreo.objects.all().order_by('idMonitoreo')
+class ReglaUmbralViewSet(viewsets.ModelViewSet):
+    queryset = ReglaUmbral.objects.select_related('idEspecie').order_by('idReglaUmbral')
+    serializer_class = ReglaUmbralSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    
+    @action(detail=False, methods=['get'])
+    def by_especie(self, request):
+        """Obtener todas las reglas de umbral de una especie específica"""
+        especie_id = request.query_params.get('especie_id')
+        if not especie_id:
+            return Response({"error": "Se requiere el ID de la especie"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            reglas = self.get_queryset().filter(idEspecie=especie_id).order_by('tipoSensor', 'idReglaUmbral')
+            pagina = self.paginate_queryset(reglas)
+            serializer = self.get_serializer(pagina, many=True)
+            return self.get_paginated_response(serializer.data)
+        except Exception as e:
+            return Response({"error": f"Error al obtener reglas: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+class MonitoreoViewSet(LecturaRapidaMixin, viewsets.ModelViewSet):
+    queryset = Monitoreo.objects.select_related('idSensor').order_by('idMonitoreo')
     serializer_class = MonitoreoSerializer
+    lectura_serializer_class = MonitoreoLecturaSerializer
     permission_classes = [permissions.IsAuthenticated]
     
+    def perform_create(self, serializer):
+        with transaction.atomic():
+            registrar_monitoreo(serializer.save())
+    
+    def perform_update(self, serializer):
+        monitoreo = serializer.instance
+        anterior = (monitoreo.idEstanque_id, monitoreo.idSensor_id, monitoreo.fecha)
+        with transaction.atomic():
+            actualizar_monitoreo(serializer.save(), anterior)
+    
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+            eliminar_monitoreo(instance)
+    
     @action(detail=False, methods=['get'])
     def by_estanque(self, request):
         """Obtener todos los monitoreos de un estanque específico"""
@@ -821,38 +1419,258 @@ class MonitoreoViewSet(viewsets.ModelViewSet):
         
         try:
             if latest:
-                # Obtener el último monitoreo para cada sensor del estanque
-                from django.db.models import Max
-                
-                # Obtener los IDs de los sensores que tienen monitoreos para este estanque
-                sensor_ids = Monitoreo.objects.filter(idEstanque=estanque_id).values('idSensor').distinct()
-                
-                latest_monitoreos = []
-                for sensor_id_dict in sensor_ids:
-                    sensor_id = sensor_id_dict['idSensor']
-                    # Obtener el último monitoreo para este sensor y estanque
-                    latest_monitoreo = Monitoreo.objects.filter(
-                        idEstanque=estanque_id,
-                        idSensor=sensor_id
-                    ).order_by('-fecha').first()
-                    
-                    if latest_monitoreo:
-                        latest_monitoreos.append(latest_monitoreo)
+                # Obtener el último monitoreo de cada sensor desde la tabla materializada
+                ultimos = MonitoreoUltimo.objects.filter(
+                    idEstanque=estanque_id
+                ).select_related('idMonitoreo__idSensor').order_by('idSensor')
+                latest_monitoreos = [ultimo.idMonitoreo for ultimo in ultimos]
                 
+                # Una fila por sensor: la respuesta ya está acotada y no se pagina
                 serializer = self.get_serializer(latest_monitoreos, many=True)
-            else:
-                # Obtener todos los monitoreos del estanque
-                monitoreos = Monitoreo.objects.filter(idEstanque=estanque_id).order_by('-fecha')
-                serializer = self.get_serializer(monitoreos, many=True)
+                return Response(serializer.data)
             
-            return Response(serializer.data)
+            # Obtener todos los monitoreos del estanque, paginados por fecha
+            monitoreos = self.get_queryset().filter(idEstanque=estanque_id).order_by('-fecha', '-idMonitoreo')
+            return self.listar_rapido(monitoreos)
         except Exception as e:
             return Response({"error": f"Error al obtener monitoreos: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        """Registrar un lote de monitoreos con un solo bulk_create y verificar sus alertas por lote"""
+        lecturas = request.data
+        if isinstance(lecturas, dict):
+            lecturas = lecturas.get('monitoreos')
+        
+        if not isinstance(lecturas, list) or not lecturas:
+            return Response({"error": "Se requiere una lista de monitoreos"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if len(lecturas) > MONITOREO_BULK_MAX:
+            return Response(
+                {"error": f"El lote excede el máximo de {MONITOREO_BULK_MAX} monitoreos"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        serializer = MonitoreoBulkSerializer(data=lecturas, many=True)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        datos = serializer.validated_data
+        
+        # Validar estanques y sensores con una consulta por tabla, no por fila
+        estanque_ids = {dato['idEstanque'] for dato in datos}
+        sensor_ids = {dato['idSensor'] for dato in datos}
+        estanques_faltantes = estanque_ids - set(
+            Estanque.objects.filter(idEstanque__in=estanque_ids).values_list('idEstanque', flat=True)
+        )
+        sensores_faltantes = sensor_ids - set(
+            Sensor.objects.filter(idSensor__in=sensor_ids).values_list('idSensor', flat=True)
+        )
+        if estanques_faltantes or sensores_faltantes:
+            return Response({
+                "error": "Existen estanques o sensores inexistentes en el lote",
+                "estanques": sorted(estanques_faltantes),
+                "sensores": sorted(sensores_faltantes)
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            with transaction.atomic():
+                monitoreos = Monitoreo.objects.bulk_create([
+                    Monitoreo(
+                        idEstanque_id=dato['idEstanque'],
+                        idSensor_id=dato['idSensor'],
+                        valor=dato['valor'],
+                        fecha=dato['fecha']
+                    )
+                    for dato in datos
+                ], batch_size=MONITOREO_BULK_BATCH_SIZE)
+                
+                # Los efectos se aplican una vez por lote
+                alertas_nuevas, alertas_actualizadas, alertas_resueltas = registrar_monitoreos(monitoreos)
+            
+            return Response({
+                "monitoreos_creados": len(monitoreos),
+                "alertas_creadas": len(alertas_nuevas),
+                "alertas_actualizadas": len(alertas_actualizadas),
+                "alertas_resueltas": alertas_resueltas
+            }, status=status.HTTP_201_CREATED)
+        except Exception as e:
+            logger.error("Error en carga masiva de monitoreos: %s", str(e))
+            return Response({"error": f"Error al registrar monitoreos: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'])
+    def rango(self, request):
+        """
+        Obtener los monitoreos de un sensor en un estanque dentro de un rango
+        de fechas, paginados por llave (cursor) del más reciente al más antiguo
+        """
+        estanque_id = request.query_params.get('estanque_id')
+        sensor_id = request.query_params.get('sensor_id')
+        if not estanque_id or not sensor_id:
+            return Response({"error": "Se requieren el ID del estanque y el ID del sensor"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            estanque_id = int(estanque_id)
+            sensor_id = int(sensor_id)
+            desde = request.query_params.get('desde')
+            hasta = request.query_params.get('hasta')
+            desde = parsear_fecha(desde) if desde else None
+            hasta = parsear_fecha(hasta) if hasta else None
+        except ValueError as e:
+            return Response({"error": f"Parámetros inválidos: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        monitoreos = self.get_queryset().filter(idEstanque=estanque_id, idSensor=sensor_id)
+        if desde:
+            monitoreos = monitoreos.filter(fecha__gte=desde)
+        if hasta:
+            monitoreos = monitoreos.filter(fecha__lte=hasta)
+        
+        paginador = KeysetPagination()
+        pagina = paginador.paginate_queryset(monitoreos, request, view=self)
+        serializer = self.get_serializer(pagina, many=True)
+        return paginador.get_paginated_response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def exportar(self, request):
+        """
+        Exportar el historial de monitoreos de un estanque como NDJSON o CSV.
+        Las filas se leen por bloques y se envían a medida que se generan,
+        por lo que la memoria usada no depende del tamaño del historial.
+        """
+        estanque_id = request.query_params.get('estanque_id')
+        sensor_id = request.query_params.get('sensor_id')
+        formato = request.query_params.get('formato', 'ndjson').lower()
+        if not estanque_id:
+            return Response({"error": "Se requiere el ID del estanque"}, status=status.HTTP_400_BAD_REQUEST)
+        if formato not in ('ndjson', 'csv'):
+            return Response({"error": "El formato debe ser 'ndjson' o 'csv'"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            estanque_id = int(estanque_id)
+            sensor_id = int(sensor_id) if sensor_id else None
+            desde = request.query_params.get('desde')
+            hasta = request.query_params.get('hasta')
+            desde = parsear_fecha(desde) if desde else None
+            hasta = parsear_fecha(hasta) if hasta else None
+        except ValueError as e:
+            return Response({"error": f"Parámetros inválidos: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        monitoreos = Monitoreo.objects.filter(idEstanque=estanque_id)
+        if sensor_id:
+            monitoreos = monitoreos.filter(idSensor=sensor_id)
+        if desde:
+            monitoreos = monitoreos.filter(fecha__gte=desde)
+        if hasta:
+            monitoreos = monitoreos.filter(fecha__lte=hasta)
+        
+        # El nombre del sensor se obtiene en el mismo SQL, sin consultas por fila
+        filas = monitoreos.order_by('fecha', 'idMonitoreo').values_list(
+            'idMonitoreo', 'idEstanque', 'idSensor', 'idSensor__nombreSensor', 'valor', 'fecha'
+        ).iterator(chunk_size=EXPORTAR_CHUNK_SIZE)
+        campo_fecha = serializers.DateTimeField()
+        
+        def registros():
+            for id_monitoreo, id_estanque, id_sensor, nombre_sensor, valor, fecha in filas:
+                yield [
+                    id_monitoreo, id_estanque, f"Estanque {id_estanque}", id_sensor,
+                    nombre_sensor, valor, campo_fecha.to_representation(fecha)
+                ]
+        
+        if formato == 'csv':
+            escritor = csv.writer(_BufferEco())
+            contenido = (escritor.writerow(fila) for fila in _con_encabezado(EXPORTAR_COLUMNAS, registros()))
+            content_type = 'text/csv; charset=utf-8'
+        else:
+            contenido = (json.dumps(dict(zip(EXPORTAR_COLUMNAS, fila)), ensure_ascii=False) + '\n' for fila in registros())
+            content_type = 'application/x-ndjson; charset=utf-8'
+        
+        response = StreamingHttpResponse(contenido, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="monitoreos_estanque_{estanque_id}.{formato}"'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def series(self, request):
+        """
+        Obtener la serie de un sensor en un estanque para un rango de fechas.
+        Usa los monitoreos crudos si caben en el número de puntos solicitado y,
+        si no, el resumen por hora o por día más fino que quepa. Si ni los
+        días caben, cada punto agrupa varios días consecutivos.
+        """
+        try:
+            estanque_id = int(request.query_params['estanque_id'])
+            sensor_id = int(request.query_params['sensor_id'])
+        except (KeyError, ValueError):
+            return Response({"error": "Se requieren el ID del estanque y el ID del sensor"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            hasta = parsear_fecha(request.query_params['hasta']) if 'hasta' in request.query_params else timezone.now()
+            desde = parsear_fecha(request.query_params['desde']) if 'desde' in request.query_params else hasta - SERIE_RANGO_DEFECTO
+            puntos = min(int(request.query_params.get('puntos', SERIE_PUNTOS_DEFECTO)), SERIE_PUNTOS_MAX)
+        except ValueError as e:
+            return Response({"error": f"Parámetros inválidos: {str(e)}"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        if desde > hasta or puntos < 1:
+            return Response({"error": "El rango de fechas o el número de puntos no es válido"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            monitoreos = Monitoreo.objects.filter(
+                idEstanque=estanque_id, idSensor=sensor_id, fecha__gte=desde, fecha__lte=hasta
+            )
+            respuesta = {'idEstanque': estanque_id, 'idSensor': sensor_id, 'desde': desde, 'hasta': hasta}
+            
+            # El conteo se acota a puntos + 1 para que su costo no dependa del historial
+            if monitoreos[:puntos + 1].count() <= puntos:
+                respuesta['resolucion'] = 'CRUDO'
+                respuesta['puntos'] = [
+                    {'inicio': fecha, 'minimo': valor, 'maximo': valor, 'promedio': valor, 'conteo': 1}
+                    for valor, fecha in monitoreos.order_by('fecha').values_list('valor', 'fecha')
+                ]
+                return Response(respuesta)
+            
+            # Intervalos de cada resolución que tocan el rango, de la más fina a la más gruesa
+            intervalos = {
+                resolucion: (hasta - inicio_intervalo(desde, resolucion)) // DURACION_INTERVALO[resolucion] + 1
+                for resolucion in ('HORA', 'DIA')
+            }
+            resolucion = 'HORA' if intervalos['HORA'] <= puntos else 'DIA'
+            origen = inicio_intervalo(desde, resolucion)
+            resumenes = MonitoreoResumen.objects.filter(
+                idEstanque=estanque_id, idSensor=sensor_id, resolucion=resolucion,
+                inicio__gte=origen, inicio__lte=hasta
+            ).order_by('inicio').values_list('inicio', 'minimo', 'maximo', 'suma', 'conteo')
+            
+            # Intervalos consecutivos por punto para no pasar de `puntos`
+            por_punto = -(-intervalos[resolucion] // puntos)
+            grupos = []
+            for inicio, minimo, maximo, suma, conteo in resumenes:
+                grupo = (inicio - origen) // (DURACION_INTERVALO[resolucion] * por_punto)
+                if grupos and grupos[-1][0] == grupo:
+                    _, inicio, minimo_grupo, maximo_grupo, suma_grupo, conteo_grupo = grupos[-1]
+                    grupos[-1] = (grupo, inicio, min(minimo_grupo, minimo), max(maximo_grupo, maximo),
+                                  suma_grupo + suma, conteo_grupo + conteo)
+                else:
+                    grupos.append((grupo, inicio, minimo, maximo, suma, conteo))
+            
+            respuesta['resolucion'] = resolucion
+            respuesta['intervalos_por_punto'] = por_punto
+            respuesta['puntos'] = [
+                {
+                    'inicio': inicio,
+                    'minimo': minimo,
+                    'maximo': maximo,
+                    'promedio': suma / conteo if conteo else None,
+                    'conteo': conteo
+                }
+                for _, inicio, minimo, maximo, suma, conteo in grupos
+            ]
+            return Response(respuesta)
+        except Exception as e:
+            return Response({"error": f"Error al obtener la serie: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 # Vista actualizada para Alerta
-class AlertaViewSet(viewsets.ModelViewSet):
-    queryset = Alerta.objects.all().order_by('-fechaCreacion')
+class AlertaViewSet(LecturaRapidaMixin, viewsets.ModelViewSet):
+    queryset = Alerta.objects.select_related('idEspecie').order_by('-fechaCreacion', '-idAlerta')
     serializer_class = AlertaSerializer
+    lectura_serializer_class = AlertaLecturaSerializer
     permission_classes = [permissions.IsAuthenticated]
     
     @action(detail=False, methods=['get'])
@@ -863,13 +1681,28 @@ class AlertaViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el ID del estanque"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Obtener monitoreos del estanque
-            monitoreos = Monitoreo.objects.filter(idEstanque=estanque_id)
-            
-            # Obtener alertas de esos monitoreos
-            alertas = Alerta.objects.filter(idMonitoreo__in=monitoreos).order_by('-fechaCreacion')
-            serializer = self.get_serializer(alertas, many=True)
-            return Response(serializer.data)
+            # Filtra por el estanque guardado en la alerta (índice estanque, estado, fecha)
+            alertas = self.get_queryset().filter(idEstanque=estanque_id)
+            estado = request.query_params.get('estado')
+            if estado:
+                alertas = alertas.filter(estado=estado)
+            return self.listar_rapido(alertas.order_by('-fechaCreacion', '-idAlerta'))
+        except Exception as e:
+            return Response({"error": f"Error al obtener alertas: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+    
+    @action(detail=False, methods=['get'])
+    def by_finca(self, request):
+        """Obtener todas las alertas de una finca, opcionalmente filtradas por estado"""
+        finca_id = request.query_params.get('finca_id')
+        if not finca_id:
+            return Response({"error": "Se requiere el ID de la finca"}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            alertas = self.get_queryset().filter(idFinca=finca_id)
+            estado = request.query_params.get('estado')
+            if estado:
+                alertas = alertas.filter(estado=estado)
+            return self.listar_rapido(alertas.order_by('-fechaCreacion', '-idAlerta'))
         except Exception as e:
             return Response({"error": f"Error al obtener alertas: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
@@ -881,9 +1714,8 @@ class AlertaViewSet(viewsets.ModelViewSet):
             return Response({"error": "Se requiere el estado"}, status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            alertas = Alerta.objects.filter(estado=estado).order_by('-fechaCreacion')
-            serializer = self.get_serializer(alertas, many=True)
-            return Response(serializer.data)
+            alertas = self.get_queryset().filter(estado=estado).order_by('-fechaCreacion', '-idAlerta')
+            return self.listar_rapido(alertas)
         except Exception as e:
             return Response({"error": f"Error al obtener alertas: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
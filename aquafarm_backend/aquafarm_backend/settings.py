@@ -54,9 +54,48 @@ INSTALLED_APPS = [
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework_simplejwt.authentication.JWTAuthentication',
-    )
+    ),
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CursorPaginacion',
+    'PAGE_SIZE': 100,
+    # JSON con orjson (si está instalado); el renderer navegable queda igual
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'api.parsers.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
 }
 
+# Alertas de monitoreo: una lectura fuera de rango tomada antes de que pasen
+# estos minutos desde la lectura que resolvió una alerta la reabre en lugar de
+# crear otra (se mide en fechas de lectura, no en la hora de la resolución)
+ALERTAS_HISTERESIS_MINUTOS = 30
+
+# Una alerta activa se resuelve sola cuando su estanque lleva estos minutos
+# recibiendo lecturas del mismo tipo de sensor dentro de rango
+ALERTAS_VENTANA_RESOLUCION_MINUTOS = 60
+
+# Lecturas dentro de rango que deben cubrir esa ventana para resolver la alerta:
+# al menos este número, sin huecos de más de estos minutos entre ellas
+ALERTAS_RESOLUCION_MIN_LECTURAS = 3
+ALERTAS_RESOLUCION_HUECO_MAXIMO_MINUTOS = 30
+
+# Los contadores de versión viven en la tabla VersionRecurso (api/versiones.py)
+# y las claves de la caché llevan la versión, así que la caché por defecto,
+# local a cada proceso, nunca sirve datos de una versión vieja.
+
+# Segundos que se guarda en caché el tablero de una finca; las escrituras a la
+# finca lo invalidan antes, este tiempo solo acota lo que no pasa por signals
+TABLERO_FINCA_TTL_SEGUNDOS = 30
+
+# Segundos que se conserva cada página del catálogo de especies en caché; las
+# escrituras al catálogo cambian su versión, así que solo limita la memoria
+# que ocupan las versiones viejas
+CATALOGO_ESPECIES_TTL_SEGUNDOS = 3600
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',